@@ -0,0 +1,140 @@
+"""
+Times every stage of InterpolatePresnModel on synthetic models (see synthetic_profiles.py) of all
+the formats, with several numbers of zones and output grids, and writes the results to a json file
+that can be used as a baseline by the following runs, e.g.
+python benchmarks/bench_conversion.py --zones 1000 100000 --ngrid 1000 100000 --output baseline.json
+python benchmarks/bench_conversion.py --zones 1000 100000 --ngrid 1000 100000 --baseline baseline.json
+The throughputs of parsing (load), reduction of the species (order), interpolation and writing (save)
+are compared with the ones of the baseline, and the script exits with status 1 if any of them is
+slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.interpolate_presn_model import InterpolatePresnModel, CONVERTER_VERSION
+from synthetic_profiles import FORMATS, model_properties, write_model_set
+
+## Throughputs compared with the baseline: name, stage, quantity divided by the time of the stage ##
+THROUGHPUTS = {'parse_MB_per_s': ('load', lambda case, stage: stage['bytes_read'] / 1e6),
+               'reduce_zones_per_s': ('order', lambda case, stage: case['zones']),
+               'interpolate_cells_per_s': ('interpolate', lambda case, stage: case['ngrid']),
+               'write_MB_per_s': ('save', lambda case, stage: stage['bytes_written'] / 1e6)}
+
+
+def case_key(model, ngrid):
+    """
+    Name of a benchmark case in the json file, e.g. 'KEPLER_std_z1000_b_n16000'.
+    """
+    return '{}_z{}{}_n{}'.format(model['format'], model['zones'], '_b' if model['bfield'] else '', ngrid)
+
+def benchmark_model(model, save_path, ngrids, repeat):
+    """
+    Converts a model on all the grids, parsing it once, repeat times.
+    return: dict, for every case the best time of every stage, the bytes read and written and the throughputs.
+    """
+    cases = {}
+    for _ in range(repeat):
+        converter = InterpolatePresnModel(model['file'], None, save_path, lazy=True, use_cache=False,
+                                          models_properties=[model_properties(model['name'])],
+                                          write_model_list=False, write_run_report=False)
+        for ngrid in ngrids:
+            converter.ngrid = ngrid
+            converter.output_suffix = '_n{}'.format(ngrid)
+            converter.save()
+            key = case_key(model, ngrid)
+            case = cases.setdefault(key, {'format': model['format'], 'zones': model['zones'],
+                                          'bfield': model['bfield'], 'ngrid': ngrid, 'stages': {}})
+            for stage, record in converter.run_report['stages'].items():
+                best = case['stages'].get(stage)
+                if best is None or record['wall_s'] < best['wall_s']:
+                    case['stages'][stage] = {key: record[key] for key in ('wall_s', 'cpu_s', 'peak_rss_MB',
+                                                                          'peak_rss_increase_MB',
+                                                                          'bytes_read', 'bytes_written')}
+    for case in cases.values():
+        case['throughput'] = {name: quantity(case, case['stages'][stage]) / max(case['stages'][stage]['wall_s'], 1e-9)
+                              for name, (stage, quantity) in THROUGHPUTS.items()}
+    return cases
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the throughputs of the cases present in both results and baseline.
+    return: list of str, the regressions.
+    """
+    regressions = []
+    for key, case in results.items():
+        if key not in baseline:
+            continue
+        for name, value in case['throughput'].items():
+            reference = baseline[key]['throughput'].get(name)
+            if reference and value < (1 - tolerance) * reference:
+                regressions.append('{} {}: {:.4g} against {:.4g} of the baseline ({:+.0f}%)'.format(
+                    key, name, value, reference, 100 * (value / reference - 1)))
+    return regressions
+
+def environment():
+    """
+    Versions of the interpreter, of numpy and of the converter, and the machine.
+    """
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'converter_version': CONVERTER_VERSION,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help='Numbers of zones of the synthetic models')
+    parser.add_argument('--ngrid', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help='Numbers of cells of the output grids')
+    parser.add_argument('--formats', type=str, nargs='+', default=list(FORMATS), choices=FORMATS,
+                        help='Formats of the synthetic models')
+    parser.add_argument('--bfield', action='store_true', help='Add the magnetic field to the synthetic models')
+    parser.add_argument('--max-full-zones', type=int, default=100000,
+                        help='Largest number of zones of the KEPLER_std_full models (about 350 isotopes, ' + \
+                        '100000 zones are already about 750 MB), default is 100000')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of repetitions, the best time is reported')
+    parser.add_argument('--work-path', type=str, default=None,
+                        help='Folder of the synthetic models and of the outputs, default is a temporary folder')
+    parser.add_argument('--output', type=str, default=None, help='Json file where the results are written')
+    parser.add_argument('--baseline', type=str, default=None, help='Json file of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative slowdown of a throughput reported as a regression, default is 0.25')
+    args = parser.parse_args()
+    logging.getLogger('src').setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp_path:
+        work_path = tmp_path if args.work_path is None else args.work_path
+        save_path = os.path.join(work_path, 'outputs')
+        os.makedirs(save_path, exist_ok=True)
+        results = {}
+        print('{:<40} {:>9} {:>9} {:>11} {:>9} {:>9} {:>12} {:>9} {:>11}'.format(
+            'case', 'load s', 'order s', 'interp s', 'mass s', 'save s', 'parse MB/s', 'Mzones/s', 'Mcells/s'))
+        for file_format in args.formats:
+            zones = [n for n in args.zones if file_format != 'KEPLER_std_full' or n <= args.max_full_zones]
+            for model in write_model_set(work_path, zones, (file_format,), args.bfield):
+                cases = benchmark_model(model, save_path, args.ngrid, args.repeat)
+                os.remove(model['file'])
+                for key, case in cases.items():
+                    stages, throughput = case['stages'], case['throughput']
+                    print('{:<40} {:>9.4f} {:>9.4f} {:>11.4f} {:>9.4f} {:>9.4f} {:>12.1f} {:>9.2f} {:>11.2f}'.format(
+                        key, stages['load']['wall_s'], stages['order']['wall_s'], stages['interpolate']['wall_s'],
+                        stages['mass']['wall_s'], stages['save']['wall_s'], throughput['parse_MB_per_s'],
+                        throughput['reduce_zones_per_s'] / 1e6, throughput['interpolate_cells_per_s'] / 1e6))
+                results.update(cases)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'tolerance': args.tolerance, 'results': results}, f, indent=4)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if baseline.get('environment') != environment():
+            print('Warning: the baseline was measured in a different environment: {}'.format(baseline.get('environment')))
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        print('{} regressions against {}.'.format(len(regressions), args.baseline))
+        sys.exit(1 if regressions else 0)
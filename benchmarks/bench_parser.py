@@ -0,0 +1,77 @@
+"""
+Compares the parsing time of np.genfromtxt with the one of src.presn_parser, and the time
+needed to find format, header and footer reading all the lines with the one of
+src.presn_parser.inspect_file, on a set of model files, e.g.
+python benchmarks/bench_parser.py --model-path model1.presn model2.data --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.presn_parser import find_file_format, find_footer, inspect_file, load_numeric_block
+
+
+def best_time(function, repeat):
+    """
+    Returns the best time out of repeat calls of function and its last result.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def benchmark_file(file_path, repeat):
+    """
+    Times the old (readlines + np.genfromtxt) and the new parsing path of a file,
+    and the old (readlines) and new (inspect_file) inspection of the file.
+    """
+    def readlines_inspection():
+        with open(file_path, 'r') as f:
+            lines = f.readlines()
+        return find_file_format(lines) + (find_footer(lines),)
+
+    def mmap_inspection():
+        inspection = inspect_file(file_path)
+        return inspection['format'], inspection['header_lines'], inspection['footer_lines']
+
+    old_inspection_time, (format, header_lines, footer_lines) = best_time(readlines_inspection, repeat)
+    new_inspection_time, inspection = best_time(mmap_inspection, repeat)
+    assert inspection == (format, header_lines, footer_lines), 'The two inspections give different results.'
+
+    def genfromtxt_path():
+        with open(file_path, 'r') as f:
+            f.readlines()
+        return np.genfromtxt(file_path, skip_header=header_lines, skip_footer=footer_lines)
+
+    def parser_path():
+        return load_numeric_block(file_path, header_lines, footer_lines)
+
+    old_time, old_data = best_time(genfromtxt_path, repeat)
+    new_time, new_data = best_time(parser_path, repeat)
+    assert old_data.shape == new_data.shape, 'The two parsers give different shapes.'
+    same = np.array_equal(old_data, new_data, equal_nan=True)
+    return {'file': file_path, 'format': format, 'shape': new_data.shape,
+            'size_MB': os.path.getsize(file_path) / 1024 ** 2,
+            'genfromtxt_s': old_time, 'parser_s': new_time, 'identical': same,
+            'readlines_s': old_inspection_time, 'inspect_s': new_inspection_time}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-path', type=str, nargs='+', required=True, help='Paths to the model files')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repetitions, the best time is reported')
+    args = parser.parse_args()
+    print('{:<40} {:<16} {:>14} {:>9} {:>14} {:>11} {:>8} {:>9} {:>13} {:>11}'.format(
+        'file', 'format', 'shape', 'size MB', 'genfromtxt s', 'parser s', 'speedup', 'identical',
+        'readlines s', 'inspect s'))
+    for file_path in args.model_path:
+        res = benchmark_file(file_path, args.repeat)
+        print('{:<40} {:<16} {:>14} {:>9.2f} {:>14.4f} {:>11.4f} {:>8.1f} {:>9} {:>13.4f} {:>11.5f}'.format(
+            os.path.basename(res['file']), res['format'], 'x'.join(map(str, res['shape'])),
+            res['size_MB'], res['genfromtxt_s'], res['parser_s'],
+            res['genfromtxt_s'] / res['parser_s'], str(res['identical']),
+            res['readlines_s'], res['inspect_s']))
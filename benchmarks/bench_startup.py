@@ -0,0 +1,134 @@
+"""
+Measures the startup of the scripts with python -X importtime, in fresh interpreters:
+    - cli_help: generate_presn_model.py --help, which must not load the converter;
+    - import_converter: import of src.interpolate_presn_model;
+    - convert_kepler: conversion of a small synthetic KEPLER model (see synthetic_profiles.py),
+      including the modules imported while converting;
+and checks that none of the optional heavy modules is imported, e.g.
+python benchmarks/bench_startup.py --output startup.json
+python benchmarks/bench_startup.py --baseline startup.json
+The import times are compared with the ones of the baseline, and the script exits with status 1 if
+any of them is slower than the baseline by more than the tolerance or if a heavy module is imported.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PACKAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PACKAGE_PATH)
+from synthetic_profiles import model_properties, write_model_set
+
+## Modules that the command line scripts and the KEPLER conversion must not import ##
+HEAVY_MODULES = ('pandas', 'scipy', 'matplotlib', 'h5py', 'sqlite3', 'difflib')
+## Code run by the convert_kepler case, it prints the heavy modules imported ##
+CONVERT_CODE = """
+import json, sys
+sys.path.insert(0, {package!r})
+from src.interpolate_presn_model import InterpolatePresnModel
+InterpolatePresnModel({file!r}, None, {save!r}, models_properties=[{properties!r}], use_cache=False)
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def import_times(stderr):
+    """
+    Parses the output of python -X importtime.
+    return: float, total import time in ms (sum of the self times),
+            dict, cumulative time in ms of the modules imported at the top level.
+    """
+    total, top_level = 0.0, {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        total += int(self_time) / 1e3
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative) / 1e3
+    return total, top_level
+
+def run_case(command, repeat):
+    """
+    Runs the command repeat times (after one run compiling the modules).
+    return: dict, best total import time and wall time in ms, the slowest top level imports and
+            the heavy modules imported.
+    """
+    best = None
+    for index in range(repeat + 1):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=PACKAGE_PATH,
+                                capture_output=True, text=True, check=True)
+        wall = (time.perf_counter() - start) * 1e3
+        total, top_level = import_times(result.stderr)
+        if index > 0 and (best is None or total < best['import_ms']):
+            imported = [name for name in HEAVY_MODULES if name in top_level or
+                        any(module.startswith(name + '.') for module in top_level)]
+            if result.stdout.strip().startswith('['):
+                imported = sorted(set(imported) | set(json.loads(result.stdout.strip().splitlines()[-1])))
+            slowest = sorted(top_level.items(), key=lambda item: -item[1])[:5]
+            best = {'import_ms': total, 'wall_ms': wall, 'slowest': dict(slowest), 'heavy_modules': imported}
+    return best
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the import times of the cases present in both results and baseline.
+    return: list of str, the regressions.
+    """
+    regressions = []
+    for key, case in results.items():
+        if case['heavy_modules']:
+            regressions.append('{} imports {}'.format(key, ', '.join(case['heavy_modules'])))
+        reference = baseline.get(key, {}).get('import_ms')
+        if reference and case['import_ms'] > (1 + tolerance) * reference:
+            regressions.append('{} import_ms: {:.1f} against {:.1f} of the baseline ({:+.0f}%)'.format(
+                key, case['import_ms'], reference, 100 * (case['import_ms'] / reference - 1)))
+    return regressions
+
+def environment():
+    """
+    Version of the interpreter and the machine.
+    """
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10, help='Number of runs of every case, the best one is reported')
+    parser.add_argument('--output', type=str, default=None, help='Json file where the results are written')
+    parser.add_argument('--baseline', type=str, default=None, help='Json file of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative slowdown of an import time reported as a regression, default is 0.25')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as work_path:
+        model = write_model_set(work_path, [1000], ('KEPLER_NEW',))[0]
+        save_path = os.path.join(work_path, 'outputs')
+        os.makedirs(save_path)
+        cases = {'cli_help': ['generate_presn_model.py', '--help'],
+                 'import_converter': ['-c', 'import src.interpolate_presn_model'],
+                 'convert_kepler': ['-c', CONVERT_CODE.format(package=PACKAGE_PATH, file=model['file'], save=save_path,
+                                                              properties=model_properties(model['name']),
+                                                              heavy=HEAVY_MODULES)]}
+        results = {}
+        print('{:<20} {:>10} {:>10}   {}'.format('case', 'import ms', 'wall ms', 'slowest top level imports (ms)'))
+        for key, command in cases.items():
+            results[key] = run_case(command, args.repeat)
+            print('{:<20} {:>10.1f} {:>10.1f}   {}'.format(key, results[key]['import_ms'], results[key]['wall_ms'],
+                  ', '.join('{} {:.1f}'.format(name, value) for name, value in results[key]['slowest'].items())))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'tolerance': args.tolerance, 'results': results}, f, indent=4)
+    regressions = compare(results, {}, args.tolerance)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if baseline.get('environment') != environment():
+            print('Warning: the baseline was measured in a different environment: {}'.format(baseline.get('environment')))
+    for regression in regressions:
+        print('REGRESSION ' + regression)
+    if args.baseline is not None:
+        print('{} regressions against {}.'.format(len(regressions), args.baseline))
+    sys.exit(1 if regressions else 0)
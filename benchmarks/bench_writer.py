@@ -0,0 +1,70 @@
+"""
+Compares the time needed to write star.dat/nuclei.dat like tables with np.savetxt and with
+src.table_writer, checking that the two files are byte identical, e.g.
+python benchmarks/bench_writer.py --ngrid 16000 100000 --columns 13 22
+"""
+import argparse
+import filecmp
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.table_writer import write_table
+
+
+def random_table(ngrid, ncolumns, seed=0):
+    """
+    Table with the cell number in the first column and values spanning many orders
+    of magnitude, with both signs, in the other ones.
+    """
+    rng = np.random.default_rng(seed)
+    table = np.empty((ngrid, ncolumns))
+    table[:, 0] = np.arange(1, ngrid + 1)
+    table[:, 1:] = rng.standard_normal((ngrid, ncolumns - 1)) * 10.0 ** rng.integers(-30, 30, (ngrid, ncolumns - 1))
+    table[::97, 1:] = 0.0
+    return table
+
+def benchmark_table(ngrid, ncolumns, tmp_path, repeat):
+    """
+    Times np.savetxt and write_table on the same table.
+    """
+    table = random_table(ngrid, ncolumns)
+    fmt = '\t%d' + '\t%.20E' * (ncolumns - 1)
+    savetxt_path = os.path.join(tmp_path, 'savetxt.dat')
+    writer_path = os.path.join(tmp_path, 'writer.dat')
+    savetxt_time, writer_time = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        np.savetxt(savetxt_path, table, fmt=fmt)
+        savetxt_time.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        write_table(writer_path, table, fmt)
+        writer_time.append(time.perf_counter() - start)
+    size = os.path.getsize(writer_path) / 1024 ** 2
+    return {'ngrid': ngrid, 'columns': ncolumns, 'size_MB': size,
+            'savetxt_s': min(savetxt_time), 'writer_s': min(writer_time),
+            'writer_MB_s': size / min(writer_time),
+            'identical': filecmp.cmp(savetxt_path, writer_path, shallow=False)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ngrid', type=int, nargs='+', default=[16000, 100000], help='Number of rows')
+    parser.add_argument('--columns', type=int, nargs='+', default=[13, 22], help='Number of columns')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repetitions, the best time is reported')
+    args = parser.parse_args()
+    print('{:>8} {:>8} {:>9} {:>11} {:>10} {:>8} {:>11} {:>10}'.format(
+        'ngrid', 'columns', 'size MB', 'savetxt s', 'writer s', 'speedup', 'writer MB/s', 'identical'))
+    identical = True
+    with tempfile.TemporaryDirectory() as tmp_path:
+        for ngrid in args.ngrid:
+            for ncolumns in args.columns:
+                res = benchmark_table(ngrid, ncolumns, tmp_path, args.repeat)
+                identical = identical and res['identical']
+                print('{:>8} {:>8} {:>9.2f} {:>11.4f} {:>10.4f} {:>8.1f} {:>11.1f} {:>10}'.format(
+                    res['ngrid'], res['columns'], res['size_MB'], res['savetxt_s'], res['writer_s'],
+                    res['savetxt_s'] / res['writer_s'], res['writer_MB_s'], str(res['identical'])))
+    if not identical:
+        sys.exit('The files written by write_table differ from the np.savetxt ones.')
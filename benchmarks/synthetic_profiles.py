@@ -0,0 +1,224 @@
+"""
+Writes synthetic pre-supernova profiles in the formats read by the package (KEPLER_NEW, KEPLER_std,
+KEPLER_std_full with a full network of isotopes and MESA), with any number of zones and with or
+without magnetic field, so the conversion can be benchmarked without the original models, e.g.
+python benchmarks/synthetic_profiles.py --output-path /tmp/synthetic --zones 1000 100000 --bfield
+The profiles are smooth power laws, the abundances are random and normalized in every zone and
+ye and abar are the ones of the abundances, so the models pass the validation.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.all_species_src.reduced_network import ELEMENTS, load_network
+from src.model_validation import source_composition
+
+FORMATS = ('KEPLER_NEW', 'KEPLER_std', 'KEPLER_std_full', 'MESA')
+## Group (folder) and short name of the synthetic models of every format ##
+FORMAT_NAMES = {'KEPLER_NEW': 'kn', 'KEPLER_std': 'ks', 'KEPLER_std_full': 'kf', 'MESA': 'me'}
+GROUP_NAME = 'SYNTHETIC2024'
+## Species of the KEPLER files with 20 species and of the MESA files ##
+KEPLER_SPECIES = ['nt1', 'h1', 'he3', 'he4', 'c12', 'n14', 'o16', 'ne20', 'mg24', 'si28', 's32', 'ar36',
+                  'ca40', 'ti44', 'cr48', 'fe52', 'fe54', 'ni56', 'fe56', "'fe'"]
+MESA_SPECIES = ['neut', 'h1', 'he3', 'he4', 'c12', 'n14', 'o16', 'ne20', 'mg24', 'si28', 's32', 'ar36',
+                'ca40', 'ti44', 'cr48', 'fe52', 'fe54', 'ni56', 'fe56']
+KEPLER_THERMO = ['mass', 'radius', 'velocity', 'density', 'temperature', 'pressure', 'energy', 'entropy',
+                 'omega', 'abar', 'ye']
+## Stability flags written in the KEPLER_std files, words that the parser has to skip ##
+STABILITY = ('conv', 'semi', 'neut', 'stab')
+ROWS_PER_CHUNK = 8192
+NUMBER = '%.12E'
+
+
+def full_network_species(max_Z=32):
+    """
+    Isotopes of a full KEPLER network, a dozen per element up to charge number max_Z
+    (about 350 species with the default). The nickel isotopes go up to ni71, which identifies
+    the format.
+    """
+    assert max_Z >= 28, 'max_Z must be at least 28 (nickel)'
+    names = ['nt1', 'h1', 'h2', 'he3', 'he4']
+    for Z in range(3, max_Z + 1):
+        last_A = 71 if ELEMENTS[Z] == 'ni' else 2 * Z + 9
+        names += [ELEMENTS[Z] + str(A) for A in range(max(Z + 1, 2 * Z - 2), last_A + 1)]
+    return names
+
+def profile(zones):
+    """
+    Smooth profile of a pre-supernova star, from the center to the surface.
+    return: dict of numpy arrays, the KEPLER thermodynamic quantities (see KEPLER_THERMO) but abar
+            and ye, given by the abundances (see _composition).
+    """
+    r = np.logspace(7, 12.5, zones)
+    density = 1e10 * (r / 1e7) ** -2.5 + 1e-8
+    temperature = 1e10 * (r / 1e7) ** -0.8
+    pressure = density * temperature * 1e8
+    return {'mass': np.cumsum(4 * np.pi * r ** 2 * np.gradient(r) * density),
+            'radius': r,
+            'velocity': -1e7 * np.exp(-r / 1e9),
+            'density': density,
+            'temperature': temperature,
+            'pressure': pressure,
+            'energy': 1.5 * pressure / density,
+            'entropy': 1 + np.log10(r / 1e6),
+            'omega': 0.1 * (r / 1e7) ** -1.5}
+
+def _composition(seed, species):
+    """
+    Random mass fractions, summing up to 1 in every zone, and the ye and abar they give, computed
+    as the validation does (see src.model_validation.source_composition). They are generated chunk
+    by chunk so that the full network of a large model is never held in memory, and the last chunk
+    is kept since they are different columns of the same rows.
+    param species: list of str, names of the species in the file.
+    return: dict of functions, abundances, ye and abar between two zones.
+    """
+    network = load_network(None)
+    last = {}
+    def chunk(start, stop):
+        if last.get('zones') != (start, stop):
+            x = np.random.default_rng((seed, start)).random((stop - start, len(species)))
+            x /= x.sum(axis=1)[:, None]
+            sums = source_composition(x, species, network)
+            last.update(zones=(start, stop), abundances=x, ye=sums[:, 1], abar=1 / sums[:, 2])
+        return last
+    return {name: lambda start, stop, name=name: chunk(start, stop)[name] for name in ('abundances', 'ye', 'abar')}
+
+def _write_rows(f, zones, columns, words=None):
+    """
+    Writes the rows of the numeric columns in chunks, the first column as an integer.
+    param columns: list of functions, every one returning the values of some columns between two zones.
+    param words: tuple (position, function), column of words inserted at position (default: None).
+    """
+    for start in range(0, zones, ROWS_PER_CHUNK):
+        stop = min(start + ROWS_PER_CHUNK, zones)
+        values = np.column_stack([column(start, stop) for column in columns])
+        row_format = '%d' + (' ' + NUMBER) * (values.shape[1] - 1)
+        if words is None:
+            f.write(((row_format + '\n') * (stop - start)) % tuple(values.ravel().tolist()))
+            continue
+        position, word_column = words
+        rows = values.tolist()
+        for row, word in zip(rows, word_column(start, stop)):
+            row.insert(position, word)
+        row_format = ' '.join(row_format.split(' ')[:position] + ['%s'] + row_format.split(' ')[position:])
+        f.write(((row_format + '\n') * (stop - start)) % tuple(itertools.chain.from_iterable(rows)))
+
+def write_kepler_profile(file_path, file_format, zones, bfield=False, seed=0, max_Z=32):
+    """
+    Writes a KEPLER profile.
+    param file_format: str, 'KEPLER_NEW' (20 species, comment header), 'KEPLER_std' (20 species,
+                       stability and blank columns) or 'KEPLER_std_full' (full network, stability column).
+    param zones: int, number of zones.
+    param bfield: bool, whether to add the magnetic field columns.
+    param max_Z: int, largest charge number of the full network.
+    """
+    assert file_format in FORMATS[:3], 'file_format must be one of ' + ', '.join(FORMATS[:3])
+    quantities = profile(zones)
+    species = full_network_species(max_Z) if file_format == 'KEPLER_std_full' else KEPLER_SPECIES
+    columns = [lambda start, stop: np.arange(start + 1, stop + 1)]
+    if file_format == 'KEPLER_NEW':
+        header = '# VERSION = 10503\n# synthetic model\n# generated by benchmarks/synthetic_profiles.py\n'
+        names = ['zone', 'ign'] + KEPLER_THERMO + species
+        columns.append(lambda start, stop: np.zeros(stop - start))
+    else:
+        header = 'VERSION 10000\n'
+        names = ['zone'] + KEPLER_THERMO + ['stability'] + (['blank'] if file_format == 'KEPLER_std' else []) + species
+    composition = _composition(seed, species)
+    columns += [composition[name] if name in composition else lambda start, stop, name=name: quantities[name][start:stop]
+                for name in KEPLER_THERMO]
+    if file_format == 'KEPLER_std':
+        columns.append(lambda start, stop: np.zeros(stop - start))
+    columns.append(composition['abundances'])
+    if bfield:
+        names += ['b_r', 'b_t']
+        columns.append(lambda start, stop: np.column_stack((1e10 * np.arange(start + 1, stop + 1),
+                                                             1e11 / np.arange(start + 1, stop + 1))))
+    words = None
+    if file_format != 'KEPLER_NEW':
+        words = (1 + len(KEPLER_THERMO), lambda start, stop: [STABILITY[i % len(STABILITY)] for i in range(start, stop)])
+    with open(file_path, 'w') as f:
+        f.write(header + ' '.join(names) + '\n')
+        _write_rows(f, zones, columns, words)
+        if file_format != 'KEPLER_NEW':
+            f.write('wind: ' + ' '.join([NUMBER % 1.0] * 5) + '\n')
+
+def write_mesa_profile(file_path, zones, bfield=False, energy=True, seed=0):
+    """
+    Writes a MESA profile, from the surface to the center.
+    param energy: bool, whether to write the internal energy, otherwise the sound speed is written
+                  and the energy is computed by the converter.
+    """
+    quantities = {name: values[::-1] for name, values in profile(zones).items()}
+    composition = _composition(seed, MESA_SPECIES)
+    names = ['zone', 'logT', 'logRho', 'logP', 'logR', 'ye', 'entropy', 'energy' if energy else 'csound',
+             'abar', 'velocity', 'omega'] + MESA_SPECIES
+    columns = [lambda start, stop: np.arange(start + 1, stop + 1),
+               lambda start, stop: np.log10(quantities['temperature'][start:stop]),
+               lambda start, stop: np.log10(quantities['density'][start:stop]),
+               lambda start, stop: np.log10(quantities['pressure'][start:stop]),
+               lambda start, stop: np.log10(quantities['radius'][start:stop] / 6.957e10),
+               composition['ye'],
+               lambda start, stop: quantities['entropy'][start:stop],
+               lambda start, stop: quantities['energy'][start:stop] if energy else np.full(stop - start, 2e8),
+               composition['abar'],
+               lambda start, stop: quantities['velocity'][start:stop],
+               lambda start, stop: quantities['omega'][start:stop],
+               composition['abundances']]
+    if bfield:
+        names += ['dynamo_log_B_r', 'dynamo_log_B_phi']
+        columns.append(lambda start, stop: np.column_stack((np.full(stop - start, 10.0),
+                                                             np.full(stop - start, 11.0))))
+    with open(file_path, 'w') as f:
+        f.write('   1   2   3\n   model_number   num_zones   initial_mass\n   1000   {}   15.0\n\n'.format(zones))
+        f.write(' '.join(str(i + 1) for i in range(len(names))) + '\n' + ' '.join(names) + '\n')
+        _write_rows(f, zones, columns)
+
+def model_properties(name):
+    """
+    Entry of the properties json file of a synthetic model.
+    """
+    return {'name': name, 'group': GROUP_NAME, 'ZAMS_mass': 15.0, 'mass': 14.0, 'xi15': '', 'xi175': '',
+            'xi25': '', 'star_type': 'single', 'metallicity': 'solar', 'omg': '', 'btor': '', 'bpol': '',
+            'comment': 'Synthetic profile.'}
+
+def write_model_set(output_path, zones, formats=FORMATS, bfield=False, max_Z=32):
+    """
+    Writes a synthetic model for every format and number of zones in output_path/GROUP_NAME,
+    and the properties.json file of the models in output_path.
+    return: list of dict, with the keys file, format, zones and bfield of every model.
+    """
+    group_path = os.path.join(output_path, GROUP_NAME)
+    os.makedirs(group_path, exist_ok=True)
+    models = []
+    for file_format, n in itertools.product(formats, zones):
+        name = FORMAT_NAMES[file_format] + str(n) + ('b' if bfield else '')
+        file_path = os.path.join(group_path, name + ('.txt' if file_format == 'MESA' else '.presn'))
+        if file_format == 'MESA':
+            write_mesa_profile(file_path, n, bfield)
+        else:
+            write_kepler_profile(file_path, file_format, n, bfield, max_Z=max_Z)
+        models.append({'file': file_path, 'name': name, 'format': file_format, 'zones': n, 'bfield': bfield})
+    properties_path = os.path.join(output_path, 'properties.json')
+    properties = []
+    if os.path.exists(properties_path):
+        with open(properties_path) as f:
+            properties = [entry for entry in json.load(f)
+                          if entry['name'] not in {model['name'] for model in models}]
+    with open(properties_path, 'w') as f:
+        json.dump(properties + [model_properties(model['name']) for model in models], f, indent=4)
+    return models
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output-path', type=str, required=True, help='Folder of the synthetic models')
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000], help='Numbers of zones')
+    parser.add_argument('--formats', type=str, nargs='+', default=list(FORMATS), choices=FORMATS, help='Formats')
+    parser.add_argument('--bfield', action='store_true', help='Add the magnetic field columns')
+    parser.add_argument('--max-Z', type=int, default=32, help='Largest charge number of the full KEPLER network')
+    args = parser.parse_args()
+    for model in write_model_set(args.output_path, args.zones, args.formats, args.bfield, args.max_Z):
+        print('{}: {} zones, {}'.format(model['file'], model['zones'], model['format']))
@@ -1,28 +1,132 @@
-from src.interpolate_presn_model import InterpolatePresnModel
+from src.grid_spec import parse_grid_spec
 import argparse
 
 parser = argparse.ArgumentParser()
-parser.add_argument('--model-path', type=str, required=True, help='Path to the model file')
+parser.add_argument('--model-path', type=str, required=True,
+                    help='Path to the model file, also compressed with gzip (.gz), or to a model inside a tar or zip ' + \
+                    'archive as archive_path::member_path, e.g. WH2007.tar.gz::s25.presn')
 parser.add_argument('--json-models-properties-path', type=str, 
                     default='../original/properties.json', 
                     help='Path tho the json file containing the models properties')
 parser.add_argument('--save-path', type=str,
                     default='../presn_models', 
                     help='Path to save the interpolated model. If None, the model is saved in the \"reusults\" folder')
+parser.add_argument('--paper-name', type=str, default=None,
+                    help='Group (paper) of the model in the json file, default is the name of the folder if it ends with ' + \
+                    'the year (e.g. WHW2002), otherwise the only group containing a model with the name of the file')
+parser.add_argument('--paper-names-path', type=str, default=None,
+                    help='Json file mapping paths of model files, names of model files or names of folders to their ' + \
+                    'group (paper), e.g. {"kepler_runs": "SW2014"}')
 parser.add_argument('--rmin', type=float, default=None, help='Minimum of the radius, default is 0.0')
 parser.add_argument('--rmax', type=float, default=None, help='Maximum of the radius, default is 1e13')
 parser.add_argument('--rmiddle', type=float, default=None, help='Middle radius of first grid cell, default is 4e4')
 parser.add_argument('--ngrid', type=int, default=None, help='Number of grid cells, default is 16000')
-parser.add_argument('--file-type', type=int, default=None, help='1 (old Heger file format) thermodynamics quantities' + \
-                    ' followed by mass fraction of all the elements, 2 (new Heger file format) thermodynamics quantities followed by 20 atomic species')
-parser.add_argument('--has-bfield', action='store_true', help='Magnetic field is included in the model')
+parser.add_argument('--grid-type', type=str, default='log', choices=['log', 'adaptive'],
+                    help='Grid: log (cells equally spaced in log r) or adaptive (cells placed where the model changes, ' + \
+                    'at most --ngrid of them), default is log')
+parser.add_argument('--grid-tolerance', type=float, default=0.01,
+                    help='Largest change in a cell of the adaptive grid of ln r, ln density, ln entropy, mass fractions ' + \
+                    'and enclosed mass over the total one, default is 0.01')
+parser.add_argument('--grid-max-ratio', type=float, default=1.05,
+                    help='Largest ratio between the widths of two neighbouring cells of the adaptive grid, default is 1.05')
+parser.add_argument('--adaptive-quantities', type=str, nargs='+', default=['density', 'entropy', 'composition'],
+                    choices=['density', 'entropy', 'composition', 'mass'],
+                    help='Quantities driving the adaptive grid, default is density entropy composition')
+parser.add_argument('--ntheta', type=int, default=1,
+                    help='Number of cells in the polar angle, more than one writes initial_model.y.dat and ' + \
+                    'initial_model.z.dat for a multi-dimensional grid, default is 1')
+parser.add_argument('--nphi', type=int, default=1, help='Number of cells in the azimuthal angle, default is 1')
+parser.add_argument('--theta-spacing', type=str, default='uniform', choices=['uniform', 'equatorial', 'polar'],
+                    help='Cells in the polar angle: uniform (equal width), equatorial (equal solid angle, narrower ' + \
+                    'towards the equator) or polar (narrower towards the poles), default is uniform')
+parser.add_argument('--file-type', type=str, default=None, choices=['KEPLER', 'MESA'],
+                    help='Format of the model file, default is automatic detection')
+parser.add_argument('--interpolation', type=str, default='linear', choices=['linear', 'loglog', 'pchip', 'conservative'],
+                    help='Interpolation scheme: linear, loglog (linear in log-log space), pchip (monotone cubic) ' + \
+                    'or conservative (mass conserving remap), default is linear')
+parser.add_argument('--binary-format', type=str, default=None, choices=['raw', 'fortran', 'npy'],
+                    help='Save also binary copies of the .dat files: raw (little-endian float64), fortran ' + \
+                    '(unformatted sequential record) or npy')
+parser.add_argument('--compression', type=str, default=None, choices=['gzip', 'xz', 'zstd'],
+                    help='Compress the .dat files while writing them: gzip (.dat.gz), xz (.dat.xz) or zstd (.dat.zst, ' + \
+                    'needs Python >= 3.14 or the zstandard package), default is no compression')
+parser.add_argument('--compression-level', type=int, default=None,
+                    help='Compression level, 0-9 for gzip (default 6) and xz (default 6), 1-22 for zstd (default 3)')
+parser.add_argument('--network', type=str, default=None,
+                    help='Reduced network of species: name of a network in src/all_species_src/networks or path ' + \
+                    'of a json file, default is aenus20 (the 20 KEPLER species)')
+parser.add_argument('--validation', type=str, default='warn', choices=['error', 'warn', 'off'],
+                    help='Checks of the parsed model (increasing radius, positive density, temperature and pressure, ' + \
+                    'normalized composition consistent with Ye and Abar, nan values): error (a model failing them is ' + \
+                    'not converted), warn (it is converted and flagged in the catalogue) or off, default is warn. ' + \
+                    'The composition checked is the one of the file, before the reduction to the network')
+parser.add_argument('--validation-tolerances', type=str, nargs='+', default=[],
+                    help='Tolerances of the checks, e.g. --validation-tolerances ye=0.1 nan_fraction=0.01, keys are ' + \
+                    'normalization (1e-2), ye (0.05), abar (0.25) and nan_fraction (0)')
+parser.add_argument('--catalogue-backend', type=str, default='json', choices=['json', 'sqlite'],
+                    help='Catalogue of the converted models: json (models_list.json) or sqlite (models_list.sqlite, ' + \
+                    'export it with python -m src.model_catalogue), default is json')
+parser.add_argument('--grids', type=parse_grid_spec, nargs='+', default=None,
+                    help='Save the model on several grids, parsing it only once, e.g. --grids ngrid=4000 ' + \
+                    'ngrid=8000,rmax=1e12 grid_type=adaptive name=_fine,ngrid=32000. The parameters not given are taken from ' + \
+                    '--rmin, --rmax, --rmiddle, --ngrid, --grid-type, --grid-tolerance, --ntheta, --nphi and --theta-spacing, every grid is saved in the model folder name followed ' + \
+                    'by its name (default: e.g. _n8000_rmax1e+12)')
+parser.add_argument('--log-level', type=str, default='info', choices=['debug', 'info', 'warning', 'error'],
+                    help='Level of the messages, debug also reports time, memory and bytes of every stage, default is info')
+parser.add_argument('--log-format', type=str, default='text', choices=['text', 'json'],
+                    help='Format of the messages: text or json (one object per line, the run report is attached ' + \
+                    'to the last one), default is text')
+parser.add_argument('--no-run-report', action='store_true', help='Do not write the run_report.json file next to the outputs')
+parser.add_argument('--no-cache', action='store_true', help='Do not use the cache of the parsed models')
+parser.add_argument('--clear-cache', action='store_true', help='Remove all the models from the cache before running')
+parser.add_argument('--cache-path', type=str, default=None, help='Folder of the cache, default is ~/.cache/PreSNmodelInterpolator')
+parser.add_argument('--cache-size', type=float, default=None, help='Maximum size of the cache in MB, default is 2048')
 
 args = parser.parse_args()
-InterpolatePresnModel(file_path=args.model_path,
-                      models_properties_path=args.json_models_properties_path,
-                      save_path=args.save_path,
-                      rmin = args.rmin,
-                      rmax = args.rmax,
-                      rmiddle = args.rmiddle,
-                      ngrid = args.ngrid,
-                      ftype = args.file_type)
+## the converter and numpy are imported only once the arguments are parsed ##
+from src.interpolate_presn_model import InterpolatePresnModel
+from src.model_cache import ParsedModelCache
+from src.models_properties import load_paper_names
+from src.model_validation import parse_validation_tolerances
+from src.run_report import configure_logging
+try:
+    validation_tolerances = parse_validation_tolerances(args.validation_tolerances)
+except ValueError as error:
+    parser.error(str(error))
+configure_logging(args.log_level, args.log_format)
+paper_names = None if args.paper_names_path is None else load_paper_names(args.paper_names_path)
+cache_size = None if args.cache_size is None else int(args.cache_size * 1024 ** 2)
+if args.clear_cache:
+    ParsedModelCache(args.cache_path, cache_size).clear()
+model = InterpolatePresnModel(file_path=args.model_path,
+                              models_properties_path=args.json_models_properties_path,
+                              save_path=args.save_path,
+                              rmin = args.rmin,
+                              rmax = args.rmax,
+                              rmiddle = args.rmiddle,
+                              ngrid = args.ngrid,
+                              grid_type = args.grid_type,
+                              grid_tolerance = args.grid_tolerance,
+                              grid_max_ratio = args.grid_max_ratio,
+                              adaptive_quantities = tuple(args.adaptive_quantities),
+                              ntheta = args.ntheta,
+                              nphi = args.nphi,
+                              theta_spacing = args.theta_spacing,
+                              ftype = args.file_type,
+                              paper_name = args.paper_name,
+                              paper_names = paper_names,
+                              interpolation = args.interpolation,
+                              binary_format = args.binary_format,
+                              compression = args.compression,
+                              compression_level = args.compression_level,
+                              validation = args.validation,
+                              validation_tolerances = validation_tolerances,
+                              catalogue_backend = args.catalogue_backend,
+                              network = args.network,
+                              write_run_report = not args.no_run_report,
+                              use_cache = not args.no_cache,
+                              cache_path = args.cache_path,
+                              cache_size = cache_size,
+                              lazy = args.grids is not None)
+if args.grids is not None:
+    model.save_grids(args.grids)
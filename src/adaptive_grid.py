@@ -0,0 +1,71 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+GRID_TYPES = ('log', 'adaptive')
+## Quantities that can drive the adaptive grid ##
+ADAPTIVE_QUANTITIES = ('density', 'entropy', 'composition', 'mass')
+
+
+def _refine(breakpoints, density, max_width):
+    """
+    Splits the intervals between the breakpoints wider than max_width, keeping their density,
+    so the smoothness constraint is enforced inside wide intervals too.
+    param max_width: numpy array, largest width of the parts of every interval.
+    """
+    widths = np.diff(breakpoints)
+    parts = np.maximum(1, np.ceil(widths / max_width).astype(int))
+    index = np.repeat(np.arange(len(widths)), parts)
+    offset = np.arange(len(index)) - np.repeat(np.cumsum(parts) - parts, parts)
+    refined = breakpoints[index] + widths[index] * offset / parts[index]
+    return np.append(refined, breakpoints[-1]), density[index]
+
+def _limit_growth(width, centers, slope):
+    """
+    Largest widths not exceeding width whose change between two points is at most slope times
+    their distance, i.e. min over j of width[j] + slope * |x - x[j]|, with two cumulative minima.
+    """
+    forward = slope * centers + np.minimum.accumulate(width - slope * centers)
+    backward = -slope * centers + np.minimum.accumulate((width + slope * centers)[::-1])[::-1]
+    return np.minimum(forward, backward)
+
+def adaptive_edges(x_source, monitors, x_first, x_last, max_cells, tolerance, max_ratio):
+    """
+    Edges of a grid in x = ln(r) between x_first and x_last placing the cells so that in every cell
+    x and every monitored quantity change by at most tolerance, with at most max_cells cells and
+    with the ratio between the widths (in x) of two neighbouring cells at most max_ratio.
+    The number of cells needed in every source interval is spread uniformly inside it, the widths are
+    limited to grow smoothly and the edges are placed by equidistributing the cells, everything
+    with vectorized operations. If the tolerance cannot be met with max_cells cells, max_cells
+    are used and a warning is logged.
+    param x_source: numpy array, increasing ln(r) of the source points.
+    param monitors: numpy array, (source points, quantities) monitored quantities, already scaled so
+                    that their absolute change is bounded (e.g. ln(density), mass fractions).
+    param max_ratio: float, > 1.
+    return: numpy array, increasing edges in x, from x_first to x_last.
+    """
+    assert x_first < x_last, 'x_first < x_last'
+    assert max_ratio > 1, 'max_ratio > 1'
+    assert tolerance > 0, 'tolerance > 0'
+    ## cells needed per unit x in every source interval, at least 1 / tolerance because of x itself ##
+    dx = np.diff(x_source)
+    change = np.max(np.abs(np.diff(monitors, axis=0)), axis=1, initial=0.0) if monitors.shape[1] > 0 else 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.where(dx > 0, np.maximum(change, dx) / (tolerance * dx), 1 / tolerance)
+    ## intervals between x_first and x_last, outside the source the profile is constant ##
+    breakpoints = np.clip(np.concatenate(([x_first], x_source, [x_last])), x_first, x_last)
+    density = np.concatenate(([1 / tolerance], density, [1 / tolerance]))
+    ## the widths can change only at the breakpoints, so they are made about as close as the cells ##
+    ## (at most a few times max_cells of them), then the widths are limited to grow smoothly ##
+    min_width = (x_last - x_first) / (4 * max_cells)
+    for _ in range(2):
+        width = _limit_growth(1 / density, 0.5 * (breakpoints[1:] + breakpoints[:-1]), max_ratio - 1)
+        breakpoints, density = _refine(breakpoints, 1 / width, np.maximum(width, min_width))
+    cumulative = np.concatenate(([0.0], np.cumsum(np.diff(breakpoints) * density)))
+    needed = int(np.ceil(cumulative[-1]))
+    cells = min(max(needed, 1), max_cells)
+    if needed > max_cells:
+        logger.warning('The adaptive grid needs %d cells to meet the tolerance %g, using %d cells ' + \
+                       '(the changes per cell are about %.2g).', needed, tolerance, max_cells,
+                       tolerance * cumulative[-1] / max_cells)
+    return np.interp(np.linspace(0, cumulative[-1], cells + 1), cumulative, breakpoints)
@@ -0,0 +1,231 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+NETWORKS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'networks')
+DEFAULT_NETWORK = 'aenus20'
+## Element symbols, the index is the charge number ('nt' are the KEPLER neutrons) ##
+ELEMENTS = ['nt', 'h', 'he', 'li', 'be', 'b', 'c', 'n', 'o', 'f', 'ne', 'na', 'mg', 'al', 'si', 'p', 's',
+            'cl', 'ar', 'k', 'ca', 'sc', 'ti', 'v', 'cr', 'mn', 'fe', 'co', 'ni', 'cu', 'zn', 'ga', 'ge',
+            'as', 'se', 'br', 'kr', 'rb', 'sr', 'y', 'zr', 'nb', 'mo', 'tc', 'ru', 'rh', 'pd', 'ag', 'cd',
+            'in', 'sn', 'sb', 'te', 'i', 'xe', 'cs', 'ba', 'la', 'ce', 'pr', 'nd', 'pm', 'sm', 'eu', 'gd',
+            'tb', 'dy', 'ho', 'er', 'tm', 'yb', 'lu', 'hf', 'ta', 'w', 're', 'os', 'ir', 'pt', 'au', 'hg',
+            'tl', 'pb', 'bi', 'po', 'at', 'rn', 'fr', 'ra', 'ac', 'th', 'pa', 'u', 'np', 'pu', 'am', 'cm',
+            'bk', 'cf', 'es', 'fm', 'md', 'no', 'lr', 'rf', 'db', 'sg', 'bh', 'hs', 'mt', 'ds', 'rg', 'cn',
+            'nh', 'fl', 'mc', 'lv', 'ts', 'og']
+_CHARGE_NUMBERS = {symbol: Z for Z, symbol in enumerate(ELEMENTS)}
+_ISOTOPE_NAME = re.compile(r'^([a-z]+)(\d+)$')
+## Sources of the abundances: single isotopes (full networks) or already reduced species ##
+SOURCES = ('isotopes', 'reduced')
+
+
+def parse_isotope(name):
+    """
+    Finds charge and mass number of an isotope from its name (e.g. 'fe56').
+    return: tuple of int, (Z, A), or None if the name is not an isotope (e.g. isomers as 'al*6').
+    """
+    match = _ISOTOPE_NAME.match(name.casefold())
+    if match is None or match.group(1) not in _CHARGE_NUMBERS:
+        return None
+    return _CHARGE_NUMBERS[match.group(1)], int(match.group(2))
+
+def _match_value(condition, value):
+    """
+    Checks a value against a condition, either a number or a [min, max] range (null for no limit).
+    """
+    if isinstance(condition, list):
+        return (condition[0] is None or value >= condition[0]) and \
+               (condition[1] is None or value <= condition[1])
+    return value == condition
+
+def _match_rule(rule, Z, A):
+    """
+    Checks whether an isotope satisfies all the conditions of a rule on Z, A and N-Z.
+    """
+    values = {'Z': Z, 'A': A, 'N-Z': A - 2 * Z}
+    return all(_match_value(condition, values[key]) for key, condition in rule.items())
+
+class ReducedNetwork:
+    """
+    Reduced network of species, defined in a json file (see networks/aenus20.json) as a list of
+    species, each with:
+        - name, A, Z, mass (in u), g (statistical weight);
+        - aliases: names of the species in the files already providing the reduced species
+          (KEPLER with 20 species, MESA);
+        - select: rules selecting the isotopes of the full networks summed up in the species,
+          every rule is a dict of conditions on Z, A and N-Z, each a number or a [min, max] range,
+          an isotope is selected if it satisfies all the conditions of at least one rule;
+        - exclude (optional): rules of the isotopes that are not summed up even if selected;
+        - description (optional): written next to the name in nuclei.pars;
+        - comment (optional): not used.
+    The order key lists the species in decreasing order of importance, as written in the namelist of
+    nuclei.pars. The optional sort_tables key lists the tables of suggested orders written in nuclei.pars,
+    each with its text (list of lines) and order (default: a single table in the order of the namelist),
+    and the notes are added to nuclei.pars, a note given as a dict with text and species only if the
+    species is in the model.
+    For every header the definition is compiled once in a (species in the file, species in the network)
+    matrix, so the reduction is a single matrix product.
+    """
+    def __init__(self, network_path):
+        """
+        network_path: str, path of the json file.
+        """
+        with open(network_path, 'rb') as f:
+            content = f.read()
+        definition = json.loads(content)
+        self.digest = hashlib.sha256(content).hexdigest()[:16]
+        self.name = definition['name']
+        self.species = definition['species']
+        self.names = [species['name'] for species in self.species]
+        self.order = definition.get('order', self.names)
+        self.sort_tables = definition.get('sort_tables', [{'text': ['- the nuclei are sorted as follows:'],
+                                                           'order': self.order}])
+        self.notes = [note if isinstance(note, dict) else {'text': note} for note in definition.get('notes', [])]
+        for species in self.species:
+            for key in ('name', 'A', 'Z', 'mass', 'g', 'aliases', 'select'):
+                if key not in species:
+                    raise ValueError('Species {} of the network {} has no {}.'.format(
+                        species.get('name', '?'), self.name, key))
+        for order in [self.order] + [table['order'] for table in self.sort_tables]:
+            if sorted(order) != sorted(self.names):
+                raise ValueError('The orders of the network {} must contain all its species once.'.format(self.name))
+        self.__matrices = {}
+
+    def reduction_matrix(self, header, source):
+        """
+        Matrix reducing the abundances of a file to the species of the network.
+        param header: list of str, names of the species in the file.
+        param source: str, 'isotopes' to sum up the isotopes of a full network with the select
+                      rules, 'reduced' to take the species by their aliases.
+        return: numpy array, (species in the file, species in the network) read only matrix.
+        """
+        assert source in SOURCES, 'source must be one of ' + ', '.join(SOURCES)
+        key = (tuple(header), source)
+        if key not in self.__matrices:
+            matrix = np.zeros((len(header), len(self.species)))
+            for index, name in enumerate(header):
+                for target, species in enumerate(self.species):
+                    matrix[index, target] = self.__selects(species, name.casefold(), source)
+            matrix.flags.writeable = False
+            self.__matrices[key] = matrix
+        return self.__matrices[key]
+
+    def reduce(self, abundances, header, source, out=None):
+        """
+        Reduces the abundances of a file to the species of the network. When the species used are
+        contiguous columns, they are read through a view instead of being gathered.
+        param abundances: numpy array, (zones, columns) abundances, the first len(header) columns
+                          are the species in the header.
+        param out: numpy array, (zones, species in the network) array where the result is written
+                   (default: None, a new array).
+        return: numpy array, (zones, species in the network) abundances.
+        """
+        matrix = self.reduction_matrix(header, source)
+        used = np.flatnonzero(matrix.any(axis=1))
+        if len(used) > 0 and used[-1] - used[0] + 1 == len(used):
+            return np.matmul(abundances[:, used[0]:used[-1] + 1], matrix[used], out=out)
+        return np.matmul(abundances[:, used], matrix[used], out=out)
+
+    def missing_species(self, header, source):
+        """
+        Species of the network for which there is nothing in the file.
+        return: list of str, names of the missing species.
+        """
+        found = self.reduction_matrix(header, source).any(axis=0)
+        return [name for name, present in zip(self.names, found) if not present]
+
+    def nuclei_pars(self, paper_name, missing_species=()):
+        """
+        Text of the nuclei.pars file, the missing species are not written in the tables and in the
+        namelist, and a warning listing them is added at the end.
+        param paper_name: str, name of the group of models.
+        param missing_species: list of str, species that are not in the model.
+        """
+        indices = {name: index + 1 for index, name in enumerate(self.names)}
+        species = {species['name']: species for species in self.species}
+        present = [name for name in self.names if name not in missing_species]
+        order = [name for name in self.order if name not in missing_species]
+        text = 'provides the parameters and properties of the nuclear species of the\n' + \
+               'model\n\n' + \
+               'The namelist contains:\n' + \
+               '- nsp = number of species contained in the data\n' + \
+               '- species = Integer array, Dimension ( nsp )\n' + \
+               '  with the array indices of the species in the initial-data file.\n' + \
+               '  List them in decreasing order of importance, i.e., the ones that are\n' + \
+               '  to be simulated first and the ones that are nice to have but not\n' + \
+               '  crucial last.\n' + \
+               '- anuc, znuc, mnuc, gnuc: real arrays containing the mass and charge\n' + \
+               '  numbers, mass ( in u ) and statistical weights of the nuclei.  The\n' + \
+               '  arrays are sorted in the same way as the initial-data file.\n\n\n' + \
+               'In the {} files, these are ({} network):\n'.format(paper_name, self.name) + \
+               '- {} species:\n'.format(len(present))
+        for name in present:
+            text += '   {}. {}'.format(indices[name], name)
+            if 'description' in species[name]:
+                text += ' (' + species[name]['description'] + ')'
+            text += '\n'
+        separator = '  |-------+---------+-----+-----+-------------+---|\n'
+        for table in self.sort_tables:
+            text += ''.join(line + '\n' for line in table['text'])
+            text += separator + '  | Index | Nucleus |   A |   Z |       m [u] | g |\n' + separator
+            for name in table['order']:
+                if name in missing_species:
+                    continue
+                text += '  | {:>5} | {:<7} | {:>3} | {:>3} | {:>11.7f} | {:>1} |\n'.format(
+                    indices[name], name, species[name]['A'], species[name]['Z'], species[name]['mass'],
+                    species[name]['g'])
+            text += separator
+        text += '\n'
+        for note in self.notes:
+            if note.get('species') not in missing_species:
+                text += '  ' + note['text'] + '\n\n'
+        text += '&nucpars\n' + \
+                ' nsp = {}\n'.format(len(order)) + \
+                ' inuc = ' + ', '.join('{:2d}'.format(indices[name]) for name in order) + '\n' + \
+                ' anuc = ' + ', '.join('{:2d}'.format(species[name]['A']) for name in order) + '\n' + \
+                ' znuc = ' + ', '.join('{:2d}'.format(species[name]['Z']) for name in order) + '\n' + \
+                ' mnuc = ' + ', '.join('{:.7f}'.format(species[name]['mass']) for name in order) + '\n' + \
+                ' gnuc = ' + ', '.join('{:d}.'.format(species[name]['g']) for name in order) + '\n' + \
+                '/\n'
+        if len(missing_species) > 0:
+            text += '\n !! PLEASE NOTE THAT THE {} SPECIES {} NOT PRESENT IN THE {} FILES. !!\n'.format(
+                ', '.join(missing_species), 'IS' if len(missing_species) == 1 else 'ARE', paper_name)
+        return text
+
+    def __selects(self, species, name, source):
+        """
+        Whether a species of the file is summed up in a species of the network.
+        """
+        if source == 'reduced':
+            return name in species['aliases']
+        isotope = parse_isotope(name)
+        if isotope is None:
+            return False
+        return any(_match_rule(rule, *isotope) for rule in species['select']) and \
+               not any(_match_rule(rule, *isotope) for rule in species.get('exclude', []))
+
+@functools.lru_cache(maxsize=None)
+def load_network(network=None):
+    """
+    Loads a reduced network, once per process.
+    param network: str, name of a network in the networks folder or path of a json file
+                   (default: None, aenus20).
+    return: ReducedNetwork.
+    """
+    if network is None:
+        network = DEFAULT_NETWORK
+    if not network.endswith('.json'):
+        network = os.path.join(NETWORKS_PATH, network + '.json')
+    if not os.path.exists(network):
+        raise ValueError('Network {} not found, the available ones are: '.format(network) + \
+                         ', '.join(available_networks()) + '.')
+    return ReducedNetwork(network)
+
+def available_networks():
+    """
+    Names of the networks in the networks folder.
+    """
+    return sorted(f[:-5] for f in os.listdir(NETWORKS_PATH) if f.endswith('.json'))
@@ -0,0 +1,106 @@
+import numpy as np
+
+## Spacing of the cells in the polar angle theta: uniform, equatorial (uniform in cos(theta), i.e. ##
+## cells of equal solid angle, narrower towards the equator) or polar (narrower towards the poles) ##
+THETA_SPACINGS = ('uniform', 'equatorial', 'polar')
+## Quantities derived from the radial profiles on the angular grid, see AngularProfiles ##
+DERIVED_QUANTITIES = {'v_phi': ('omega',), 'b_r': ('b_poloidal',), 'b_theta': ('b_poloidal',),
+                      'b_phi': ('b_toroidal',)}
+
+
+def theta_edges(ntheta, spacing='uniform'):
+    """
+    Edges of the cells in the polar angle, from the north (0) to the south (pi) pole.
+    param spacing: str, one of THETA_SPACINGS.
+    return: numpy array, ntheta + 1 increasing edges.
+    """
+    assert spacing in THETA_SPACINGS, 'spacing must be one of ' + ', '.join(THETA_SPACINGS)
+    u = np.linspace(0, 1, ntheta + 1)
+    if spacing == 'uniform':
+        edges = np.pi * u
+    elif spacing == 'equatorial':
+        edges = np.arccos(np.clip(1 - 2 * u, -1, 1))
+    else:
+        edges = 0.5 * np.pi * (1 - np.cos(np.pi * u))
+    edges[[0, -1]] = 0.0, np.pi
+    return edges
+
+def phi_edges(nphi):
+    """
+    Edges of the cells in the azimuthal angle, uniform between 0 and 2 pi.
+    return: numpy array, nphi + 1 increasing edges.
+    """
+    return np.linspace(0, 2 * np.pi, nphi + 1)
+
+def angular_table(edges):
+    """
+    Table of an angular grid with the layout of initial_model.x.dat: cell number, left edge,
+    center and right edge of every cell.
+    return: numpy array, (cells, 4) table.
+    """
+    table = np.empty((len(edges) - 1, 4))
+    table[:, 0] = np.arange(1, len(edges))
+    table[:, 1] = edges[:-1]
+    table[:, 2] = 0.5 * (edges[:-1] + edges[1:])
+    table[:, 3] = edges[1:]
+    return table
+
+class AngularProfiles:
+    """
+    Quantities of an interpolated model on the (r, theta, phi) cells, computed when they are asked
+    for by broadcasting the radial profiles, so no (nr, ntheta, nphi) array is ever stored:
+    a radial profile is returned as a read only view with zero strides along the angles, and a
+    derived quantity stores only its (nr, ntheta) values, since the model is axisymmetric.
+    The derived quantities assume rotation around the polar axis and the magnetic field geometry
+        - v_phi = omega r sin(theta);
+        - b_r = b_poloidal cos(theta), b_theta = -b_poloidal sin(theta), i.e. a poloidal field
+          parallel to the axis with magnitude b_poloidal;
+        - b_phi = b_toroidal sin(theta), i.e. a toroidal field vanishing on the axis.
+    """
+    def __init__(self, radius, profiles, theta, phi):
+        """
+        radius: numpy array, centers of the radial cells.
+        profiles: dict, profile on the radial cells of every quantity (e.g. columns of star.dat).
+        theta, phi: numpy arrays, centers of the cells in the polar and azimuthal angle.
+        """
+        self.radius = radius
+        self.profiles = profiles
+        self.theta = theta
+        self.phi = phi
+        self.shape = (len(radius), len(theta), len(phi))
+
+    @property
+    def names(self):
+        """
+        Names of the quantities available, radial profiles and derived quantities.
+        """
+        return list(self.profiles.keys()) + [name for name, needed in DERIVED_QUANTITIES.items()
+                                             if all(quantity in self.profiles for quantity in needed)]
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        """
+        Quantity on the cells of the grid.
+        return: numpy array, (nr, ntheta, nphi) read only view.
+        """
+        if name in self.profiles:
+            values = self.profiles[name][:, None]
+        elif name in self.names:
+            values = self.__derived(name)
+        else:
+            raise KeyError('Unknown quantity \'{}\', use one of '.format(name) + ', '.join(self.names) + '.')
+        return np.broadcast_to(values[:, :, None], self.shape)
+
+    def __derived(self, name):
+        """
+        Values of a derived quantity on the (r, theta) cells, with a single outer product.
+        """
+        if name == 'v_phi':
+            return np.multiply.outer(self.profiles['omega'] * self.radius, np.sin(self.theta))
+        if name == 'b_r':
+            return np.multiply.outer(self.profiles['b_poloidal'], np.cos(self.theta))
+        if name == 'b_theta':
+            return np.multiply.outer(self.profiles['b_poloidal'], -np.sin(self.theta))
+        return np.multiply.outer(self.profiles['b_toroidal'], np.sin(self.theta))
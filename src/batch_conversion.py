@@ -0,0 +1,215 @@
+import collections
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.interpolate_presn_model import InterpolatePresnModel, DEFAULT_RESULTS_PATH, CATALOGUE_FILES
+from src.model_catalogue import ModelCatalogue, write_json_atomic
+from src.model_source import is_archive, iter_archive
+from src.model_validation import ModelValidationError
+from src.models_properties import load_properties_index
+from src.run_report import configure_logging
+
+logger = logging.getLogger(__name__)
+
+## Settings shared by all the models converted in a worker process ##
+_worker_settings = {}
+
+
+def find_model_files(models_path):
+    """
+    Finds the model files to convert, archives of models included (see iter_models).
+    models_path: str, either a folder (all the files in it are taken), a glob pattern or an archive.
+    return: list of str, sorted paths of the model files.
+    """
+    if os.path.isdir(models_path):
+        files = [os.path.join(models_path, f) for f in os.listdir(models_path)
+                 if not f.startswith('.')]
+    else:
+        files = glob.glob(models_path)
+    files = sorted(f for f in files if os.path.isfile(f))
+    if len(files) == 0:
+        raise ValueError('No model file found in ' + models_path + '.')
+    return files
+
+def iter_models(files):
+    """
+    Models of the files, the archives (tar, also compressed, and zip) are read in a single pass
+    and their models are given with their content, the other files are read by the workers.
+    return: generator of (str, bytes), path of the model and its content (None if not read).
+    """
+    for file_path in files:
+        if is_archive(file_path):
+            yield from iter_archive(file_path)
+        else:
+            yield file_path, None
+
+def _model_name(file_path, models_properties, kwargs):
+    """
+    Name of the folder the model is converted to, found without reading the model.
+    return: str, name of the model, None if it cannot be found (the worker reports the error).
+    """
+    try:
+        return InterpolatePresnModel(file_path=file_path, models_properties_path=None, save_path=None,
+                                     models_properties=models_properties, write_model_list=False,
+                                     lazy=True, **kwargs).model_name
+    except Exception:
+        return None
+
+def _skip_duplicates(models, models_properties, kwargs, duplicates):
+    """
+    Models whose name is not the one of a previous model: two files converted to the same name,
+    e.g. the same model as kn2000.presn.gz and inside SYNTHETIC2024.zip, would write the same folder
+    at the same time, so only the first one is converted.
+    duplicates: list, the summaries of the skipped models are appended to it, with the status duplicate.
+    return: generator of (str, bytes), models as given by iter_models.
+    """
+    first_files = {}
+    for file_path, file_content in models:
+        name = _model_name(file_path, models_properties, kwargs)
+        if name in first_files:
+            logger.debug('%s skipped, same name %s as %s', file_path, name, first_files[name])
+            duplicates.append({'file': file_path, 'name': name, 'status': 'duplicate',
+                               'error': 'same model name as ' + first_files[name]})
+            continue
+        if name is not None:
+            first_files[name] = file_path
+        yield file_path, file_content
+
+def _map_bounded(executor, function, items, window):
+    """
+    Submits the items to the pool keeping at most window of them pending, so the models read
+    from an archive are held in memory only while they wait for a worker.
+    return: list, results in the order of the items.
+    """
+    pending, results = collections.deque(), []
+    for item in items:
+        pending.append(executor.submit(function, *item))
+        if len(pending) >= window:
+            results.append(pending.popleft().result())
+    results.extend(future.result() for future in pending)
+    return results
+
+def _init_worker(models_properties, save_path, grids, kwargs, worker_log_level):
+    """
+    Stores the settings in the worker process, so they are sent only once,
+    and sets the level of the logging of the conversions.
+    """
+    if worker_log_level is not None:
+        if logging.getLogger().handlers:
+            ## handlers inherited from the main process (fork) ##
+            logging.getLogger().setLevel(worker_log_level.upper())
+        else:
+            configure_logging(worker_log_level)
+    _worker_settings['models_properties'] = models_properties
+    _worker_settings['save_path'] = save_path
+    _worker_settings['grids'] = grids
+    _worker_settings['kwargs'] = kwargs
+
+def _convert_model(file_path, file_content=None):
+    """
+    Converts a single model inside a worker process, on all the grids if any is given.
+    file_content: bytes, content of the model if read from an archive.
+    With validation 'error' a model failing the validation is skipped before the grid and reported as invalid,
+    a model whose outputs are all up to date is reported as up_to_date, with the validation report of its manifest.
+    return: dict, summary of the conversion.
+    """
+    summary = {'file': file_path, 'name': None, 'status': 'failed', 'error': ''}
+    grids = _worker_settings['grids']
+    start = time.perf_counter()
+    try:
+        model = InterpolatePresnModel(file_path=file_path,
+                                      models_properties_path=None,
+                                      save_path=_worker_settings['save_path'],
+                                      models_properties=_worker_settings['models_properties'],
+                                      write_model_list=False,
+                                      file_content=file_content,
+                                      lazy=grids is not None,
+                                      **_worker_settings['kwargs'])
+        if grids is None:
+            entries = [model.model_entry]
+        else:
+            entries = model.save_grids(grids)
+        summary['name'] = model.model_name
+        summary['status'] = 'up_to_date' if model.up_to_date else 'success'
+        summary['entries'] = entries
+        summary['validation'] = model.validation_report
+    except ModelValidationError as e:
+        summary['status'] = 'invalid'
+        summary['error'] = str(e)
+        summary['validation'] = e.report
+    except Exception as e:
+        summary['error'] = '{}: {}'.format(type(e).__name__, e)
+    summary['wall_s'] = time.perf_counter() - start
+    return summary
+
+def convert_models(models_path, models_properties_path, save_path, max_workers=None, grids=None,
+                   worker_log_level='warning', force=False, **kwargs):
+    """
+    Converts all the models found in a folder or matching a glob pattern using a pool of processes.
+    The models inside tar and zip archives are converted without extracting them, reading every
+    archive once from the beginning to the end.
+    The json file with the models properties is read only once and the catalogue of the models is
+    updated once at the end (and exported to models_list.json if it is a database), together with
+    a batch_summary.json file reporting the outcome of every model (success, up_to_date if its
+    outputs were already up to date, invalid if the model failed the validation, duplicate if a
+    previous file has the same model name, see _skip_duplicates, failed) and its validation report. Unless force is True, the models whose outputs are up to date, according to
+    the manifest.json file in their folder, are not converted again (see InterpolatePresnModel.save).
+    models_path: str, folder, glob pattern or archive of the model files.
+    models_properties_path: str, path to the json file containing the properties of the models.
+    save_path: str, path where the models will be saved (None for the results folder).
+    max_workers: int, number of processes (default: None, number of CPUs).
+    grids: list of dict, if given every model is saved on all these grids (see InterpolatePresnModel.save_grids).
+    worker_log_level: str, level of the logging of the conversions in the worker processes, one of
+                      src.run_report.LOG_LEVELS, None to keep the configuration of the main process
+                      (default: 'warning', only the problems are reported).
+    force: bool, whether to convert again also the models whose outputs are up to date (default: False).
+    kwargs: keyword arguments passed to InterpolatePresnModel.
+    return: list of dict, summary of the conversion of every model.
+    """
+    files = find_model_files(models_path)
+    models_properties = load_properties_index(models_properties_path)
+    if save_path is None:
+        save_path = DEFAULT_RESULTS_PATH
+        if not os.path.exists(save_path):
+            os.mkdir(save_path)
+    assert os.path.exists(save_path), 'The path provided does not exist.'
+    kwargs['skip_up_to_date'] = not force
+    archives = sum(is_archive(file_path) for file_path in files)
+    if archives > 0:
+        logger.info('Converting %d models and the models in %d archives...', len(files) - archives, archives)
+    else:
+        logger.info('Converting %d models...', len(files))
+    max_workers = os.cpu_count() if max_workers is None else max_workers
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(models_properties, save_path, grids, kwargs, worker_log_level)) as executor:
+        duplicates = []
+        summaries = _map_bounded(executor, _convert_model,
+                                 _skip_duplicates(iter_models(files), models_properties, kwargs, duplicates),
+                                 2 * max_workers)
+        summaries.extend(duplicates)
+    entries = [entry for summary in summaries if summary['status'] in ('success', 'up_to_date')
+               for entry in summary.pop('entries')]
+    if len(entries) > 0:
+        catalogue = ModelCatalogue(os.path.join(save_path, CATALOGUE_FILES[kwargs.get('catalogue_backend', 'json')]))
+        catalogue.upsert(entries)
+        if catalogue.backend != 'json':
+            catalogue.export_json(os.path.join(save_path, 'models_list.json'))
+    write_json_atomic(os.path.join(save_path, 'batch_summary.json'), summaries)
+    for summary in summaries:
+        if summary['status'] == 'success':
+            logger.info('\t%s: converted to %s in %.2f s', summary['file'], summary['name'], summary['wall_s'])
+        elif summary['status'] == 'up_to_date':
+            logger.info('\t%s: %s up to date', summary['file'], summary['name'])
+        elif summary['status'] == 'invalid':
+            logger.error('\t%s: SKIPPED (%s)', summary['file'], summary['error'])
+        elif summary['status'] == 'duplicate':
+            logger.warning('\t%s: DUPLICATE (%s)', summary['file'], summary['error'])
+        else:
+            logger.error('\t%s: FAILED (%s)', summary['file'], summary['error'])
+    logger.info('%d of %d models converted, %d up to date, %d skipped by the validation, %d duplicates.',
+                sum(summary['status'] == 'success' for summary in summaries), len(summaries),
+                sum(summary['status'] == 'up_to_date' for summary in summaries),
+                sum(summary['status'] == 'invalid' for summary in summaries), len(duplicates))
+    return summaries
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+from src.table_writer import read_table
+
+## Extension of the files for every binary format ##
+BINARY_FORMATS = {'raw': '.bin', 'fortran': '.unf', 'npy': '.npy'}
+## Files written by the converter and their ASCII counterpart ##
+## (initial_model.z only for a multi-dimensional grid) ##
+BINARY_FILES = ['star', 'nuclei', 'initial_model.x', 'initial_model.y', 'initial_model.z']
+## Fortran record markers are 4 bytes long ##
+_MAX_RECORD_SIZE = 2 ** 31 - 1
+
+
+def binary_file_name(name, binary_format):
+    """
+    Name of the binary file corresponding to name.dat.
+    """
+    assert binary_format in BINARY_FORMATS, 'binary_format must be one of ' + ', '.join(BINARY_FORMATS.keys())
+    return name + BINARY_FORMATS[binary_format]
+
+def write_binary_table(file_path, array, binary_format):
+    """
+    Writes a 2D array as little-endian float64.
+    binary_format: str, one of
+        - 'raw': the rows one after the other, without any header;
+        - 'fortran': a single Fortran unformatted sequential record containing
+          the array in column-major order, i.e. read(unit) array(1:nrows, 1:ncolumns);
+        - 'npy': numpy .npy file.
+    """
+    array = np.asarray(array, dtype='<f8')
+    if binary_format == 'raw':
+        with open(file_path, 'wb') as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+    elif binary_format == 'fortran':
+        if array.nbytes > _MAX_RECORD_SIZE:
+            raise ValueError('The array is too large for a single Fortran record, use the raw or npy format.')
+        marker = np.array([array.nbytes], dtype='<i4').tobytes()
+        with open(file_path, 'wb') as f:
+            f.write(marker)
+            f.write(np.asfortranarray(array).tobytes(order='F'))
+            f.write(marker)
+    elif binary_format == 'npy':
+        np.save(file_path, array)
+    else:
+        raise ValueError('binary_format must be one of ' + ', '.join(BINARY_FORMATS.keys()))
+
+def read_binary_table(file_path, binary_format, ncolumns=None):
+    """
+    Reads a 2D array written by write_binary_table.
+    ncolumns: int, number of columns, needed by the raw and fortran formats.
+    return: numpy array, data.
+    """
+    if binary_format == 'npy':
+        return np.load(file_path)
+    assert ncolumns is not None, 'The number of columns is needed to read raw and fortran files.'
+    if binary_format == 'raw':
+        return np.fromfile(file_path, dtype='<f8').reshape(-1, ncolumns)
+    elif binary_format == 'fortran':
+        with open(file_path, 'rb') as f:
+            size = np.frombuffer(f.read(4), dtype='<i4')[0]
+            data = np.frombuffer(f.read(size), dtype='<f8')
+            if np.frombuffer(f.read(4), dtype='<i4')[0] != size:
+                raise ValueError('Corrupted Fortran record in ' + file_path + '.')
+        return data.reshape(ncolumns, -1).T
+    raise ValueError('binary_format must be one of ' + ', '.join(BINARY_FORMATS.keys()))
+
+def verify_binary_output(result_path, binary_format):
+    """
+    Checks that the binary files of a converted model contain exactly the same
+    numbers as the ASCII ones, compressed or not.
+    result_path: str, folder of the converted model.
+    return: dict, True or False for every file.
+    """
+    result = {}
+    for name in BINARY_FILES:
+        if not os.path.exists(os.path.join(result_path, binary_file_name(name, binary_format))):
+            continue
+        ascii_data = read_table(os.path.join(result_path, name + '.dat'))
+        binary_data = read_binary_table(os.path.join(result_path, binary_file_name(name, binary_format)),
+                                        binary_format, ascii_data.shape[1])
+        result[name] = ascii_data.shape == binary_data.shape and np.array_equal(ascii_data, binary_data)
+    return result
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Check the binary files of a converted model against the ASCII ones.')
+    parser.add_argument('--model-path', type=str, required=True, help='Folder of the converted model')
+    parser.add_argument('--binary-format', type=str, required=True, choices=list(BINARY_FORMATS.keys()),
+                        help='Format of the binary files')
+    args = parser.parse_args()
+    for name, same in verify_binary_output(args.model_path, args.binary_format).items():
+        print('{}: {}'.format(binary_file_name(name, args.binary_format), 'identical' if same else 'DIFFERENT'))
@@ -0,0 +1,47 @@
+import numpy as np
+
+## Masses (in solar masses) of the compactness parameters written in the catalogue ##
+COMPACTNESS_MASSES = {'xi15': 1.5, 'xi175': 1.75, 'xi25': 2.5}
+## Smallest charge number of the species summed up to find the edge of every core ##
+CORE_CHARGES = {'fe_core_mass': 22, 'si_core_mass': 14}
+## Mass fraction of those species at the edge of the core ##
+CORE_THRESHOLD = 0.5
+
+
+def cumulative_mass(edges, density):
+    """
+    Mass enclosed by every edge of a grid of shells with constant density, with a single cumsum.
+    param edges: numpy array, radii of the edges of the shells, the inner edge of the first one included.
+    param density: numpy array, density of every shell.
+    return: numpy array, mass between the first edge and every edge (0 at the first one).
+    """
+    mass = np.zeros(len(edges))
+    np.cumsum(4 * np.pi / 3 * np.diff(edges ** 3) * density, out=mass[1:])
+    return mass
+
+def mass_within(edges, mass, radius):
+    """
+    Mass between the first edge and the radius. Since the density is constant in every shell,
+    the mass is linear in r**3 inside the shell, so the interpolation is exact.
+    param mass: numpy array, cumulative_mass of the grid.
+    """
+    return np.interp(np.asarray(radius) ** 3, edges ** 3, mass)
+
+def radius_enclosing(edges, mass, enclosed):
+    """
+    Radius enclosing the given mass, inverse of mass_within.
+    return: numpy array, radii, nan where the grid does not contain as much mass.
+    """
+    enclosed = np.asarray(enclosed, dtype=float)
+    radius = np.cbrt(np.interp(enclosed, mass, edges ** 3))
+    return np.where(enclosed <= mass[-1], radius, np.nan)
+
+def core_mass(mass, fraction, threshold=CORE_THRESHOLD):
+    """
+    Mass enclosed by the outer edge of the outermost shell in which fraction reaches the threshold.
+    param mass: numpy array, cumulative_mass of the grid.
+    param fraction: numpy array, mass fraction of the species of the core in every shell.
+    return: float, mass of the core, 0 if there is no core.
+    """
+    inside = np.flatnonzero(fraction >= threshold)
+    return mass[inside[-1] + 1] if len(inside) > 0 else 0.0
@@ -0,0 +1,27 @@
+## Grids given on the command line, without importing numpy so that the scripts can parse ##
+## their arguments before loading the converter ##
+## Parameters of a grid and the short names used in the output folder names ##
+GRID_PARAMETERS = {'rmin': 'rmin', 'rmiddle': 'rmid', 'rmax': 'rmax', 'ngrid': 'n',
+                   'grid_type': '', 'grid_tolerance': 'tol', 'ntheta': 'nth', 'nphi': 'nph',
+                   'theta_spacing': ''}
+
+def parse_grid_spec(spec):
+    """
+    Parses a grid given as a string of comma separated key=value pairs, e.g. 'ngrid=8000,rmax=1e12'.
+    The keys are the ones of GRID_PARAMETERS and name, the suffix of the output folder.
+    return: dict, grid.
+    """
+    grid = {}
+    for item in spec.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key in ('name', 'grid_type', 'theta_spacing'):
+            grid[key] = value.strip()
+        elif key in ('ngrid', 'ntheta', 'nphi'):
+            grid[key] = int(value)
+        elif key in GRID_PARAMETERS:
+            grid[key] = float(value)
+        else:
+            raise ValueError('Unknown grid parameter \'{}\', use one of '.format(key) + \
+                             ', '.join(list(GRID_PARAMETERS.keys()) + ['name']) + '.')
+    return grid
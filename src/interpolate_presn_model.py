@@ -1,9 +1,30 @@
 import numpy as np
-from src.all_species_src.species_conv import convert_species
-import json
+from src.all_species_src.reduced_network import load_network
+from src.presn_parser import inspect_file, load_numeric_block
+from src.model_cache import ParsedModelCache
+from src.model_source import naming_path, read_model, source_hash
+from src.table_writer import COMPRESSIONS, COMPRESSION_LEVELS, check_compression, table_file_name, write_table
+from src.binary_io import BINARY_FILES, binary_file_name, write_binary_table
+from src.interpolation import INTERPOLATION_SCHEMES, parabolic_coefficients, evaluate_parabola
+from src.grid_spec import GRID_PARAMETERS
+from src.adaptive_grid import ADAPTIVE_QUANTITIES, GRID_TYPES, adaptive_edges
+from src.angular_grid import THETA_SPACINGS, AngularProfiles, angular_table, phi_edges, theta_edges
+from src.model_validation import THERMO_NAMES, VALIDATION_MODES, VALIDATION_TOLERANCES, ModelValidationError, \
+    count_nan, failed_checks, source_composition, validate_model
+from src.enclosed_mass import COMPACTNESS_MASSES, CORE_CHARGES, cumulative_mass, mass_within, radius_enclosing, core_mass
+from src.model_catalogue import ModelCatalogue, write_json_atomic
+from src.models_properties import PropertiesIndex, load_properties_index
+from src.output_manifest import build_manifest, outdated_reason, output_sizes, read_manifest, remove_manifest, write_manifest
+from src.run_report import StageMonitor
+import logging
 import os
-import platform
-import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CONVERTER_VERSION = '1.2'
+DEFAULT_RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results')
+## File of the catalogue of the converted models for every backend ##
+CATALOGUE_FILES = {'json': 'models_list.json', 'sqlite': 'models_list.sqlite'}
 
 class unit_converter:
     """
@@ -25,570 +46,943 @@ class unit_converter:
     def to_g(self, quantity):
         return quantity * self.msol
 
+## Columns of the KEPLER files: first column of the quantities (after cell number and, in the new ##
+## format, mass coordinate) and first column of the species (after stability and, in the standard ##
+## format with the reduced species, the column following it) ##
+KEPLER_COLUMNS = {'KEPLER_NEW': (2, 13), 'KEPLER_std': (1, 14), 'KEPLER_std_full': (1, 13)}
+## Offsets of radius, density, temperature, Ye, pressure, entropy, internal energy, Abar, velocity and ##
+## omega from the first column of the quantities, in the order of the thermo array ##
+KEPLER_THERMO_OFFSETS = (1, 3, 4, 10, 5, 7, 6, 9, 2, 8)
+
+## Stages of the conversion, the attributes they produce and the stages they need ##
+STAGES = ('load', 'order', 'validate', 'grid', 'interpolate', 'mass', 'save')
+STAGE_OUTPUTS = {'load': ('format', 'header', 'header_lines', 'footer_lines', 'has_bfield', 'species',
+                          'data_offsets', 'data'),
+                 'order': ('thermo', 'nuclei', 'comment', 'missing_species', 'nan_counts', 'composition',
+                           'source_profiles', 'cache_hit'),
+                 'validate': ('validation_report',),
+                 'grid': ('radius', 'theta', 'phi', 'ncells'),
+                 'interpolate': ('thermo_interp', 'nuclei_interp', 'angular_profiles'),
+                 'mass': ('mass', 'mass_profile', 'source_mass_profile', 'mass_error', 'compactness', 'core_masses'),
+                 'save': ('result_path', 'model_entry', 'run_report')}
+STAGE_DEPENDENCIES = {'load': (),
+                      'order': (),
+                      'validate': ('order',),
+                      'grid': ('validate',),
+                      'interpolate': ('grid',),
+                      'mass': ('interpolate',),
+                      'save': ('mass',)}
+## Parameters and the first stage to recompute when they change ##
+PARAMETER_STAGES = {'rmin': 'grid', 'rmax': 'grid', 'rmiddle': 'grid', 'ngrid': 'grid',
+                    'grid_type': 'grid', 'grid_tolerance': 'grid', 'grid_max_ratio': 'grid', 'adaptive_quantities': 'grid',
+                    'ntheta': 'grid', 'nphi': 'grid', 'theta_spacing': 'grid',
+                    'validation': 'validate', 'validation_tolerances': 'validate',
+                    'interpolation': 'interpolate',
+                    'write_model_list': 'save', 'write_run_report': 'save', 'binary_format': 'save', 'output_suffix': 'save',
+                    'compression': 'save', 'compression_level': 'save',
+                    'catalogue_backend': 'save', 'network': 'load'}
+## Parameters recorded in the manifest of the outputs, the model is converted again when one changes ##
+MANIFEST_PARAMETERS = ('rmin', 'rmax', 'rmiddle', 'ngrid', 'grid_type', 'grid_tolerance', 'grid_max_ratio',
+                       'adaptive_quantities', 'ntheta', 'nphi', 'theta_spacing', 'ftype', 'interpolation', 'validation', 'validation_tolerances',
+                       'binary_format', 'compression', 'compression_level')
+_ATTRIBUTE_STAGES = {attribute: stage for stage, outputs in STAGE_OUTPUTS.items() for attribute in outputs}
 class InterpolatePresnModel:
     """
     Class InterpolatePresnModel, the purpose of this class is to reshape a pre-supernova model
     in order to be used by Aenus. It also interpolates the quantities in order to have a more
     uniform grid.
+    The conversion is made of the stages in STAGES. Every stage runs the first time one of its
+    attributes (see STAGE_OUTPUTS) is accessed, or when run is called, and its results are kept.
+    Changing a grid or interpolation parameter discards only the stages that depend on it, e.g.
+        model = InterpolatePresnModel(path, json_path, save_path, lazy=True)
+        model.mass          # parses, interpolates and integrates, nothing is written
+        model.ngrid = 8000  # the parsed model is kept
+        model.save()        # grid, interpolation, mass and files with 8000 cells
+    The same model can be saved on several grids at once with save_grids.
     """
     def __init__(self, file_path, models_properties_path, save_path, **kwargs):
         """
         Class initialization, it takes as input the path of the model and the name of the model.
-        file_path: str, path to the model file.
+        file_path: str, path to the model file, a model compressed with gzip (.gz) or a model inside
+                   a tar or zip archive, given as archive_path::member_path (see src.model_source).
         models_properties_path: str, path to the json file containing the properties of the models.
         save_path: str, path where the model will be saved.
         It also takes as input the following keyword arguments:
         - rmin: minimum radius of the grid (default: 0)
         - rmax: maximum radius of the grid (default: 1e13)
         - rmiddle: middle radius of first grid cell (default: 4e4)
-        - ngrid: number of grid cells (default: 16000)
+        - ngrid: number of grid cells, the largest one with the adaptive grid (default: 16000)
+        - grid_type: 'log', cells equally spaced in log r, or 'adaptive', cells placed so that
+          the quantities in adaptive_quantities change by at most grid_tolerance in every cell,
+          see adaptive_edges (default: 'log')
+        - grid_tolerance: largest change in a cell of ln r, of the logarithm of density and entropy,
+          of the mass fractions and of the enclosed mass over the total one (default: 0.01)
+        - grid_max_ratio: largest ratio between the widths in log r of two neighbouring cells of
+          the adaptive grid (default: 1.05)
+        - adaptive_quantities: quantities driving the adaptive grid, some of 'density', 'entropy',
+          'composition' and 'mass' (default: ('density', 'entropy', 'composition'))
+        - ntheta, nphi: number of cells in the polar and azimuthal angle, a model with more than one
+          angular cell is written with initial_model.y.dat and initial_model.z.dat, the quantities on
+          the cells are given by angular_profiles, see AngularProfiles (default: 1, 1)
+        - theta_spacing: 'uniform', cells of equal width in theta, 'equatorial', cells of equal solid
+          angle, narrower towards the equator, or 'polar', cells narrower towards the poles (default: 'uniform')
         - ftype: KEPLER or MESA (default: None, the format is automatically detected)
+        - models_properties: PropertiesIndex or list of dict, content of the json file already
+          loaded, if provided the json file is not read again (default: None)
+        - paper_name: group (paper) of the model in the json file (default: None, found from
+          paper_names, from the folder of the model if its name ends with the year, e.g. WHW2002,
+          or from the json file if only one group contains a model with the name of the file)
+        - paper_names: dict, group of the models by path of the file, name of the file or
+          name of the folder, see load_paper_names (default: None)
+        - write_model_list: whether to add the model to the models_list.json file (default: True)
+        - write_run_report: whether to write the run_report.json file, with the time, memory and
+          bytes read and written by every stage, next to the outputs (default: True)
+        - catalogue_backend: 'json' to update models_list.json or 'sqlite' to update the
+          models_list.sqlite database instead, see ModelCatalogue (default: 'json')
+        - use_cache: whether to use the cache of the parsed models (default: True)
+        - cache_path: folder of the cache (default: None, ~/.cache/PreSNmodelInterpolator)
+        - cache_size: maximum size of the cache in bytes (default: None, 2 GB)
+        - interpolation: interpolation scheme, 'linear', 'loglog' (linear in log-log space),
+          'pchip' (monotone cubic) or 'conservative' (mass conserving remap) (default: 'linear')
+        - binary_format: if not None, the .dat files are also saved in binary, 'raw', 'fortran'
+          or 'npy' (default: None)
+        - compression: if not None, the .dat files are compressed while they are written, 'gzip' (.dat.gz),
+          'xz' (.dat.xz) or 'zstd' (.dat.zst, needs Python >= 3.14 or the zstandard package), see
+          open_table (default: None)
+        - compression_level: level of the compression (default: None, the default one of the compression)
+        - lazy: if True, nothing is computed until it is needed, otherwise the model is converted
+          and saved straight away (default: False)
+        - network: reduced network of species, name of a network in src/all_species_src/networks
+          or path of a json file, see ReducedNetwork (default: None, the 20 species 'aenus20')
+        - output_suffix: suffix added to the name of the output folder and of the model in the
+          models_list.json file (default: '')
+        - validation: what to do when the parsed model fails the validation (see validate_model),
+          'error' to raise a ModelValidationError before the grid, 'warn' to convert it anyway,
+          logging the failed checks and writing them in the catalogue, 'off' to skip it (default: 'warn')
+        - validation_tolerances: dict, tolerances of the validation replacing the ones of
+          VALIDATION_TOLERANCES (default: {})
+        - file_content: bytes, content of the model if already read, e.g. from an archive by the
+          batch conversion (default: None, read from file_path)
+        - skip_up_to_date: if True, the model is not converted again when the manifest.json file in
+          its folder shows that the outputs were produced from the same file, properties, parameters
+          and converter version, see outdated_reason (default: False)
         """
+        self._stages_done = set()
+        self.monitor = StageMonitor()
         self.u = unit_converter()
         self.rmin = None
         self.rmax = None
         self.rmiddle = None
         self.ngrid = None
+        self.grid_type = 'log'
+        self.grid_tolerance = 0.01
+        self.grid_max_ratio = 1.05
+        self.adaptive_quantities = ('density', 'entropy', 'composition')
+        self.ntheta = 1
+        self.nphi = 1
+        self.theta_spacing = 'uniform'
         self.ftype = None
+        self.models_properties = None
+        self.paper_name = None
+        self.paper_names = None
+        self.write_model_list = True
+        self.write_run_report = True
+        self.catalogue_backend = 'json'
+        self.use_cache = True
+        self.cache_path = None
+        self.cache_size = None
+        self.interpolation = 'linear'
+        self.binary_format = None
+        self.compression = None
+        self.compression_level = None
+        self.lazy = False
+        self.output_suffix = ''
+        self.network = None
+        self.validation = 'warn'
+        self.validation_tolerances = {}
+        self.file_content = None
+        self.skip_up_to_date = False
+        self.up_to_date = False
         ## SET KWARGS VALUES
         for key, value in kwargs.items():
             setattr(self, key, value)
+        assert self.interpolation in INTERPOLATION_SCHEMES, 'interpolation must be one of ' + \
+            ', '.join(INTERPOLATION_SCHEMES.keys())
+        assert self.compression is None or self.compression in COMPRESSIONS, 'compression must be one of ' + \
+            ', '.join(COMPRESSIONS.keys())
+        check_compression(self.compression)
+        if self.compression is not None and self.compression_level is not None:
+            _, smallest, largest = COMPRESSION_LEVELS[self.compression]
+            assert smallest <= self.compression_level <= largest, \
+                '{} compression level must be between {} and {}'.format(self.compression, smallest, largest)
+        assert self.catalogue_backend in CATALOGUE_FILES, 'catalogue_backend must be one of ' + \
+            ', '.join(CATALOGUE_FILES.keys())
+        assert self.validation in VALIDATION_MODES, 'validation must be one of ' + ', '.join(VALIDATION_MODES)
+        assert all(key in VALIDATION_TOLERANCES for key in self.validation_tolerances), \
+            'validation_tolerances must be some of ' + ', '.join(VALIDATION_TOLERANCES.keys())
         self.file_path = file_path
         self.json_file_path = models_properties_path
-        ## GET FILE NAME
-        self.model_name, self.paper_name = self.__find_file_name()
-        ## SET RESULT PATH
-        self.result_path = self.__set_result_path(save_path)
+        self.save_path = save_path
         ## LOAD JSON FILE
-        self.model_properties = self.__load_properties()
-        ## AUTO-DETECT FILE FORMAT
-        self.format, self.file_lines, self.header_lines = self.__find_file_format(self.ftype)
-        self.footer_lines = self.__find_footer()
-        ## DETECT BFIELD PRESENCE
-        self.has_bfield = self.__bfield_finder()
+        self.properties_index = self.__load_properties_index()
+        ## GET FILE NAME
+        self.model_name, self.paper_name, properties_name = self.__find_file_name()
+        self.model_properties = self.properties_index.get(self.paper_name, properties_name)
+        ## CONVERT AND SAVE THE MODEL
+        if not self.lazy:
+            self.save()
+
+    def __getattr__(self, name):
+        """
+        Runs the stage producing the attribute when it is accessed for the first time.
+        """
+        stage = _ATTRIBUTE_STAGES.get(name)
+        if stage is None or stage in self.__dict__.get('_stages_done', ()):
+            raise AttributeError('\'{}\' object has no attribute \'{}\''.format(type(self).__name__, name))
+        self.run(stage)
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError('\'{}\' object has no attribute \'{}\''.format(type(self).__name__, name))
+
+    def __setattr__(self, name, value):
+        """
+        Discards the stages depending on a parameter when its value changes.
+        """
+        if name in PARAMETER_STAGES and name in self.__dict__ and self.__dict__[name] != value:
+            self.invalidate(PARAMETER_STAGES[name])
+        object.__setattr__(self, name, value)
+
+    def run(self, stage):
+        """
+        Method that runs a stage of the conversion, after the ones it needs, unless it has already been run.
+        param stage: str, one of STAGES.
+        """
+        assert stage in STAGES, 'stage must be one of ' + ', '.join(STAGES)
+        if stage in self._stages_done:
+            return
+        for dependency in STAGE_DEPENDENCIES[stage]:
+            self.run(dependency)
+        with self.monitor.measure(stage):
+            getattr(self, '_InterpolatePresnModel__' + stage + '_stage')()
+        self._stages_done.add(stage)
+        if stage == 'save':
+            self.__write_run_report()
+
+    def invalidate(self, stage):
+        """
+        Method that discards the results of a stage and of all the following ones,
+        so they are computed again when needed.
+        param stage: str, one of STAGES.
+        """
+        for discarded in STAGES[STAGES.index(stage):]:
+            if discarded in self._stages_done:
+                self._stages_done.discard(discarded)
+                for attribute in STAGE_OUTPUTS[discarded]:
+                    self.__dict__.pop(attribute, None)
+
+    def save(self):
+        """
+        Method that converts the model, if needed, and saves it. With skip_up_to_date, nothing is
+        done if the outputs in the folder of the model are up to date.
+        The manifest is built before the conversion, since the grid stage replaces the missing
+        grid parameters with their defaults, so it records the parameters as they were requested.
+        """
+        self.requested_manifest = self.__expected_manifest()
+        self.up_to_date = self.skip_up_to_date and self.__load_up_to_date(self.requested_manifest)
+        if not self.up_to_date:
+            self.run('save')
+
+    def save_grids(self, grids):
+        """
+        Method that saves the model on several grids, parsing and ordering it only once.
+        The source side of the interpolation (slopes, derivatives or integrals of the profiles and
+        the parabolic fit of the inner points) is also computed once and shared by all the grids.
+        param grids: list of dict, every grid contains some of GRID_PARAMETERS (rmin, rmiddle, rmax,
+                     ngrid, grid_type, grid_tolerance, ntheta, nphi, theta_spacing), the missing ones are
+                     taken from the model, and optionally the name, i.e. the suffix of the output folder
+                     (default: e.g. '_n8000', '_n8000_rmax1e+12', '_n4000_adaptive_tol0.005' or
+                     '_n4000_nth64_nph1_equatorial').
+        return: list of dict, entries of the saved models.
+        """
+        base_grid = {key: self.__dict__[key] for key in GRID_PARAMETERS}
+        names = [grid.get('name', ''.join('_{}{}'.format(GRID_PARAMETERS[key], grid[key] if isinstance(grid[key], str)
+                                                         else '{:g}'.format(grid[key]))
+                                          for key in ('ngrid', 'rmin', 'rmiddle', 'rmax', 'grid_type', 'grid_tolerance',
+                                                      'ntheta', 'nphi', 'theta_spacing')
+                                          if key in grid))
+                 for grid in grids]
+        if len(set(names)) != len(names):
+            raise ValueError('Two grids would be saved in the same folder, give them different names.')
+        model_entries, up_to_date = [], []
+        for grid, name in zip(grids, names):
+            for key in GRID_PARAMETERS:
+                setattr(self, key, grid.get(key, base_grid[key]))
+            self.output_suffix = name
+            self.save()
+            model_entries.append(self.model_entry)
+            up_to_date.append(self.up_to_date)
+        ## up to date only if no grid was converted ##
+        self.up_to_date = all(up_to_date)
+        return model_entries
+
+    def __load_stage(self):
+        """
+        Method that detects the file format and loads the data from the file.
+        A model inside an archive or compressed is read in memory once for both.
+        """
+        content = self.file_content if self.file_content is not None else read_model(self.file_path)
+        ## AUTO-DETECT FILE FORMAT, HEADER, FOOTER AND BFIELD PRESENCE
+        self.__inspect_file(content)
         ## LOAD DATA
-        self.data = self.__load_data()
-        self.thermo, self.nuclei = self.__create_quantities_arrays()
-        self.__order_data()
-        ## DEFINE THE GRID
+        self.data = self.__load_data(content)
+
+    def __order_stage(self):
+        """
+        Method that divides the data in thermodynamic quantities and nuclei,
+        reading them from the cache if possible.
+        """
+        self.cache_hit = self.__load_from_cache()
+        if not self.cache_hit:
+            self.run('load')
+            self.thermo, self.nuclei = self.__create_quantities_arrays()
+            self.__order_data()
+            self.__store_in_cache()
+        self.source_profiles = {}
+
+    def __validate_stage(self):
+        """
+        Method that checks the ordered profiles before the grid and the interpolation, see validate_model.
+        If the model fails, a ModelValidationError is raised when validation is 'error', while with
+        'warn' the failed checks are logged and the model is converted.
+        """
+        if self.validation == 'off':
+            self.validation_report = None
+            return
+        self.validation_report = validate_model(self.thermo, self.composition, self.nan_counts,
+                                                self.validation_tolerances)
+        if self.validation_report['passed']:
+            logger.info('Validation passed.')
+            return
+        message = 'The model {} failed the validation: {}.'.format(self.model_name, failed_checks(self.validation_report))
+        if self.validation == 'error':
+            raise ModelValidationError(message, self.validation_report)
+        logger.warning(message)
+
+    def __grid_stage(self):
+        """
+        Method that defines and creates the grid.
+        """
         self.__define_grid()
-        ## CREATE THE GRID
-        self.radius, self.theta = self.__create_grid()
-        ## INTERPOLATE THE MODEL
+        self.radius, self.theta, self.phi = self.__create_grid()
+        self.ncells = self.radius.shape[0]
+
+    def __interpolate_stage(self):
+        """
+        Method that interpolates the model on the grid.
+        """
+        assert self.interpolation in INTERPOLATION_SCHEMES, 'interpolation must be one of ' + \
+            ', '.join(INTERPOLATION_SCHEMES.keys())
         self.__interpolate_model()
-        ## CALCULATE THE MASS
+        self.angular_profiles = self.__create_angular_profiles()
+
+    def __create_angular_profiles(self):
+        """
+        Method that gives access to the interpolated quantities on the (r, theta, phi) cells,
+        the columns of star.dat and nuclei.dat are shared, not copied.
+        return: AngularProfiles, quantities on the cells.
+        """
+        profiles = {name: self.thermo_interp[:, index + 1]
+                    for index, name in enumerate(THERMO_NAMES[1:self.thermo.shape[1]], start=1)}
+        profiles.update({name: self.nuclei_interp[:, index + 2]
+                         for index, name in enumerate(load_network(self.network).names)})
+        if self.phi is None:
+            return AngularProfiles(self.radius[:, 2], profiles, np.array([0.5 * np.pi]), np.array([np.pi]))
+        return AngularProfiles(self.radius[:, 2], profiles, self.theta[:, 2], self.phi[:, 2])
+
+    def __mass_stage(self):
+        """
+        Method that calculates the mass enclosed in the grid, the mass profiles of the original
+        and of the new grid and the quantities derived from them.
+        """
         self.mass = self.__calculate_mass()
-        ## SAVE THE MODEL
+        self.__calculate_structure()
+
+    def __save_stage(self):
+        """
+        Method that creates the folder of the model and saves it.
+        """
+        self.result_path = self.__set_result_path(self.save_path)
+        remove_manifest(self.result_path)
         self.__save_interpolated_model()
-        
+
+    def __input_hash(self):
+        """
+        Method that computes the hash of the original model, only once.
+        """
+        if 'input_hash' not in self.__dict__:
+            self.input_hash = source_hash(self.file_path, self.file_content)
+        return self.input_hash
+
+    def __expected_manifest(self):
+        """
+        Method that builds the manifest of the outputs with the current parameters.
+        """
+        parameters = {key: getattr(self, key) for key in MANIFEST_PARAMETERS}
+        parameters['network'] = load_network(self.network).digest
+        return build_manifest(CONVERTER_VERSION, self.file_path, self.model_properties, parameters)
+
+    def __load_up_to_date(self, expected):
+        """
+        Method that checks the manifest in the folder of the model and, if the outputs are up to date,
+        takes the entry of the model and its validation report from it, adding it to the catalogue if needed,
+        so no stage is run.
+        param expected: dict, manifest of the conversion, see __expected_manifest.
+        return: bool, True if the outputs are up to date.
+        """
+        result_path = os.path.join(DEFAULT_RESULTS_PATH if self.save_path is None else self.save_path,
+                                   self.model_name + self.output_suffix)
+        stored = read_manifest(result_path)
+        reason = outdated_reason(result_path, stored, expected, self.__input_hash)
+        if reason is not None:
+            logger.info('Converting %s: %s.', self.model_name + self.output_suffix, reason)
+            return False
+        if stored['input_stat'] != expected['input_stat']:
+            ## same content, the file was touched or copied ##
+            write_manifest(result_path, dict(stored, input_stat=expected['input_stat']))
+        self.result_path = result_path
+        self.model_entry = stored['model_entry']
+        self.validation_report = stored.get('validation_report')
+        if self.write_model_list:
+            self.__update_model_list()
+        logger.info('Model %s is up to date, skipping.', self.model_name + self.output_suffix)
+        return True
 
     def __set_result_path(self, save_path):
         """
         Method that creates the folder where the model will be saved.
         The folder is located in the results folder and it has the same name of the model.
         """
-        print('Creating folder...')
+        logger.debug('Creating folder...')
         if save_path is None:
-            result_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results')
+            result_path = DEFAULT_RESULTS_PATH
             if not os.path.exists(result_path):
                 os.mkdir(result_path)
-            result_path = os.path.join(result_path, self.model_name)
+            result_path = os.path.join(result_path, self.model_name + self.output_suffix)
             if not os.path.exists(result_path):
                 os.mkdir(result_path)
         else:
             assert os.path.exists(save_path), 'The path provided does not exist.'
-            result_path = os.path.join(save_path, self.model_name)
+            result_path = os.path.join(save_path, self.model_name + self.output_suffix)
             if not os.path.exists(result_path):
                 os.mkdir(result_path)
-        print('Folder created')
+        logger.debug('Folder created')
         return result_path
  
     def __find_file_name(self):
         """
         Method that finds the name of the model from the file name.
+        return: str, name of the model,
+                str, paper name,
+                str, name of the model in the json file.
         """
-        ## Splitting the path to the file according to the OS##
-        if platform.system() == 'Windows':
-            path = os.path.abspath(self.file_path).split('\\')
-        else:
-            path = os.path.abspath(self.file_path).split('/')
+        path = naming_path(self.file_path)
+        folder_name = os.path.basename(os.path.dirname(path))
         ## Removing the extension and the other not useful stuff##
         extensions = ['mso_final_profile.data', 'mso_final_profile.txt', '.txt',
                       '@presn', '.presn', '.presn_structure', '_presn']
-        ## find paper name from folder name ##
-        try:
-            int(path[-2][-2:])
-            paper_name = path[-2]
-        except:
-            paper_name = input('Please enter the paper name: ')
-        file_name = path[-1]
+        file_name = os.path.basename(path)
         for extension in extensions:
             file_name = file_name.replace(extension, '')
         ## Check if the file name ia a number ##
         ## If it is, add the first letter of the paper folder at the beginning ##
-        try:
-            int(file_name)
-            if len(file_name) == 1:
-                file_name = '0' + file_name
-            file_name = paper_name[0] + file_name
-        except:
-            pass
-        file_name = file_name + '_' + paper_name
-
-        return file_name, paper_name
-
-    def __load_properties(self):
-        """
-        Method that loads the json file containing the properties of the models.
-        return: dict, properties of the model.
-        """
-        print('Loading json file...')
-        assert os.path.exists(self.json_file_path), 'The json file does not exist.'
-        with open(self.json_file_path) as f:
-            json_properties = json.load(f)
-        m_name = self.model_name.replace('_' + self.paper_name, '')
-    
-        if m_name[0] == self.paper_name[0]:
-            m_name = m_name[1:]
-    
-        for model in json_properties:
-            if model['name'] == m_name and \
-                model['group'] == self.paper_name:
-                print('Json file loaded.')
-                return model
-        raise ValueError('The model is not present in the json file.')
-    
-    def __find_file_format(self, format=None):
-        """
-        Find the format of the file. It could be made either with KEPLER or MESA.
-        If the format is not specified, it will be automatically detected.
-        param format: str, optional (default = None) Can be either 'KEPLER' or 'MESA'.
-        return: str, either 'KEPLER_NEW', 'KEPLER_std', 'KEPLER_std_full' or 'MESA',
-                list of str, list of lines in the file,
-                int, index of the line where the data starts.
-        """
-        def find_kepler_version(lines):
-            ## KEPLER version finder ##
-            """
-            To distinguish between the three KEPLER formats, we use the following file characteristics:
-            1. New KEPLER files have more than 2 commented lines before the data starts.
-            2. Old KEPLER files with full nuclear species have 'ni71' in the line before the data starts.
-            """
-            for lindex in range(1,len(lines)):
-                try:
-                    float(lines[lindex].split()[1])
-                    line_index = lindex
-                    break
-                except:
-                    pass
-            if line_index > 2:
-                print('New KEPLER format deteted.')
-                format = 'KEPLER_NEW'
-            else:
-                if 'ni71' in lines[line_index - 1]:
-                    print('Standard KEPLER format with full atomic species detected.')
-                    format = 'KEPLER_std_full'
-                else:
-                    print('Standard KEPLER format detected.')
-                    format = 'KEPLER_std'
-            return format, line_index
-        
-        def check_mesa_file(lines):
-            ## MESA file checker ##
-            """
-            To check if the file is a MESA file, we check if the line with the initial mass is present.
-            """
-            correct_MESA = False
-            for line in lines:
-                if 'initial_mass' in line:
-                    correct_MESA = True
-                    break
-            for lindex in range(1,len(lines)):
-               if 'logT' in lines[lindex]:
-                    line_index = lindex + 1
-                    break
-            if not correct_MESA:
-                raise ValueError('The file is not a MESA file.')
-            return line_index
-        
-        ### Main part of the method ###
-        line_index = 0
-        if format in ['MESA', 'KEPLER']:
-            if format == 'KEPLER':
-                with open(self.file_path, 'r') as f:
-                    lines = f.readlines()
-                format, line_index = find_kepler_version(lines)
-            else:
-                line_index = check_mesa_file(lines)
+        numeric = file_name.isdigit()
+        if numeric and len(file_name) == 1:
+            file_name = '0' + file_name
+        paper_name = self.__find_paper_name(path, folder_name, file_name)
+        model_name = (paper_name[0] + file_name if numeric else file_name) + '_' + paper_name
+        return model_name, paper_name, file_name
+
+    def __find_paper_name(self, path, folder_name, properties_name):
+        """
+        Method that finds the paper (group) of the model, never asking it: from paper_name,
+        from the paper_names mapping, from the folder name if it ends with the year or from
+        the json file if a single group contains the model.
+        param path: str, absolute path of the model file.
+        param folder_name: str, name of the folder containing the model.
+        param properties_name: str, name of the model in the json file.
+        """
+        if self.paper_name is not None:
+            return self.paper_name
+        if self.paper_names is not None:
+            for key, paper_name in self.paper_names.items():
+                if key in (os.path.basename(path), folder_name) or os.path.abspath(key) == path:
+                    return paper_name
+        if folder_name[-2:].isdigit():
+            return folder_name
+        groups = self.properties_index.groups_of(properties_name)
+        if len(groups) == 1:
+            return groups[0]
+        if len(groups) > 1:
+            raise ValueError('The model {} is in more than one group ({}), give its paper name.'.format(
+                properties_name, ', '.join(groups)))
+        raise ValueError('The paper name of {} cannot be found: the folder name does not end '.format(path) + \
+                         'with the year and the model is not in {}. Give it with paper_name '.format(
+                         self.properties_index.source) + \
+                         '(--paper-name) or paper_names (--paper-names-path).')
+
+    def __load_properties_index(self):
+        """
+        Method that loads the json file containing the properties of the models, unless
+        it has already been loaded.
+        return: PropertiesIndex, properties of the models.
+        """
+        if isinstance(self.models_properties, PropertiesIndex):
+            return self.models_properties
+        if self.models_properties is not None:
+            return PropertiesIndex(self.models_properties)
+        logger.info('Loading json file...')
+        index = load_properties_index(self.json_file_path)
+        logger.info('Json file loaded.')
+        return index
+
+    def __load_from_cache(self):
+        """
+        Method that loads the ordered thermodynamic quantities and nuclei from the cache
+        of the parsed models.
+        return: bool, True if the model was found in the cache, False otherwise.
+        """
+        if not self.use_cache:
+            return False
+        self.cache = ParsedModelCache(self.cache_path, self.cache_size)
+        self.cache_key = self.cache.key(self.file_path, CONVERTER_VERSION + '_' + load_network(self.network).digest,
+                                        self.__input_hash())
+        entry = self.cache.load(self.cache_key)
+        if entry is None:
+            return False
+        logger.info('Parsed model found in the cache, skipping parsing.')
+        self.thermo, self.nuclei = entry['thermo'], entry['nuclei']
+        self.monitor.count(read=self.thermo.nbytes + self.nuclei.nbytes)
+        self.format, self.has_bfield, self.comment = entry['format'], entry['has_bfield'], entry['comment']
+        self.missing_species = entry['missing_species']
+        self.nan_counts = entry['nan_counts']
+        self.composition = entry['composition']
+        return True
+
+    def __store_in_cache(self):
+        """
+        Method that stores the ordered thermodynamic quantities and nuclei in the cache.
+        """
+        if not self.use_cache:
+            return
+        self.cache.store(self.cache_key, self.thermo, self.nuclei, self.format,
+                         self.has_bfield, self.comment, self.missing_species, self.nan_counts, self.composition)
+        self.monitor.count(written=self.thermo.nbytes + self.nuclei.nbytes)
+
+    def __inspect_file(self, content=None):
+        """
+        Finds the format of the file (KEPLER or MESA, automatically detected if ftype is None),
+        the header and footer lines, the species and whether the file contains magnetic field data,
+        reading only the beginning and the end of the file.
+        param content: bytes, content of the model if read in memory (see read_model).
+        """
+        inspection = inspect_file(self.file_path, self.ftype, content)
+        self.format = inspection['format']
+        self.header = inspection['header']
+        self.header_lines = inspection['header_lines']
+        self.footer_lines = inspection['footer_lines']
+        self.species = inspection['species']
+        self.data_offsets = inspection['data_offsets']
+        self.has_bfield = inspection['has_bfield']
+        if self.has_bfield:
+            logger.info('Magnetic field data detected.')
         else:
-            print('Auto-detecting file format.\nPlease wait...')
-            with open(self.file_path, 'r') as f:
-                lines = f.readlines()
-            if 'VERSION' in lines[0]:
-                format, line_index = find_kepler_version(lines)
-            else:
-                line_index = check_mesa_file(lines)
-                print('MESA format detected.')
-                format = 'MESA'
-        return format, lines, line_index
-    
-    def __find_footer(self):
-        """
-        Find the index of the line where the data ends.
-        return: int, number on lines to skip from the end of the file.
-        """
-        findex = 0
-        lines = list(reversed(self.file_lines))
-        for lindex in range(len(lines)):
-            try:
-                float(lines[lindex].split()[0].replace(':',''))
-                findex = lindex
-                break
-            except:
-                continue
-        return findex
-
-    def __bfield_finder(self):
-        """
-        Checks the header to find weather the file contains magnetic field data.
-        return: bool, True if the file contains magnetic field data, False otherwise.
-        """
-        print('Auto-detecting magnetic field data.\nPlease wait...')
-        for line_index in range(self.header_lines):
-            if 'b_r' in self.file_lines[line_index].casefold() or \
-                'dynamo_log_b_r' in self.file_lines[line_index].casefold():
-                print('Magnetic field data detected.')
-                return True
-        print('No magnetic field data detected.')
-        return False
-
-    def __load_data(self):
+            logger.info('No magnetic field data detected.')
+
+    def __load_data(self, content=None):
         """
         Load the data from the file.
+        param content: bytes, content of the model if read in memory (see read_model).
         return: numpy array, data from the file.
         """
-        print('Loading data from file.\nPlease wait...')
+        logger.info('Loading data from file...')
         if self.header_lines > 0:
-            print('Skipping {} header lines.'.format(self.header_lines))
+            logger.debug('Skipping %d header lines.', self.header_lines)
         if self.footer_lines == 1:
-            print('Last line contains winds, skipping it.')
+            logger.debug('Last line contains winds, skipping it.')
         elif self.footer_lines > 1:
-            print('Skipping {} footer lines.'.format(self.footer_lines))
-        data = np.genfromtxt(self.file_path, skip_header=self.header_lines, skip_footer=self.footer_lines)
-        print('Data loaded.')
+            logger.debug('Skipping %d footer lines.', self.footer_lines)
+        data = load_numeric_block(self.file_path, self.header_lines, self.footer_lines, self.data_offsets, content)
+        ## the header and the data, the footer is only inspected ##
+        self.monitor.count(read=self.data_offsets[1])
+        logger.info('Data loaded.')
         return data
 
     def __order_data(self):
         """
-        Order the data in the file.
-        param data: numpy array, data from the file.
-        return: numpy array, ordered data.
+        Order the data in the file, selecting the columns by their index without copying the data.
         """
-        print('Ordering data.\nPlease wait...')
-        ## DELETE CELL NUMBER AND STABILITY
+        logger.info('Ordering data...')
         if self.format == 'KEPLER_std_full':
-            self.data = np.delete(self.data, (0, 12), 1)
-            self.data = np.nan_to_num(self.data)
-            print('\treducing full species to 20.\n\tPlease wait...')
-            self.__KEPLER_w_species_order_nuclei_thermo()
-        elif self.format == 'KEPLER_std':
-            self.data = np.delete(self.data, (0, 12, 13), 1)
-            self.data = np.nan_to_num(self.data)
-            self.__KEPLER_wo_species_order_nuclei_thermo()
-        elif self.format == 'KEPLER_NEW':
-            self.data = np.delete(self.data, (0, 1), 1)
-            self.data = np.nan_to_num(self.data)
-            self.__KEPLER_wo_species_order_nuclei_thermo()
+            logger.info('\treducing full species to the %s network.', load_network(self.network).name)
+            self.__KEPLER_order_nuclei_thermo('isotopes')
+        elif self.format in ('KEPLER_std', 'KEPLER_NEW'):
+            self.__KEPLER_order_nuclei_thermo('reduced')
         elif self.format == 'MESA':
-            self.data = np.delete(self.data, (0), 1)
-            self.data = np.flip(self.data, axis=0)
-            self.data = np.nan_to_num(self.data)
-            self.data = pd.DataFrame(data=self.data,
-                                     columns=np.array(self.file_lines[self.header_lines-1].split()[1:],
-                                                      dtype=str))
-            print('\tInternal energy data not found, calculating it using a perfect gas equation of state.')
-            print('\tHeavy iron peak nuclei (\'Fe\' species) not found, setting them to 0.')
-            print('\tPlease wait...')
+            logger.info('\tInternal energy data not found, calculating it using a perfect gas equation of state.')
             self.__MESA_order_nuclei_thermo()
-        print('Data ordered.')
+        if len(self.missing_species) > 0:
+            logger.warning('\tSpecies not found, setting them to 0: ' + ', '.join(self.missing_species))
+        logger.info('Data ordered.')
 
     def __create_quantities_arrays(self):
         """
         Create the arrays containing the thermodynamic quantities and 
-        chemical abundances.
-        param data: numpy array, data from the file.
+        chemical abundances, every column is filled by the ordering.
         return: numpy array, thermodynamic quantities,
                 numpy array, nuclei.
         """
-        nuclei = np.zeros((self.data.shape[0], 21))
+        nuclei = np.empty((self.data.shape[0], len(load_network(self.network).species) + 1))
         if self.has_bfield:
-            thermo = np.zeros((self.data.shape[0], 12))
+            thermo = np.empty((self.data.shape[0], 12))
         else:
-            thermo = np.zeros((self.data.shape[0], 10))
+            thermo = np.empty((self.data.shape[0], 10))
         return thermo, nuclei
-    
-    def __KEPLER_w_species_order_nuclei_thermo(self):
+
+    def __KEPLER_order_nuclei_thermo(self, source):
         """
-        
+        Divides the data from the KEPLER formats in an array containing the thermodynamic quantities
+        and one containing the chemical abundances, gathering the columns of the quantities at once.
+        param source: str, 'isotopes' to sum up the isotopes of the full network in the species of
+                      the reduced network, 'reduced' if the file already contains the reduced species.
         """
-        ## Thermodynamic quantities ##
-        self.thermo[:, 0] = self.data[:, 1] # radius
-        self.thermo[:, 1:3] = self.data[:, 3:5] # density and temperature
-        self.thermo[:, 3] = self.data[:, 10] # Ye
-        self.thermo[:, 4] = self.data[:, 5] # pressure
-        self.thermo[:, 5] = self.data[:, 7] # entropy
-        self.thermo[:, 6] = self.data[:, 6] # internal energy
-        self.thermo[:, 7] = self.data[:, 9] # Abar
-        self.thermo[:, 8] = self.data[:, 2] # velocity
-        self.thermo[:, 9] = self.data[:, 8] # omega
+        first_quantity, first_species = KEPLER_COLUMNS[self.format]
+        if self.data.shape[1] < first_species + len(self.species):
+            raise ValueError('The data of the {} file have {} columns, while the header names {}.'.format(
+                self.format, self.data.shape[1], first_species + len(self.species)))
+        columns = [first_quantity + offset for offset in KEPLER_THERMO_OFFSETS]
         if self.has_bfield:
-            self.thermo[:, 10] = self.data[:, -1] # toroidal magnetic field
-            self.thermo[:, 11] = self.data[:, -2] # poloidal magnetic field
+            ## toroidal and poloidal magnetic field, the last two columns ##
+            columns += [self.data.shape[1] - 1, self.data.shape[1] - 2]
+        used_columns = dict(zip(THERMO_NAMES, columns))
+        used_species = load_network(self.network).reduction_matrix(self.species, source).any(axis=1)
+        used_columns.update({self.species[index]: first_species + index for index in np.flatnonzero(used_species)})
+        self.__clear_nan(used_columns)
+        self.composition = source_composition(self.data[:, first_species:], self.species, load_network(self.network))
+        ## Thermodynamic quantities ##
+        np.take(self.data, columns, axis=1, out=self.thermo)
         ## Nuclei ##
-        self.nuclei[:, 0] = self.data[:, 1]
-        self.nuclei[:, 1:] = convert_species(self.nuclei[:, 1:], self.data[:, 11:], self.file_lines)
-        self.comment = ''
+        self.nuclei[:, 0] = self.thermo[:, 0]
+        load_network(self.network).reduce(self.data[:, first_species:], self.species, source, out=self.nuclei[:, 1:])
+        self.__find_missing_species(self.species, source)
 
-    def __KEPLER_wo_species_order_nuclei_thermo(self):
+    def __clear_nan(self, used_columns):
         """
-        Diveìdes the data from the KEPLER standard format in an array containing the
-        thermodynamic quantities and one containing the chemical abundances.
+        Method that counts the nan values of the columns used, for the validation, and then
+        sets all the nan values of the data to 0 in place.
+        param used_columns: dict, index in the data of every column used.
         """
-    
-        ## Thermodynamic quantities ##
-        self.thermo[:, 0] = self.data[:, 1] # radius
-        self.thermo[:, 1:3] = self.data[:, 3:5] # density and temperature
-        self.thermo[:, 3] = self.data[:, 10] # Ye
-        self.thermo[:, 4] = self.data[:, 5] # pressure
-        self.thermo[:, 5] = self.data[:, 7] # entropy
-        self.thermo[:, 6] = self.data[:, 6] # internal energy
-        self.thermo[:, 7] = self.data[:, 9] # Abar
-        self.thermo[:, 8] = self.data[:, 2] # velocity
-        self.thermo[:, 9] = self.data[:, 8] # omega
-        if self.has_bfield:
-            self.thermo[:, 10] = self.data[:, -1] # toroidal magnetic field
-            self.thermo[:, 11] = self.data[:, -2] # poloidal magnetic field
-        ## Nuclei ##
-        self.nuclei[:, 0] = self.data[:, 1]
-        missing_species_indices =self.__check_KEPLER_species()
-        if len(missing_species_indices) == 0:
-            if self.has_bfield:
-                self.nuclei[:, 1:] = self.data[:, 11:-2]
-            else:
-                self.nuclei[:, 1:] = self.data[:, 11:]
-        elif len(missing_species_indices) == 1:
-            if self.has_bfield:
-                self.nuclei[:, 1:missing_species_indices[0] + 1] = self.data[:, 11:11 + missing_species_indices[0]]
-                self.nuclei[:, missing_species_indices[0] + 2:] = self.data[:, 11 + missing_species_indices[0]:-2]
-            else:
-                self.nuclei[:, 1:missing_species_indices[0] + 1] = self.data[:, 11:11 + missing_species_indices[0]]
-                self.nuclei[:, missing_species_indices[0] + 2:] = self.data[:, 11 + missing_species_indices[0]:]
+        self.nan_counts = count_nan(self.data, used_columns)
+        np.nan_to_num(self.data, copy=False)
+
+    def __find_missing_species(self, header, source):
+        """
+        Method that finds the species of the reduced network that are not in the file.
+        param header: list of str, species in the file.
+        param source: str, 'isotopes' or 'reduced', see ReducedNetwork.
+        """
+        self.missing_species = load_network(self.network).missing_species(header, source)
+        if len(self.missing_species) > 0:
+            self.comment = 'Missing species: ' + ', '.join(self.missing_species)
         else:
-            raise ValueError('More than one species missing.')
-              
-    def __check_KEPLER_species(self):
-        """
-        Method that checks the species in the KEPLER file.
-        """
-        species = ['nt1', 'h1', 'he3', 'he4', 'c12', 'n14', 'o16', 'ne20', 'mg24', 
-                   'si28','s32', 'ar36', 'ca40', 'ti44', 'cr48', 'fe52', 'fe54', 'ni56',
-                   'fe56', '\'fe\'']
-        for line_index in range(self.header_lines):
-            if 'h1' in self.file_lines[line_index].casefold():
-                if 'neutrons' in self.file_lines[line_index].casefold():
-                    species_in_file = self.file_lines[line_index].replace('neutrons', 'nt1').split()
-                else:
-                    species_in_file = self.file_lines[line_index].split()
-                species_in_file = species_in_file[species_in_file.index('nt1'):]
-                break
-        ## Check if all species are present ##
-        species_in_file = [el.casefold() for el in species_in_file]
-        missing_elements = list(set(species) - set(species_in_file))
-        if len(missing_elements) == 0:
             self.comment = ''
-            return []
-        else:
-            self.comment = 'Missing species: ' + ', '.join(missing_elements)
-            missing_species_indices = []
-            for el in missing_elements:
-                missing_species_indices.append(species.index(el))
-            return missing_species_indices
-            
+
     def __MESA_order_nuclei_thermo(self):
         """
         Diveìdes the data from the MESA format in an array containing the
         thermodynamic quantities and one containing the chemical abundances.
-        Since no 'Fe' group is provided it is left to 0.
+        The columns are found by their name in the header and read from the surface
+        to the center through a reversed view of the data.
+        The species of the reduced network not provided (the 'Fe' group) are left to 0.
         """
-        self.comment = 'Missing species: Fe group. '
+        self.__find_missing_species(self.species, 'reduced')
+        if self.comment != '':
+            self.comment += '. '
+        ## the first column is the zone number ##
+        columns = {name: index + 1 for index, name in enumerate(self.species)}
+        required = ['logR', 'logRho', 'logT', 'ye', 'logP', 'entropy', 'energy' if 'energy' in columns else 'csound',
+                    'abar', 'velocity', 'omega'] + (['dynamo_log_B_phi', 'dynamo_log_B_r'] if self.has_bfield else [])
+        missing = [name for name in required if name not in columns]
+        if len(missing) > 0:
+            raise ValueError('Columns not found in the MESA file: ' + ', '.join(missing) + '.')
+        used_columns = {name: columns[name] for name in required}
+        used_species = load_network(self.network).reduction_matrix(self.species, 'reduced').any(axis=1)
+        used_columns.update({self.species[index]: index + 1 for index in np.flatnonzero(used_species)})
+        self.__clear_nan(used_columns)
+        data = self.data[::-1]
+        self.composition = source_composition(data[:, 1:], self.species, load_network(self.network))
+        ## a contiguous copy of a single column, so numpy takes its vectorized power ##
+        column = lambda name: np.ascontiguousarray(data[:, columns[name]])
         ## Thermodynamic quantities ##
-        self.thermo[:, 0] = self.u.to_cm(np.array(10 ** self.data['logR'])) # radius
-        self.thermo[:, 1] = np.array(10 ** self.data['logRho']) # rho
-        self.thermo[:, 2] = np.array(10 ** self.data['logT']) # temperature
-        self.thermo[:, 3] = np.array(self.data['ye']) # Ye
-        self.thermo[:, 4] = np.array(10 ** self.data['logP']) # pressure
-        self.thermo[:, 5] = np.array(self.data['entropy']) # entropy
-        try:
-            self.thermo[:, 6] = np.array(self.data['energy']) # internal energy
-        except:
-            print('Exception')
-            self.thermo[:, 6] = self.thermo[:, 4] / ( np.array(self.data['csound']) ** 2 * \
+        self.thermo[:, 0] = self.u.to_cm(10 ** column('logR')) # radius
+        self.thermo[:, 1] = 10 ** column('logRho') # rho
+        self.thermo[:, 2] = 10 ** column('logT') # temperature
+        self.thermo[:, 3] = column('ye') # Ye
+        self.thermo[:, 4] = 10 ** column('logP') # pressure
+        self.thermo[:, 5] = column('entropy') # entropy
+        if 'energy' in columns:
+            self.thermo[:, 6] = column('energy') # internal energy
+        else:
+            logger.debug('No energy column, using the sound speed.')
+            self.thermo[:, 6] = self.thermo[:, 4] / ( column('csound') ** 2 * \
                                                  self.thermo[:, 1] / self.thermo[:, 4] -1) # internal energy
             self.comment += 'Internal energy calculated from a perfect gas equation of state.'
-        self.thermo[:, 7] = np.array(self.data['abar']) # Abar
-        self.thermo[:, 8] = np.array(self.data['velocity']) # velocity
-        self.thermo[:, 9] = np.array(self.data['omega']) # omega
+        self.thermo[:, 7] = column('abar') # Abar
+        self.thermo[:, 8] = column('velocity') # velocity
+        self.thermo[:, 9] = column('omega') # omega
         if self.has_bfield:
-            self.thermo[:, 10] = np.array(10 ** self.data['dynamo_log_B_phi']) # toroidal magnetic field
-            self.thermo[:, 11] = np.array(10 ** self.data['dynamo_log_B_r']) # poloidal magnetic field
+            self.thermo[:, 10] = 10 ** column('dynamo_log_B_phi') # toroidal magnetic field
+            self.thermo[:, 11] = 10 ** column('dynamo_log_B_r') # poloidal magnetic field
         ## Nuclei ##
-        keys = ['neut', 'h1', 'he3', 'he4', 'c12', 'n14', 'o16', 'ne20', 'mg24',
-                'si28', 's32', 'ar36', 'ca40', 'ti44', 'cr48', 'fe52', 'fe54', 'ni56',
-                'fe56']
         self.nuclei[:, 0] = self.thermo[:, 0]
-        for i, key in enumerate(keys):
-            self.nuclei[:, i + 1] = np.array(self.data[key])
+        load_network(self.network).reduce(data[:, 1:], self.species, 'reduced', out=self.nuclei[:, 1:])
          
     def __define_grid(self):
         """
-        Method that defines the grid of the model, if no grid is provided it uses the default values.
+        Method that defines the grid of the model, the parameters that are not provided take the default values.
         It also checks if the grid is valid.
         """
         if any([self.rmin is None, self.rmax is None, self.rmiddle is None, self.ngrid is None]):
-            print('No grid provided, using default values.')
+            logger.info('Grid not fully provided, using default values for the missing parameters.')
+        if self.rmin is None:
             self.rmin = 0
+        if self.rmiddle is None:
             self.rmiddle = 4e4
+        if self.rmax is None:
             if self.nuclei[-1, 0] <= 1e13:
                 self.rmax = self.nuclei[-1, 0]
             else:
                 self.rmax = 1e13
+        if self.ngrid is None:
             self.ngrid = 16000
         assert self.rmin < self.rmiddle < self.rmax, 'rmin < rmiddle < rmax'
         assert self.ngrid > 0, 'ngrid > 0'
         assert self.rmin >= 0, 'rmin >= 0'
+        assert self.grid_type in GRID_TYPES, 'grid_type must be one of ' + ', '.join(GRID_TYPES)
+        assert self.ntheta >= 1 and self.nphi >= 1, 'ntheta >= 1 and nphi >= 1'
+        assert self.theta_spacing in THETA_SPACINGS, 'theta_spacing must be one of ' + ', '.join(THETA_SPACINGS)
+        assert all(quantity in ADAPTIVE_QUANTITIES for quantity in self.adaptive_quantities), \
+            'adaptive_quantities must be some of ' + ', '.join(ADAPTIVE_QUANTITIES)
     
     def __create_grid(self):
         """
         Method that creates the grid of the model.
-        So far only 1D models are supported.
+        A 1D model has a single angular cell, written as [0, 0.25] in initial_model.y.dat, while a
+        multi-dimensional one has the cells in theta (initial_model.y.dat) and phi (initial_model.z.dat)
+        in the layout of the radial ones. Only the edges are stored, the quantities on the cells
+        are computed when needed (see angular_profiles).
+        return: numpy array, radial cells,
+                numpy array, cells in theta,
+                numpy array, cells in phi, None for a 1D model.
         """
-        print('Creating new grid...')
-        r = np.zeros((self.ngrid, 4))
-        r[:, 0] = np.arange(1, self.ngrid + 1)
-        r[:, 3] = np.logspace(np.log10(2 * self.rmiddle - self.rmin), np.log10(self.rmax), self.ngrid)
+        logger.info('Creating new grid...')
+        if self.grid_type == 'adaptive':
+            right_edges = np.exp(adaptive_edges(*self.__adaptive_monitors(),
+                                                np.log(2 * self.rmiddle - self.rmin), np.log(self.rmax),
+                                                max(self.ngrid - 1, 1), self.grid_tolerance, self.grid_max_ratio))
+            right_edges[[0, -1]] = 2 * self.rmiddle - self.rmin, self.rmax
+        else:
+            right_edges = np.logspace(np.log10(2 * self.rmiddle - self.rmin), np.log10(self.rmax), self.ngrid)
+        r = np.zeros((len(right_edges), 4))
+        r[:, 0] = np.arange(1, len(right_edges) + 1)
+        r[:, 3] = right_edges
         r[0, 1] = self.rmin
         r[1:, 1] = r[:-1, 3]
         r[:, 2] = 0.5 * (r[:, 3] + r[:, 1])
-        theta = np.array([0, 0.25])
-        print('Grid created.')
-        return r, theta[None, :]
+        logger.info('Grid created.')
+        if self.ntheta == 1 and self.nphi == 1:
+            return r, np.array([[0, 0.25]]), None
+        logger.info('Angular grid of %d x %d cells (%s in theta).', self.ntheta, self.nphi, self.theta_spacing)
+        return r, angular_table(theta_edges(self.ntheta, self.theta_spacing)), angular_table(phi_edges(self.nphi))
     
+    def __adaptive_monitors(self):
+        """
+        Method that returns the quantities of the original model driving the adaptive grid, scaled
+        so that their change in a cell is compared with grid_tolerance. Inside the first original
+        radius they are sampled on the parabolas used to extrapolate the model.
+        return: numpy array, ln r of the points,
+                numpy array, (points, quantities) monitored quantities.
+        """
+        r, thermo, nuclei = self.thermo[:, 0], self.thermo[:, 1:], self.nuclei[:, 1:]
+        r_first = 2 * self.rmiddle - self.rmin
+        if not INTERPOLATION_SCHEMES[self.interpolation].conservative and r_first < r[0]:
+            r_inner = np.geomspace(r_first, r[0], 64, endpoint=False)
+            thermo = np.concatenate((evaluate_parabola(self.__source_profile(None, 'thermo'), r_inner), thermo))
+            nuclei = np.concatenate((evaluate_parabola(self.__source_profile(None, 'nuclei'), r_inner), nuclei))
+            r = np.concatenate((r_inner, r))
+        monitors = []
+        if 'density' in self.adaptive_quantities:
+            monitors.append(np.log(np.maximum(thermo[:, 0], np.finfo(float).tiny)))
+        if 'entropy' in self.adaptive_quantities:
+            entropy = np.abs(thermo[:, 4])
+            monitors.append(np.log(np.maximum(entropy, 1e-2 * entropy.max() + np.finfo(float).tiny)))
+        if 'composition' in self.adaptive_quantities:
+            monitors += list(nuclei.T)
+        if 'mass' in self.adaptive_quantities:
+            mass = cumulative_mass(np.append(0.0, r), thermo[:, 0])
+            monitors.append(mass[1:] / mass[-1])
+        return np.log(r), np.column_stack(monitors) if monitors else np.zeros((len(r), 0))
+
     def __interpolate_model(self):
         """
         Method that interpolates the quantities on the new grid.
-        If the old grid does not start from 0, the first two points are interpolated with a parabola.
+        If the old grid does not start from 0, the first two points are interpolated with a parabola,
+        unless a conservative scheme is used.
+        The interpolation weights are computed once and shared by all the quantities, the source side
+        of the interpolation is kept in source_profiles and reused by the following grids.
         """
-        print('Interpolating model...')
-        self.nuclei_interp = np.zeros((self.ngrid, self.nuclei.shape[1] + 1))
-        self.thermo_interp = np.zeros((self.ngrid, self.thermo.shape[1] + 1))
-        self.nuclei_interp[:, 0] = np.arange(1, self.ngrid + 1)
+        logger.info('Interpolating model...')
+        self.nuclei_interp = np.zeros((self.ncells, self.nuclei.shape[1] + 1))
+        self.thermo_interp = np.zeros((self.ncells, self.thermo.shape[1] + 1))
+        self.nuclei_interp[:, 0] = np.arange(1, self.ncells + 1)
         self.nuclei_interp[:, 1] = self.radius[:, 2]
         self.thermo_interp[:, 0] = self.nuclei_interp[:, 0]
         self.thermo_interp[:, 1] = self.radius[:, 2]
-        if self.rmin < self.nuclei[0, 0]:
+        scheme = INTERPOLATION_SCHEMES[self.interpolation]
+        stencil = scheme(self.thermo[:, 0], self.radius[:, 2], (self.radius[:, 1], self.radius[:, 3]),
+                         density=self.thermo[:, 1])
+        self.nuclei_interp[:, 2:] = stencil.apply(self.__source_profile(stencil, 'nuclei'))
+        self.thermo_interp[:, 2:] = stencil.apply(self.__source_profile(stencil, 'thermo'))
+        if scheme.conservative:
+            ## the density is averaged over the volume to conserve the mass ##
+            self.thermo_interp[:, 2] = stencil.volume_average(self.thermo[:, 1:2])[:, 0]
+        elif self.rmin < self.nuclei[0, 0]:
             extrapolation_index = np.argmax(self.radius[:,2] > self.nuclei[0, 0]) + 1
-            for i in range(1, self.nuclei.shape[1]):
-                a, b, c = self.__parabolic_coefficient(self.nuclei[:, 0], self.nuclei[:, i])
-                self.nuclei_interp[:extrapolation_index, i+1] = a * self.radius[:extrapolation_index, 2] ** 2 + b * self.radius[:extrapolation_index, 2] + c
-                self.nuclei_interp[extrapolation_index:, i+1] = np.interp(self.radius[extrapolation_index:, 2], self.nuclei[:, 0], self.nuclei[:, i])
-            for i in range(1, self.thermo.shape[1]):
-                
-                a, b, c = self.__parabolic_coefficient(self.thermo[:, 0], self.thermo[:, i])
-                self.thermo_interp[:extrapolation_index, i+1] = a * self.radius[:extrapolation_index, 2] ** 2 + b * self.radius[:extrapolation_index, 2] + c
-                self.thermo_interp[extrapolation_index:, i+1] = np.interp(self.radius[extrapolation_index:, 2], self.thermo[:, 0], self.thermo[:, i])
-        else:
-            for i in range(1, self.nuclei.shape[1]):
-                self.nuclei_interp[:, i+1] = np.interp(self.radius[:, 2], self.nuclei[:, 0], self.nuclei[:, i])
-            for i in range(self.thermo.shape[1]):
-                self.thermo_interp[:, i+1] = np.interp(self.radius[:, 2], self.thermo[:, 0], self.thermo[:, i])
+            r_inner = self.radius[:extrapolation_index, 2]
+            self.nuclei_interp[:extrapolation_index, 2:] = evaluate_parabola(
+                self.__source_profile(None, 'nuclei'), r_inner)
+            self.thermo_interp[:extrapolation_index, 2:] = evaluate_parabola(
+                self.__source_profile(None, 'thermo'), r_inner)
         if self.has_bfield:
             self.thermo_interp[:, -1] = np.where(self.thermo_interp[:, -1] < 0, 0.0, self.thermo_interp[:, -1])
             self.thermo_interp[:, -2] = np.where(self.thermo_interp[:, -2] < 0, 0.0, self.thermo_interp[:, -2])
-        print('Model interpolated')
+        logger.info('Model interpolated')
     
+    def __source_profile(self, stencil, name):
+        """
+        Method that returns the part of the interpolation depending only on the source profile,
+        computing it the first time.
+        param stencil: stencil of the interpolation scheme, None for the parabolic fit of the inner points.
+        param name: str, 'thermo' or 'nuclei'.
+        """
+        key = (self.interpolation if stencil is not None else 'parabola', name)
+        if key not in self.source_profiles:
+            data = getattr(self, name)
+            if stencil is None:
+                self.source_profiles[key] = parabolic_coefficients(data[:, 0], data[:, 1:])
+            else:
+                self.source_profiles[key] = stencil.prepare(data[:, 1:])
+        return self.source_profiles[key]
+
     def __calculate_mass(self):
         """
         Method that calculates the mass of the model, encloded in the grid.
         """
-        print('Calculating mass...')
-        dr = 4 * np.pi * (self.radius[:, 3] ** 3 - self.radius[:, 1] ** 3 ) / 3
-        mass = np.sum(dr * self.thermo_interp[:, 2]) / 1.988e33
-        print('Mass calculated.')
+        logger.info('Calculating mass...')
+        self.mass_profile = cumulative_mass(np.append(self.radius[0, 1], self.radius[:, 3]), self.thermo_interp[:, 2])
+        mass = self.u.to_m_sol(self.mass_profile[-1])
+        logger.info('Mass calculated.')
         return mass
+
+    def __calculate_structure(self):
+        """
+        Method that calculates, from the mass profile of the original model (the density is constant
+        between two original radii, the first shell starts at the center):
+        - the compactness parameters xi_M = (M / Msol) / (R(M) / 1000 km), see COMPACTNESS_MASSES;
+        - the masses of the iron and silicon cores (in Msol), the mass coordinates of the outer edge
+          of the outermost shell where the species with Z >= CORE_CHARGES make up half of the mass;
+        - the relative error of the mass of the new grid with respect to the original one, in the
+          radii covered by both.
+        """
+        edges = np.append(0.0, self.thermo[:, 0])
+        self.source_mass_profile = cumulative_mass(edges, self.thermo[:, 1])
+        radii = radius_enclosing(edges, self.source_mass_profile,
+                                 self.u.to_g(np.array(list(COMPACTNESS_MASSES.values()))))
+        self.compactness = {key: None if np.isnan(r) else mass / (r / 1e8)
+                            for (key, mass), r in zip(COMPACTNESS_MASSES.items(), radii)}
+        charges = np.array([species['Z'] for species in load_network(self.network).species])
+        self.core_masses = {key: self.u.to_m_sol(core_mass(self.source_mass_profile,
+                                                           self.nuclei[:, 1:][:, charges >= Z].sum(axis=1)))
+                            for key, Z in CORE_CHARGES.items()}
+        r_inner = min(self.radius[0, 1], edges[-1])
+        r_outer = min(self.radius[-1, 3], edges[-1])
+        source_mass = np.diff(mass_within(edges, self.source_mass_profile, [r_inner, r_outer]))[0]
+        target_mass = mass_within(np.append(self.radius[0, 1], self.radius[:, 3]), self.mass_profile, r_outer)
+        self.mass_error = float(target_mass / source_mass - 1) if source_mass > 0 else None
     
     def __create_nuclei_text(self):
         """
         Method that creates the text to be written in the nuclei.pars file.
         """
-        if self.format == 'MESA':
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nuclei_file/nuclei_MESA.pars')) as f:
-                nuclei_text = f.readlines()
-            nuclei_text[15] = nuclei_text[15].replace('MESA', self.paper_name)
-        else:
-            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nuclei_file/nuclei_Heger.pars')) as f:
-                nuclei_text = f.readlines()
-            nuclei_text[15] = nuclei_text[15].replace('WHW2002', self.paper_name)
-        return nuclei_text
+        return load_network(self.network).nuclei_pars(self.paper_name, self.missing_species)
 
-    def __update_model_list(self):
+    def __create_model_entry(self):
         """
-        Method that updates the model list in the json file.
+        Method that creates the entry of the model for the models_list.json file.
+        return: dict, properties of the interpolated model.
         """
         ## custom sort function ##
         if "ZAMS_mass1" in self.model_properties.keys():
             sorted_keys = ["name", "group", "original_model", "ZAMS_mass1",
                     "ZAMS_mass2", "enclosed_mass", "mass", "xi15", "xi175",
-                    "xi25", "star_type", "metallicity", "omg", "btor", "bpol",
+                    "xi25", "fe_core_mass", "si_core_mass", "mass_error", "validation",
+                    "star_type", "metallicity", "omg", "btor", "bpol",
                     "comment"]
         else:
             sorted_keys = ["name", "group", "original_model", "ZAMS_mass",
-                    "enclosed_mass", "mass", "xi15", "xi175", "xi25", 
+                    "enclosed_mass", "mass", "xi15", "xi175", "xi25",
+                    "fe_core_mass", "si_core_mass", "mass_error", "validation",
                     "star_type", "metallicity", "omg", "btor", "bpol",
                     "comment"]
         ## Add key to the json file ##
-        self.model_properties['original_model'] = self.model_properties['name']
-        self.model_properties['name'] = self.model_name
-        self.model_properties['enclosed_mass'] = '{:.1f}'.format(self.mass)
+        model_properties = dict(self.model_properties)
+        model_properties['original_model'] = model_properties['name']
+        model_properties['name'] = self.model_name + self.output_suffix
+        model_properties['enclosed_mass'] = '{:.1f}'.format(self.mass)
+        ## quantities computed from the original profile, '' if the model is too light ##
+        for key, value in self.compactness.items():
+            model_properties[key] = '' if value is None else '{:.4f}'.format(value)
+        for key, value in self.core_masses.items():
+            model_properties[key] = '{:.3f}'.format(value)
+        model_properties['mass_error'] = '' if self.mass_error is None else '{:.2e}'.format(self.mass_error)
+        ## 'passed', the failed checks, or '' if the model was not validated ##
+        if self.validation_report is None:
+            model_properties['validation'] = ''
+        elif self.validation_report['passed']:
+            model_properties['validation'] = 'passed'
+        else:
+            model_properties['validation'] = 'failed: ' + ', '.join(name for name, check in
+                                                                    self.validation_report['checks'].items()
+                                                                    if not check['passed'])
         if self.format == 'MESA':
-            self.model_properties['comment'] += ' Internal energy calculated from a perfect gas equation of state. Only 19 element species are provided.'
+            model_properties['comment'] += ' Internal energy calculated from a perfect gas equation of state.'
+            if len(self.missing_species) > 0:
+                model_properties['comment'] += ' Only {} element species are provided.'.format(
+                    len(load_network(self.network).species) - len(self.missing_species))
         if self.comment != '':
-            self.model_properties['comment'] += ' ' + self.comment + '.'
+            model_properties['comment'] += ' ' + self.comment + '.'
         ## sort the dictionary ##
-        self.model_properties = {k: self.model_properties[k] for k in sorted_keys}
-        json_path = self.result_path.replace(self.model_name, 'models_list.json')
-        if os.path.exists(json_path):
-            with open(json_path, 'r') as f:
-                json_data = json.load(f)
-            json_data.append(self.model_properties)
-        else:
-            json_data = [self.model_properties]
-            print('Json file not found, creating a new one...')
-        print('Updating json file...')
-
-        ## Clear all duplicates in the json ##
-        result = list()
-        items_set = set()
-
-        for js in json_data:
-            # only add unseen items (referring to 'title' as key)
-            if not js['name'] in items_set:
-                # mark as seen
-                items_set.add(js['name'])
-                # add to results
-                result.append(js)
-        json_data = result
-        with open(json_path, 'w') as f:
-            json.dump(json_data, f, indent=4)
+        return {k: model_properties[k] for k in sorted_keys}
+
+    def __update_model_list(self):
+        """
+        Method that adds the model to the catalogue of the converted models, replacing the
+        entry of the model if already present.
+        """
+        logger.info('Updating models list...')
+        catalogue = ModelCatalogue(os.path.join(os.path.dirname(self.result_path),
+                                                CATALOGUE_FILES[self.catalogue_backend]))
+        catalogue.upsert([self.model_entry])
 
     def __save_interpolated_model(self):
         """
@@ -597,29 +991,104 @@ class InterpolatePresnModel:
         It also produces two additional files, one containing the thermodynamic quantities information
         and one containing the chemical abundances information.
         """
-        print('Saving model...')
-        print('Saving nuclei...')
+        logger.info('Saving model...')
+        logger.debug('Saving nuclei...')
         nuclei_fmt = '\t%d'
         for i in range(self.nuclei_interp.shape[1] - 1):
             nuclei_fmt += '\t%.20E'
-        np.savetxt(os.path.join(self.result_path, 'nuclei.dat'), self.nuclei_interp, fmt=nuclei_fmt)
+        self.__save_table('nuclei.dat', self.nuclei_interp, nuclei_fmt)
         with open(os.path.join(self.result_path, 'nuclei.pars'), 'w') as f:
-            f.writelines(self.__create_nuclei_text())
+            f.write(self.__create_nuclei_text())
         
-        print('Saving thermodynamic quantities...')
+        logger.debug('Saving thermodynamic quantities...')
         thermo_fmt = '\t%d'
         for i in range(self.thermo_interp.shape[1] - 1):
             thermo_fmt += '\t%.20E'
-        np.savetxt(os.path.join(self.result_path, 'star.dat'), self.thermo_interp, fmt=thermo_fmt)
+        self.__save_table('star.dat', self.thermo_interp, thermo_fmt)
         with open(os.path.join(self.result_path, 'star.txt'), 'w') as f:
             f.write(self.__produce_text())
         with open(os.path.join(self.result_path, 'Heger.pars'), 'w') as f:
             f.write(self.__produce_Heger_pars())
-        print('Saving grid...')
-        np.savetxt(os.path.join(self.result_path, 'initial_model.x.dat'), self.radius, fmt = '\t%d\t%.20E\t%.20E\t%.20E')
-        np.savetxt(os.path.join(self.result_path, 'initial_model.y.dat'), self.theta, fmt = '\t%d\t%.20E')
-        self.__update_model_list()
-        print('Model saved.')
+        logger.debug('Saving grid...')
+        self.__save_table('initial_model.x.dat', self.radius, '\t%d\t%.20E\t%.20E\t%.20E')
+        if self.phi is None:
+            self.__save_table('initial_model.y.dat', self.theta, '\t%d\t%.20E')
+        else:
+            self.__save_table('initial_model.y.dat', self.theta, '\t%d\t%.20E\t%.20E\t%.20E')
+            self.__save_table('initial_model.z.dat', self.phi, '\t%d\t%.20E\t%.20E\t%.20E')
+        tables = self.__tables()
+        written = [table_file_name(name + '.dat', self.compression) for name in tables] + \
+                  ['nuclei.pars', 'star.txt', 'Heger.pars']
+        if self.binary_format is not None:
+            logger.debug('Saving binary files...')
+            for name, array in tables.items():
+                write_binary_table(os.path.join(self.result_path, binary_file_name(name, self.binary_format)),
+                                   array, self.binary_format)
+                written.append(binary_file_name(name, self.binary_format))
+        self.monitor.count(written=sum(os.path.getsize(os.path.join(self.result_path, name)) for name in written))
+        self.model_entry = self.__create_model_entry()
+        if self.write_model_list:
+            self.__update_model_list()
+        manifest = self.__dict__.pop('requested_manifest', None) or self.__expected_manifest()
+        write_manifest(self.result_path, dict(manifest, input_hash=self.__input_hash(),
+                                              files=output_sizes(self.result_path, written),
+                                              model_entry=self.model_entry,
+                                              validation_report=self.validation_report))
+        logger.info('Model saved.')
+
+    def __tables(self):
+        """
+        Method that lists the tables saved, in the order of BINARY_FILES, initial_model.z only
+        for a multi-dimensional grid.
+        return: dict, array of every table.
+        """
+        arrays = [self.thermo_interp, self.nuclei_interp, self.radius, self.theta, self.phi]
+        return {name: array for name, array in zip(BINARY_FILES, arrays) if array is not None}
+
+    def __save_table(self, name, array, fmt):
+        """
+        Method that writes a table in the result folder, compressed if a compression is set, and
+        removes the copies of the table with a different compression left by previous conversions.
+        param name: str, name of the uncompressed file, e.g. star.dat.
+        """
+        file_name = table_file_name(name, self.compression)
+        write_table(os.path.join(self.result_path, file_name), array, fmt,
+                    compression=self.compression, level=self.compression_level)
+        for compression in (None,) + tuple(COMPRESSIONS.keys()):
+            stale = os.path.join(self.result_path, table_file_name(name, compression))
+            if compression != self.compression and os.path.exists(stale):
+                os.remove(stale)
+
+    def __write_run_report(self):
+        """
+        Method that collects the measures of the stages in the run report and writes it to the
+        run_report.json file next to the outputs. The report is also logged, attached to the
+        log record as run_report, for structured log handlers.
+        """
+        self.run_report = {'model': self.model_name + self.output_suffix,
+                           'file': os.path.abspath(self.file_path),
+                           'converter_version': CONVERTER_VERSION,
+                           'format': self.format,
+                           'cache_hit': self.cache_hit,
+                           'parameters': {'rmin': self.rmin, 'rmiddle': self.rmiddle, 'rmax': self.rmax,
+                                          'ngrid': self.ngrid, 'grid_type': self.grid_type,
+                                          'ntheta': self.ntheta, 'nphi': self.nphi,
+                                          'theta_spacing': self.theta_spacing,
+                                          'interpolation': self.interpolation,
+                                          'validation': self.validation,
+                                          'network': load_network(self.network).name,
+                                          'binary_format': self.binary_format,
+                                          'compression': self.compression},
+                           'shapes': {'zones': self.thermo.shape[0],
+                                      'species': self.nuclei.shape[1] - 1,
+                                      'thermo_columns': self.thermo.shape[1] - 1,
+                                      'ngrid': self.ncells},
+                           'validation': self.validation_report}
+        self.run_report.update(self.monitor.report(STAGES))
+        if self.write_run_report:
+            write_json_atomic(os.path.join(self.result_path, 'run_report.json'), self.run_report)
+        logger.info('Converted in %.2f s (%.2f s CPU).', self.run_report['total']['wall_s'],
+                    self.run_report['total']['cpu_s'], extra={'run_report': self.run_report})
 
     def __produce_text(self):
         """
@@ -628,14 +1097,22 @@ class InterpolatePresnModel:
         It also provides the colums of the data file.
         """
         output_text = '----------------------------------------------------------\n' + \
-                    ' Heger model no. ' + self.model_name + '\n' + \
+                    ' Heger model no. ' + self.model_name + self.output_suffix + '\n' + \
                     '----------------------------------------------------------\n' + \
                     ' grid of ngrid zones ranging from rmin to rmax\n' + \
                     ' rmin = ' + str(self.rmin) + '\n' + \
                     ' rmax = ' + str(self.rmax) + '\n' + \
-                    ' ngrid = ' + str(self.ngrid) + '\n' + \
-                    ' mass = ' + str(self.mass) + '\n' + \
-                    '----------------------------------------------------------\n' + \
+                    ' ngrid = ' + str(self.ncells) + '\n' + \
+                    ' mass = ' + str(self.mass) + '\n'
+        if self.phi is not None:
+            output_text += ' angular grid of ntheta x nphi cells, theta from 0 to pi (' + self.theta_spacing + \
+                        ' spacing), phi from 0 to 2 pi\n' + \
+                        ' ntheta = ' + str(self.ntheta) + '\n' + \
+                        ' nphi = ' + str(self.nphi) + '\n'
+        if self.grid_type == 'adaptive':
+            output_text += ' adaptive grid, tolerance = ' + str(self.grid_tolerance) + \
+                        ' on ln r, ' + ', '.join(self.adaptive_quantities) + '\n'
+        output_text += '----------------------------------------------------------\n' + \
                     ' data written to file ' + self.model_name +  '.dat are ::\n'
         if self.has_bfield:
             output_text += '   rho, tem, y_e, pre, ent, erg, abr, vel, omg, btor, bpol\n' + \
@@ -647,25 +1124,40 @@ class InterpolatePresnModel:
             output_text += '   Warning: internal energy derived with perfect gas\n' + \
                         'EOS: U = P / (gamma - 1)' + \
                         '----------------------------------------------------------\n'
+        if self.compression is not None:
+            output_text += ' the .dat files are compressed with ' + self.compression + ' (' + \
+                        ', '.join(table_file_name(name + '.dat', self.compression) for name in self.__tables()) + ')\n' + \
+                        '----------------------------------------------------------\n'
+        if self.binary_format is not None:
+            output_text += ' the .dat files are also written as ' + self.__binary_layout_text() + '\n' + \
+                        '----------------------------------------------------------\n'
         return output_text
+
+    def __binary_layout_text(self):
+        """
+        Method that describes the layout of the binary files.
+        """
+        files = ', '.join(binary_file_name(name, self.binary_format) for name in self.__tables())
+        if self.binary_format == 'raw':
+            layout = 'little-endian float64, one row after the other, no header'
+        elif self.binary_format == 'fortran':
+            layout = 'one Fortran unformatted sequential record, little-endian float64,\n' + \
+                     '   column-major (ngrid, ncolumns)'
+        else:
+            layout = 'numpy .npy files'
+        return files + '\n   ' + layout + ',\n   same columns of the .dat files'
     
     def __produce_Heger_pars(self):
         """
         Method that produces the namelist to be written in the Heger.pars file.
         """
-        str_data = '\t1\t' + str(self.ngrid) + '\n' + \
-                   '\t1\t1\n' + \
-                   '\t1\t1\n' + \
+        str_data = '\t1\t' + str(self.ncells) + '\n' + \
+                   '\t1\t' + str(self.ntheta) + '\n' + \
+                   '\t1\t' + str(self.nphi) + '\n' + \
                    '&Heger_pars\n' + \
-                   '  heger_nx =\t' + str(self.ngrid) + '\n' + \
-                   '/'
-        return str_data 
-
-    ## UTILITY METHODS
-    def __parabolic_coefficient(self, x, y):
-        """
-        Method that calculates the coefficients of a parabola given three points.
-        """
-        x_points = x[:4]
-        y_points = y[:4]
-        return np.polyfit(x_points, y_points, 2)
+                   '  heger_nx =\t' + str(self.ncells) + '\n'
+        if self.phi is not None:
+            str_data += '  heger_ny =\t' + str(self.ntheta) + '\n' + \
+                        '  heger_nz =\t' + str(self.nphi) + '\n'
+        str_data += '/'
+        return str_data
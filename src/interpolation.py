@@ -0,0 +1,239 @@
+import numpy as np
+
+
+class LinearStencil:
+    """
+    Linear interpolation from a source grid onto a target grid.
+    The bracketing indices and the weights are computed once for the target grid and
+    then applied to all the columns of an array with a single gather.
+    Outside the source grid the values are held constant, as np.interp does.
+    Every stencil splits the interpolation in prepare, which depends only on the source
+    profiles and can be shared by the stencils of different target grids, and apply.
+    """
+    conservative = False
+
+    def __init__(self, x_source, x_target, target_edges=None, density=None):
+        """
+        x_source: numpy array, increasing coordinates of the source grid.
+        x_target: numpy array, coordinates of the target grid.
+        target_edges: tuple of numpy arrays, left and right edges of the target cells,
+                      only used by the conservative schemes.
+        density: numpy array, density on the source grid, only used by the conservative schemes.
+        """
+        self.dx_source = np.diff(x_source)
+        self.index = np.clip(np.searchsorted(x_source, x_target, side='right') - 1,
+                             0, len(x_source) - 2)
+        self.offset = (x_target - x_source[self.index])[:, None]
+        self.left = x_target < x_source[0]
+        self.right = x_target >= x_source[-1]
+
+    def prepare(self, values):
+        """
+        Slopes between the source points.
+        values: numpy array, (source points, columns) values on the source grid.
+        """
+        return values, np.diff(values, axis=0) / self.dx_source[:, None]
+
+    def apply(self, prepared):
+        """
+        Interpolates the prepared columns on the target grid.
+        return: numpy array, (target points, columns) values on the target grid.
+        """
+        values, slopes = prepared
+        out = slopes[self.index]
+        out *= self.offset
+        out += values[self.index]
+        out[self.left] = values[0]
+        out[self.right] = values[-1]
+        return out
+
+    def __call__(self, values):
+        """
+        Interpolates the columns of values.
+        values: numpy array, (source points, columns) values on the source grid.
+        return: numpy array, (target points, columns) values on the target grid.
+        """
+        return self.apply(self.prepare(values))
+
+class LogLogStencil(LinearStencil):
+    """
+    Linear interpolation in log-log space, i.e. power laws between the source points.
+    Columns that are not strictly positive (e.g. velocities) are interpolated linearly
+    in log r instead.
+    """
+    def __init__(self, x_source, x_target, target_edges=None, density=None):
+        super().__init__(np.log(x_source), np.log(x_target))
+
+    def prepare(self, values):
+        positive = np.all(values > 0, axis=0)
+        values = np.array(values)
+        values[:, positive] = np.log(values[:, positive])
+        return super().prepare(values), positive
+
+    def apply(self, prepared):
+        prepared, positive = prepared
+        out = super().apply(prepared)
+        out[:, positive] = np.exp(out[:, positive])
+        return out
+
+class PchipStencil(LinearStencil):
+    """
+    Monotone piecewise cubic Hermite interpolation (Fritsch-Carlson, as scipy.interpolate.PchipInterpolator).
+    The Hermite basis functions of the target points are computed once, the derivatives at the
+    source points are computed for all the columns at once.
+    Outside the source grid the values are held constant.
+    """
+    def __init__(self, x_source, x_target, target_edges=None, density=None):
+        super().__init__(x_source, x_target)
+        h = self.dx_source[self.index][:, None]
+        t = self.offset / h
+        self.h00 = (1 + 2 * t) * (1 - t) ** 2
+        self.h10 = t * (1 - t) ** 2 * h
+        self.h01 = t ** 2 * (3 - 2 * t)
+        self.h11 = t ** 2 * (t - 1) * h
+
+    def prepare(self, values):
+        """
+        Derivatives at the source points, limited to keep the interpolant monotone.
+        """
+        h = self.dx_source[:, None]
+        delta = np.diff(values, axis=0) / h
+        d = np.zeros(values.shape)
+        ## Interior points: weighted harmonic mean of the slopes ##
+        w1 = 2 * h[1:] + h[:-1]
+        w2 = h[1:] + 2 * h[:-1]
+        same_sign = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            d[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.0)
+        ## End points: one sided three points formula ##
+        if len(self.dx_source) > 1:
+            d[0] = self.__edge_derivative(h[0], h[1], delta[0], delta[1])
+            d[-1] = self.__edge_derivative(h[-1], h[-2], delta[-1], delta[-2])
+        else:
+            d[0] = d[-1] = delta[0]
+        return values, d
+
+    @staticmethod
+    def __edge_derivative(h0, h1, delta0, delta1):
+        d = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+        d = np.where(np.sign(d) != np.sign(delta0), 0.0, d)
+        return np.where((np.sign(delta0) != np.sign(delta1)) & (np.abs(d) > np.abs(3 * delta0)),
+                        3 * delta0, d)
+
+    def apply(self, prepared):
+        values, d = prepared
+        out = self.h00 * values[self.index] + self.h10 * d[self.index] + \
+              self.h01 * values[self.index + 1] + self.h11 * d[self.index + 1]
+        out[self.left] = values[0]
+        out[self.right] = values[-1]
+        return out
+
+class ConservativeStencil:
+    """
+    Cell integral remap. The source values are constant in the shells between two consecutive
+    source radii (the first shell starts at the center) and the value of a target cell is the
+    volume average over it, so the integral of every quantity over the volume is conserved.
+    If a density is given, the columns are averaged weighting them with it (mass weighted),
+    so e.g. the mass of every species is conserved as well.
+    Outside the source grid the values are held constant.
+    """
+    conservative = True
+
+    def __init__(self, x_source, x_target, target_edges, density=None):
+        """
+        x_source: numpy array, outer radii of the source shells.
+        x_target: numpy array, coordinates of the target grid.
+        target_edges: tuple of numpy arrays, left and right edges of the target cells.
+        density: numpy array, density on the source grid used to weight the columns (default: None).
+        """
+        self.edges = np.concatenate(([0.0], x_source))
+        self.volume = (self.edges[1:] ** 3 - self.edges[:-1] ** 3)[:, None]
+        r_left = np.clip(target_edges[0], 0, self.edges[-1])
+        r_right = np.clip(target_edges[1], 0, self.edges[-1])
+        self.index_left, self.dv_left = self.__locate(r_left)
+        self.index_right, self.dv_right = self.__locate(r_right)
+        self.outside = r_right <= r_left
+        self.density = None if density is None else density[:, None]
+        self.cell_volume = self.__integrate(self.__cumulate(np.ones((len(x_source), 1))))
+
+    def __locate(self, r):
+        """
+        Shell containing every radius and volume between the inner edge of the shell and the radius.
+        """
+        index = np.clip(np.searchsorted(self.edges, r, side='right') - 1, 0, len(self.volume) - 1)
+        return index, (r ** 3 - self.edges[index] ** 3)[:, None]
+
+    def __cumulate(self, values):
+        """
+        Volume integral of the columns of values from the center to every source edge.
+        """
+        cumulative = np.zeros((values.shape[0] + 1, values.shape[1]))
+        np.cumsum(values * self.volume, axis=0, out=cumulative[1:])
+        return values, cumulative
+
+    def __integrate(self, prepared):
+        """
+        Volume integral of the prepared columns over the target cells.
+        """
+        values, cumulative = prepared
+        return cumulative[self.index_right] - cumulative[self.index_left] + \
+               values[self.index_right] * self.dv_right - values[self.index_left] * self.dv_left
+
+    def __average(self, prepared):
+        """
+        Volume average of the prepared columns over the target cells.
+        """
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            out = self.__integrate(prepared) / self.cell_volume
+        out[self.outside] = prepared[0][-1]
+        return out
+
+    def volume_average(self, values):
+        """
+        Volume average of the columns of values over the target cells.
+        """
+        return self.__average(self.__cumulate(values))
+
+    def prepare(self, values):
+        """
+        Volume integrals of the source columns, weighted with the density if given.
+        """
+        if self.density is None:
+            return self.__cumulate(values), None, None
+        return self.__cumulate(values), self.__cumulate(values * self.density), self.__cumulate(self.density)
+
+    def apply(self, prepared):
+        volume_prepared, mass_prepared, density_prepared = prepared
+        if mass_prepared is None:
+            return self.__average(volume_prepared)
+        mass = self.__integrate(density_prepared)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            out = self.__integrate(mass_prepared) / mass
+        no_mass = self.outside | (mass[:, 0] <= 0)
+        out[no_mass] = self.__average(volume_prepared)[no_mass]
+        return out
+
+    def __call__(self, values):
+        return self.apply(self.prepare(values))
+
+INTERPOLATION_SCHEMES = {'linear': LinearStencil,
+                         'loglog': LogLogStencil,
+                         'pchip': PchipStencil,
+                         'conservative': ConservativeStencil}
+
+def parabolic_coefficients(x, values, npoints=4):
+    """
+    Fits a parabola through the first npoints of every column of values with a
+    single least squares solve.
+    return: numpy array, (3, columns) coefficients, from the quadratic to the constant one.
+    """
+    return np.polyfit(x[:npoints], values[:npoints], 2)
+
+def evaluate_parabola(coefficients, x):
+    """
+    Evaluates the parabolas of parabolic_coefficients at the points x.
+    return: numpy array, (points, columns) values.
+    """
+    a, b, c = coefficients
+    x = x[:, None]
+    return a * x ** 2 + b * x + c
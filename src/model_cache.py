@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+                                  'PreSNmodelInterpolator')
+DEFAULT_CACHE_SIZE = 2 * 1024 ** 3
+
+
+def file_hash(file_path):
+    """
+    Computes the sha256 hash of the content of a file.
+    return: str, hexadecimal digest.
+    """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 ** 2), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+class ParsedModelCache:
+    """
+    On disk cache of the parsed models, i.e. the thermodynamic quantities and the nuclei
+    arrays after the ordering, so re-gridding a model does not need to parse it again.
+    Every model is stored in a folder named after the hash of the original file and the
+    version of the converter, containing the two arrays and the sums over the species of
+    the file used by the validation as .npy files (loaded memory mapped)
+    and a properties.json sidecar with the format, the magnetic field flag, the comment, the
+    species missing in the model and the number of nan values in its columns.
+    When the cache exceeds its maximum size, the least recently used models are removed.
+    """
+    def __init__(self, cache_path=None, max_size=None):
+        """
+        cache_path: str, folder of the cache (default: ~/.cache/PreSNmodelInterpolator).
+        max_size: int, maximum size of the cache in bytes (default: 2 GB).
+        """
+        self.cache_path = DEFAULT_CACHE_PATH if cache_path is None else cache_path
+        self.max_size = DEFAULT_CACHE_SIZE if max_size is None else max_size
+        os.makedirs(self.cache_path, exist_ok=True)
+
+    def key(self, file_path, version, digest=None):
+        """
+        Key of the model in the cache.
+        param digest: str, hash of the content of the model if already computed (e.g. of a model
+                      read from an archive), otherwise the file is hashed.
+        return: str, hash of the file content followed by the converter version.
+        """
+        return (file_hash(file_path) if digest is None else digest) + '_' + str(version)
+
+    def load(self, key):
+        """
+        Loads a model from the cache.
+        return: dict with the keys thermo, nuclei, format, has_bfield, comment, missing_species,
+                nan_counts and composition, or None if the model is not in the cache.
+        """
+        entry_path = os.path.join(self.cache_path, key)
+        properties_path = os.path.join(entry_path, 'properties.json')
+        try:
+            with open(properties_path, 'r') as f:
+                entry = json.load(f)
+            entry.setdefault('missing_species', [])
+            entry.setdefault('nan_counts', {})
+            entry['thermo'] = np.load(os.path.join(entry_path, 'thermo.npy'), mmap_mode='r')
+            entry['nuclei'] = np.load(os.path.join(entry_path, 'nuclei.npy'), mmap_mode='r')
+            entry['composition'] = np.load(os.path.join(entry_path, 'composition.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        ## Mark the model as recently used ##
+        os.utime(properties_path)
+        return entry
+
+    def store(self, key, thermo, nuclei, format, has_bfield, comment, missing_species=(), nan_counts=None,
+              composition=None):
+        """
+        Stores a model in the cache and removes the least recently used ones if needed.
+        param composition: numpy array, sums over the species of the file, see source_composition.
+        """
+        entry_path = os.path.join(self.cache_path, key)
+        if os.path.exists(entry_path):
+            return
+        tmp_path = tempfile.mkdtemp(dir=self.cache_path, prefix='.' + key)
+        try:
+            np.save(os.path.join(tmp_path, 'thermo.npy'), np.ascontiguousarray(thermo))
+            np.save(os.path.join(tmp_path, 'nuclei.npy'), np.ascontiguousarray(nuclei))
+            np.save(os.path.join(tmp_path, 'composition.npy'), np.ascontiguousarray(composition))
+            with open(os.path.join(tmp_path, 'properties.json'), 'w') as f:
+                json.dump({'format': format, 'has_bfield': bool(has_bfield), 'comment': comment,
+                           'missing_species': list(missing_species), 'nan_counts': dict(nan_counts or {})}, f, indent=4)
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            ## Another process stored the same model in the meantime ##
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict(keep=key)
+
+    def entries(self):
+        """
+        Lists the models in the cache.
+        return: list of (last access time, size in bytes, key), sorted from the least recently used.
+        """
+        entries = []
+        for key in os.listdir(self.cache_path):
+            entry_path = os.path.join(self.cache_path, key)
+            if key.startswith('.') or not os.path.isdir(entry_path):
+                continue
+            try:
+                last_access = os.path.getmtime(os.path.join(entry_path, 'properties.json'))
+                size = sum(os.path.getsize(os.path.join(entry_path, f)) for f in os.listdir(entry_path))
+            except OSError:
+                continue
+            entries.append((last_access, size, key))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used models until the cache is smaller than its maximum size.
+        keep: str, key of a model that must not be removed.
+        """
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total_size <= self.max_size:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_path, key), ignore_errors=True)
+            total_size -= size
+
+    def clear(self):
+        """
+        Removes all the models from the cache.
+        """
+        for key in os.listdir(self.cache_path):
+            shutil.rmtree(os.path.join(self.cache_path, key), ignore_errors=True)
@@ -0,0 +1,215 @@
+import contextlib
+import json
+import os
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    ## Windows ##
+    fcntl = None
+    import msvcrt
+
+## sqlite3 is imported only by the sqlite backend, so the json one starts faster ##
+## Backend of the catalogue for every file extension ##
+CATALOGUE_BACKENDS = {'.json': 'json', '.sqlite': 'sqlite', '.db': 'sqlite'}
+
+
+def write_json_atomic(json_path, json_data):
+    """
+    Writes the json file to a temporary file in the same folder and then
+    renames it, so the file is never left half written.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(json_path)),
+                                    prefix='.' + os.path.basename(json_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(json_data, f, indent=4)
+        os.replace(tmp_path, json_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def lock_file_path(file_path):
+    """
+    Path of the lock file of a file, hidden in the same folder (e.g. .models_list.json.lock), so it does
+    not clutter the folder of the outputs. The lock file is not removed when the lock is released,
+    since a process waiting for the lock would then hold it on a file no longer in the folder.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), '.' + os.path.basename(file_path) + '.lock')
+
+class FileLock:
+    """
+    Exclusive lock shared by all the processes, held on a lock file while in a with block.
+    """
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.lock_path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.file.close()
+            self.file = None
+
+class ModelCatalogue:
+    """
+    Catalogue of the converted models, i.e. the models_list.json file.
+    Every entry is identified by its name: adding a model already in the catalogue replaces its
+    entry in place, new models are appended.
+    Two backends are available, chosen from the extension of the file:
+        - json (.json): the list of entries. Every update reads the file, updates it through
+          a name index and writes it to a temporary file renamed over the old one, while holding
+          a lock on a hidden lock file next to it (see lock_file_path), so concurrent conversions
+          do not lose entries. Every update still reads and writes the whole file, i.e. its time
+          grows with the number of models in the catalogue;
+        - sqlite (.sqlite or .db): a table indexed by name, updated in place without rewriting
+          the catalogue. The models_list.json file is written by export_json. When the database
+          is created, the entries of the models_list.json file in the same folder are imported.
+    """
+    def __init__(self, catalogue_path):
+        """
+        catalogue_path: str, path of the catalogue file.
+        """
+        extension = os.path.splitext(catalogue_path)[1]
+        assert extension in CATALOGUE_BACKENDS, 'The catalogue file must end with ' + \
+            ', '.join(CATALOGUE_BACKENDS.keys())
+        self.catalogue_path = catalogue_path
+        self.backend = CATALOGUE_BACKENDS[extension]
+        if self.backend == 'sqlite':
+            self.__create_database()
+
+    def upsert(self, model_entries):
+        """
+        Adds the model entries to the catalogue, replacing the ones with the same name.
+        param model_entries: list of dict, entries of the models.
+        """
+        if self.backend == 'sqlite':
+            with self.__connect() as connection:
+                connection.executemany('INSERT INTO models (name, entry) VALUES (?, ?) '
+                                       'ON CONFLICT (name) DO UPDATE SET entry = excluded.entry',
+                                       [(entry['name'], json.dumps(entry)) for entry in model_entries])
+            return
+        with FileLock(lock_file_path(self.catalogue_path)):
+            json_data = self.__read_json()
+            index = {}
+            for position, entry in enumerate(json_data):
+                index.setdefault(entry['name'], position)
+            for entry in model_entries:
+                if entry['name'] in index:
+                    json_data[index[entry['name']]] = entry
+                else:
+                    index[entry['name']] = len(json_data)
+                    json_data.append(entry)
+            write_json_atomic(self.catalogue_path, json_data)
+
+    def get(self, name):
+        """
+        Entry of a model.
+        return: dict, entry of the model, None if the model is not in the catalogue.
+        """
+        if self.backend == 'sqlite':
+            with self.__connect() as connection:
+                row = connection.execute('SELECT entry FROM models WHERE name = ?', (name,)).fetchone()
+            return None if row is None else json.loads(row[0])
+        for entry in self.__read_json():
+            if entry['name'] == name:
+                return entry
+        return None
+
+    def entries(self):
+        """
+        All the entries, in the order in which the models were first added.
+        return: list of dict, entries of the models.
+        """
+        if self.backend == 'sqlite':
+            with self.__connect() as connection:
+                rows = connection.execute('SELECT entry FROM models ORDER BY id').fetchall()
+            return [json.loads(row[0]) for row in rows]
+        return self.__read_json()
+
+    def export_json(self, json_path):
+        """
+        Writes all the entries to a models_list.json file.
+        param json_path: str, path of the json file.
+        """
+        write_json_atomic(json_path, self.entries())
+
+    def __read_json(self):
+        """
+        Reads the json catalogue, keeping only the first entry of every name.
+        """
+        if not os.path.exists(self.catalogue_path):
+            return []
+        with open(self.catalogue_path, 'r') as f:
+            json_data = json.load(f)
+        names = set()
+        result = []
+        for entry in json_data:
+            if entry['name'] not in names:
+                names.add(entry['name'])
+                result.append(entry)
+        return result
+
+    @contextlib.contextmanager
+    def __connect(self):
+        """
+        Opens the database, waiting for the other processes writing to it, and commits
+        the changes at the end of the with block.
+        """
+        import sqlite3
+        connection = sqlite3.connect(self.catalogue_path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def __create_database(self):
+        """
+        Creates the database, importing the models_list.json file in the same folder if present.
+        """
+        json_path = os.path.join(os.path.dirname(os.path.abspath(self.catalogue_path)), 'models_list.json')
+        with FileLock(lock_file_path(self.catalogue_path)):
+            if os.path.exists(self.catalogue_path):
+                return
+            if os.path.exists(self.catalogue_path + '.tmp'):
+                ## left by an interrupted creation ##
+                os.remove(self.catalogue_path + '.tmp')
+            import sqlite3
+            connection = sqlite3.connect(self.catalogue_path + '.tmp')
+            try:
+                with connection:
+                    connection.execute('CREATE TABLE models (id INTEGER PRIMARY KEY, '
+                                       'name TEXT UNIQUE NOT NULL, entry TEXT NOT NULL)')
+                    if os.path.exists(json_path):
+                        connection.executemany('INSERT INTO models (name, entry) VALUES (?, ?)',
+                                               [(entry['name'], json.dumps(entry)) for entry in
+                                                ModelCatalogue(json_path).entries()])
+            finally:
+                connection.close()
+            os.replace(self.catalogue_path + '.tmp', self.catalogue_path)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Export a catalogue of converted models to a models_list.json file.')
+    parser.add_argument('--catalogue-path', type=str, required=True, help='Path of the catalogue (.sqlite, .db or .json)')
+    parser.add_argument('--json-path', type=str, required=True, help='Path of the json file to write')
+    args = parser.parse_args()
+    catalogue = ModelCatalogue(args.catalogue_path)
+    catalogue.export_json(args.json_path)
+    print('{} models exported to {}.'.format(len(catalogue.entries()), args.json_path))
@@ -0,0 +1,132 @@
+import hashlib
+import os
+from src.model_cache import file_hash
+
+## Separator between the path of an archive and the path of a model inside it, e.g. WH2007.tar.gz::s25.presn ##
+MEMBER_SEPARATOR = '::'
+## Extensions of the archives containing several models ##
+ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.zip')
+## Extension of a single model compressed with gzip ##
+GZIP_EXTENSION = '.gz'
+## tarfile, zipfile and gzip are imported only when a model is read from them ##
+
+
+def split_member(file_path):
+    """
+    Splits the path of a model in the path of the file and the path of the model inside it.
+    return: str, path of the file,
+            str, path of the model inside the archive, None if the model is not in an archive.
+    """
+    archive_path, separator, member = file_path.partition(MEMBER_SEPARATOR)
+    return (archive_path, member) if separator else (file_path, None)
+
+def is_archive(file_path):
+    """
+    Whether the file is an archive of models, from its extension.
+    """
+    return file_path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _strip_extension(name, extensions):
+    """
+    Removes the first of the extensions the name ends with.
+    """
+    for extension in extensions:
+        if name.lower().endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+def naming_path(file_path):
+    """
+    Path from which the names of the model and of its paper are found, as if the archive were
+    extracted in a folder named after it and the model were not compressed, e.g.
+    /data/WH2007.tar.gz::s25.presn gives /data/WH2007/s25.presn and
+    /data/models.zip::SW2014/s12.presn.gz gives /data/models/SW2014/s12.presn.
+    return: str, absolute path.
+    """
+    archive_path, member = split_member(file_path)
+    if member is None:
+        return _strip_extension(os.path.abspath(file_path), (GZIP_EXTENSION,))
+    return os.path.join(_strip_extension(os.path.abspath(archive_path), ARCHIVE_EXTENSIONS),
+                        *_strip_extension(member, (GZIP_EXTENSION,)).split('/'))
+
+def _is_model_member(name):
+    """
+    Whether a member of an archive can be a model, i.e. it is not hidden (nor macOS metadata).
+    """
+    parts = name.split('/')
+    return not parts[-1].startswith('.') and '__MACOSX' not in parts
+
+def _decompress_member(name, content):
+    """
+    Decompresses a member of an archive compressed with gzip.
+    """
+    if name.lower().endswith(GZIP_EXTENSION):
+        import gzip
+        return gzip.decompress(content)
+    return content
+
+def read_model(file_path):
+    """
+    Reads a model inside an archive (see MEMBER_SEPARATOR) or compressed with gzip.
+    return: bytes, content of the model, None if the model is a plain file, which the parser
+            reads through a memory map.
+    """
+    archive_path, member = split_member(file_path)
+    if member is None:
+        if not file_path.lower().endswith(GZIP_EXTENSION) or is_archive(file_path):
+            return None
+        import gzip
+        with gzip.open(file_path, 'rb') as f:
+            return f.read()
+    if archive_path.lower().endswith('.zip'):
+        import zipfile
+        with zipfile.ZipFile(archive_path) as archive:
+            try:
+                content = archive.read(member)
+            except KeyError:
+                raise ValueError('The archive {} does not contain {}.'.format(archive_path, member))
+    else:
+        import tarfile
+        with tarfile.open(archive_path) as archive:
+            try:
+                f = archive.extractfile(member)
+            except KeyError:
+                f = None
+            if f is None:
+                raise ValueError('The archive {} does not contain the file {}.'.format(archive_path, member))
+            content = f.read()
+    return _decompress_member(member, content)
+
+def iter_archive(archive_path):
+    """
+    Reads the models of an archive one after the other in a single pass over the archive (tar
+    files are read as a stream), skipping folders and hidden files. A model is held in memory
+    only until the next one is read.
+    return: generator of str, path of the model (archive_path::member), and bytes, its content.
+    """
+    if archive_path.lower().endswith('.zip'):
+        import zipfile
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_model_member(info.filename):
+                    yield archive_path + MEMBER_SEPARATOR + info.filename, \
+                        _decompress_member(info.filename, archive.read(info))
+    else:
+        import tarfile
+        with tarfile.open(archive_path, 'r|*') as archive:
+            for info in archive:
+                if info.isfile() and _is_model_member(info.name):
+                    yield archive_path + MEMBER_SEPARATOR + info.name, \
+                        _decompress_member(info.name, archive.extractfile(info).read())
+
+def source_hash(file_path, content=None):
+    """
+    Hash of a model, of the file if it is a plain file, of its content otherwise.
+    param content: bytes, content of the model if already read (see read_model).
+    return: str, hexadecimal sha256 digest.
+    """
+    if content is None:
+        content = read_model(file_path)
+    if content is None:
+        return file_hash(file_path)
+    return hashlib.sha256(content).hexdigest()
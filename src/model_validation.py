@@ -0,0 +1,153 @@
+import numpy as np
+from src.all_species_src.reduced_network import parse_isotope
+
+## What to do with a model failing the validation: stop the conversion, convert it flagging ##
+## the failed checks, or skip the validation ##
+VALIDATION_MODES = ('error', 'warn', 'off')
+## Default tolerances of the checks, the composition is the one of the file, before the reduction ##
+## to the network (which on purpose counts some isotopes twice and drops others):
+## - normalization: largest |sum of the mass fractions - 1| in a zone;
+## - ye: largest |Ye - sum of X Z / A| in a zone;
+## - abar: largest relative difference between Abar and 1 / sum of X / A in a zone;
+## - nan_fraction: largest fraction of nan values (set to 0) in a column of the file ##
+VALIDATION_TOLERANCES = {'normalization': 1e-2, 'ye': 0.05, 'abar': 0.25, 'nan_fraction': 0.0}
+## Names of the columns of the thermo array ##
+THERMO_NAMES = ('radius', 'density', 'temperature', 'ye', 'pressure', 'entropy', 'energy', 'abar',
+                'velocity', 'omega', 'b_toroidal', 'b_poloidal')
+## Charge and mass numbers of the species of the files whose name is neither an isotope nor ##
+## an alias of a species of the network ##
+SPECIAL_SPECIES = {'prot': (1, 1)}
+
+
+class ModelValidationError(ValueError):
+    """
+    Raised when a model fails the validation, report is the validation report of the model.
+    """
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+def parse_validation_tolerances(specs):
+    """
+    Parses tolerances given as key=value strings, e.g. ['ye=0.1', 'nan_fraction=0.01'].
+    return: dict, tolerances.
+    """
+    tolerances = {}
+    for spec in specs:
+        key, _, value = spec.partition('=')
+        key = key.strip()
+        if key not in VALIDATION_TOLERANCES:
+            raise ValueError('Unknown validation tolerance \'{}\', use one of '.format(key) + \
+                             ', '.join(VALIDATION_TOLERANCES.keys()) + '.')
+        tolerances[key] = float(value)
+    return tolerances
+
+def count_nan(data, columns):
+    """
+    Counts the nan values of some columns of the data, in a single pass over the data.
+    param columns: dict, index of the column in the data for every name.
+    return: dict, number of nan values for the names of the columns containing them.
+    """
+    counts = np.count_nonzero(np.isnan(data), axis=0)
+    return {name: int(counts[index]) for name, index in columns.items() if counts[index] > 0}
+
+def _species_weights(header, network):
+    """
+    Charge and mass numbers of the species of a file, from the species of the network they are an
+    alias of (e.g. 'neutrons' or the 'Fe' group), from SPECIAL_SPECIES or from their name (e.g. 'fe56'),
+    the other columns are not species.
+    return: numpy array, indices of the species in the header,
+            numpy array, (species, 3) weights 1, Z / A and 1 / A of every species.
+    """
+    aliases = {alias: (species['Z'], species['A']) for species in network.species for alias in species['aliases']}
+    indices, weights = [], []
+    for index, name in enumerate(header):
+        name = name.casefold()
+        isotope = aliases.get(name) or SPECIAL_SPECIES.get(name) or parse_isotope(name)
+        if isotope is not None and isotope[1] > 0:
+            indices.append(index)
+            weights.append((1.0, isotope[0] / isotope[1], 1.0 / isotope[1]))
+    return np.array(indices, dtype=int), np.array(weights).reshape(-1, 3)
+
+def source_composition(abundances, header, network):
+    """
+    Sums over the species of the file, before the reduction to the network, with a single matrix product.
+    param abundances: numpy array, (zones, columns) data, the first len(header) columns are named in the header.
+    param header: list of str, names of the columns.
+    param network: ReducedNetwork, whose aliases name the species of the reduced files.
+    return: numpy array, (zones, 3) sum of X, sum of X Z / A and sum of X / A in every zone.
+    """
+    indices, weights = _species_weights(header, network)
+    return abundances[:, indices] @ weights
+
+def _check(failed, deviation):
+    """
+    Summary of a check over the zones.
+    param failed: numpy array of bool, zones failing the check.
+    param deviation: numpy array, deviation of every zone, the worst one is reported.
+    """
+    zones = np.flatnonzero(failed)
+    return {'passed': len(zones) == 0, 'failed_zones': len(zones),
+            'first_failed_zone': int(zones[0]) if len(zones) > 0 else None,
+            'worst': float(deviation[zones].max()) if len(zones) > 0 else 0.0}
+
+def validate_model(thermo, composition, nan_counts=None, tolerances=None):
+    """
+    Checks the ordered profiles of a model, every check with a few operations over all the zones:
+        - radius_increasing: the radius increases from a zone to the next one (worst: largest
+          relative decrease);
+        - density_positive, temperature_positive, pressure_positive: the quantities are positive
+          (worst: largest absolute value of the non positive ones);
+        - normalization, ye, abar: the composition of the file is normalized and consistent with
+          Ye and Abar, see VALIDATION_TOLERANCES (worst: largest deviation);
+        - nan: no column has more nan values than allowed (columns: the ones with too many nan values,
+          worst: largest fraction).
+    param thermo: numpy array, ordered thermodynamic quantities of the model.
+    param composition: numpy array, sums over the species of the file in the same zones, see source_composition.
+    param nan_counts: dict, number of nan values in every column of the file, see count_nan.
+    param tolerances: dict, tolerances replacing the ones of VALIDATION_TOLERANCES.
+    return: dict, report with the keys passed, zones, tolerances, checks (passed, failed_zones,
+            first_failed_zone and worst of every check but nan) and nan_counts.
+    """
+    tolerances = dict(VALIDATION_TOLERANCES, **(tolerances or {}))
+    nan_counts = dict(nan_counts or {})
+    zones = thermo.shape[0]
+    checks = {}
+    ## Structure ##
+    radius = thermo[:, 0]
+    step = np.concatenate(([1.0], np.diff(radius)))
+    checks['radius_increasing'] = _check(step <= 0, -step / np.maximum(np.abs(radius), np.finfo(float).tiny))
+    for column in (1, 2, 4):
+        checks[THERMO_NAMES[column] + '_positive'] = _check(thermo[:, column] <= 0, np.abs(thermo[:, column]))
+    ## Composition ##
+    total = composition[:, 0]
+    deviation = np.abs(total - 1)
+    checks['normalization'] = _check(deviation > tolerances['normalization'], deviation)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ## normalized composition, the zones with no species are already reported ##
+        deviation = np.nan_to_num(np.abs(thermo[:, 3] - composition[:, 1] / total))
+        checks['ye'] = _check(deviation > tolerances['ye'], deviation)
+        deviation = np.nan_to_num(np.abs(thermo[:, 7] * composition[:, 2] / total - 1))
+        checks['abar'] = _check(deviation > tolerances['abar'], deviation)
+    ## Values set to 0 ##
+    nan_fraction = {name: count / max(zones, 1) for name, count in nan_counts.items()}
+    columns = [name for name, fraction in nan_fraction.items() if fraction > tolerances['nan_fraction']]
+    checks['nan'] = {'passed': len(columns) == 0, 'columns': columns,
+                     'worst': max(nan_fraction.values(), default=0.0)}
+    return {'passed': all(check['passed'] for check in checks.values()), 'zones': zones,
+            'tolerances': tolerances, 'checks': checks, 'nan_counts': nan_counts}
+
+def failed_checks(report):
+    """
+    Text listing the failed checks of a validation report.
+    """
+    texts = []
+    for name, check in report['checks'].items():
+        if check['passed']:
+            continue
+        if name == 'nan':
+            texts.append('nan (columns {}, largest fraction {:.3g})'.format(', '.join(check['columns']), check['worst']))
+        else:
+            texts.append('{} ({} zones, first {}, worst {:.3g})'.format(
+                name, check['failed_zones'], check['first_failed_zone'], check['worst']))
+    return ', '.join(texts)
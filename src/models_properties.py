@@ -0,0 +1,97 @@
+import json
+import os
+
+## Indices already loaded in the process, with the modification time of their file ##
+_loaded_indices = {}
+
+
+class PropertiesIndex:
+    """
+    Properties of the original models (the properties.json file), indexed by (group, name).
+    The index is built once and can be shared by all the models of a batch. If the same model
+    appears more than once, the first entry is used.
+    """
+    def __init__(self, entries, source='properties.json'):
+        """
+        entries: list of dict, properties of the models, each with at least name and group.
+        source: str, name of the file the entries come from, used in the error messages.
+        """
+        self.source = source
+        self.__entries = {}
+        self.__groups = {}
+        for entry in entries:
+            key = (entry['group'], entry['name'])
+            if key not in self.__entries:
+                self.__entries[key] = entry
+                self.__groups.setdefault(entry['name'], []).append(entry['group'])
+
+    @classmethod
+    def from_json(cls, json_path):
+        """
+        Reads the index from a properties json file.
+        """
+        assert os.path.exists(json_path), 'The json file does not exist.'
+        with open(json_path) as f:
+            return cls(json.load(f), json_path)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def get(self, group, name):
+        """
+        Properties of a model.
+        return: dict, copy of the properties of the model.
+        """
+        if (group, name) not in self.__entries:
+            raise ValueError('The model {} of the group {} is not present in {}.{}'.format(
+                name, group, self.source, self.__near_misses(group, name)))
+        return dict(self.__entries[(group, name)])
+
+    def groups_of(self, name):
+        """
+        Groups containing a model with the given name.
+        return: list of str, groups in the order of the file.
+        """
+        return list(self.__groups.get(name, []))
+
+    def __near_misses(self, group, name):
+        """
+        Text listing the models whose group and name are close to the ones searched.
+        difflib is imported here since it is needed only when a model is not found.
+        """
+        import difflib
+        keys = {'{}/{}'.format(*key): key for key in self.__entries}
+        candidates = ['{}/{}'.format(other_group, name) for other_group in self.groups_of(name)]
+        candidates += [key for key in difflib.get_close_matches('{}/{}'.format(group, name), keys, n=5, cutoff=0.6)
+                       if key not in candidates]
+        if len(candidates) == 0:
+            return ''
+        return ' Close matches (group/name): ' + ', '.join(candidates) + '.'
+
+def load_properties_index(json_path):
+    """
+    Loads the properties json file into a PropertiesIndex, once per process unless the file changes.
+    """
+    key = os.path.abspath(json_path)
+    assert os.path.exists(key), 'The json file does not exist.'
+    mtime = os.path.getmtime(key)
+    if key not in _loaded_indices or _loaded_indices[key][0] != mtime:
+        _loaded_indices[key] = (mtime, PropertiesIndex.from_json(json_path))
+    return _loaded_indices[key][1]
+
+def load_paper_names(json_path):
+    """
+    Reads a mapping file from model files or folders to the group (paper) of the models, a json
+    object whose keys are paths of model files, names of model files or names of folders, e.g.
+        {"/data/models/s15.presn": "WHW2002", "kepler_runs": "SW2014"}
+    return: dict, mapping.
+    """
+    assert os.path.exists(json_path), 'The paper names file does not exist.'
+    with open(json_path) as f:
+        paper_names = json.load(f)
+    if not isinstance(paper_names, dict):
+        raise ValueError('The paper names file must contain a json object.')
+    return paper_names
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from src.model_catalogue import write_json_atomic
+from src.model_source import split_member
+
+## Name of the manifest written in the folder of every converted model ##
+MANIFEST_FILE = 'manifest.json'
+
+
+def properties_hash(properties):
+    """
+    Hash of the properties of a model, independent of the order of the keys.
+    return: str, hexadecimal digest.
+    """
+    return hashlib.sha256(json.dumps(properties, sort_keys=True).encode()).hexdigest()
+
+def input_stat(file_path):
+    """
+    Size and modification time of the original model (of the archive containing it, if any),
+    so it is hashed again only if they change.
+    """
+    stat = os.stat(split_member(file_path)[0])
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def output_sizes(result_path, names):
+    """
+    Sizes of the output files, to notice outputs removed or left half written.
+    return: dict, size in bytes of every file.
+    """
+    return {name: os.path.getsize(os.path.join(result_path, name)) for name in names}
+
+def build_manifest(converter_version, file_path, properties, parameters):
+    """
+    Manifest describing how the outputs of a model are produced, with the values as they are read back
+    from the json file (e.g. lists instead of tuples), so it can be compared with a stored one.
+    param properties: dict, properties of the model.
+    param parameters: dict, options of the conversion (grid, interpolation, validation, outputs).
+    return: dict, with the keys converter_version, input_stat, properties_hash and parameters.
+    """
+    return json.loads(json.dumps({'converter_version': converter_version,
+                                  'input_stat': input_stat(file_path),
+                                  'properties_hash': properties_hash(properties),
+                                  'parameters': parameters}))
+
+def read_manifest(result_path):
+    """
+    Reads the manifest of a converted model.
+    return: dict, manifest, None if the folder has no readable manifest.
+    """
+    try:
+        with open(os.path.join(result_path, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(result_path, manifest):
+    """
+    Writes the manifest of a converted model, once all its outputs are written.
+    """
+    write_json_atomic(os.path.join(result_path, MANIFEST_FILE), manifest)
+
+def remove_manifest(result_path):
+    """
+    Removes the manifest before the outputs are written again, so a conversion stopped half way
+    never leaves a folder looking up to date.
+    """
+    try:
+        os.remove(os.path.join(result_path, MANIFEST_FILE))
+    except FileNotFoundError:
+        pass
+
+def outdated_reason(result_path, stored, expected, input_hash):
+    """
+    Checks whether the outputs of a model are up to date, i.e. the stored manifest matches the
+    expected one and all the output files are there with their sizes. The original model is hashed
+    only if its size or modification time differ from the stored ones.
+    param stored: dict, manifest read from the folder of the model (None if missing).
+    param expected: dict, manifest of the conversion about to run, see build_manifest.
+    param input_hash: function, returning the hash of the original model.
+    return: str, why the model must be converted again, None if its outputs are up to date.
+    """
+    if stored is None:
+        return 'no manifest'
+    for key in ('converter_version', 'properties_hash'):
+        if stored.get(key) != expected[key]:
+            return key + ' changed'
+    changed = sorted(key for key in set(stored.get('parameters', {})) | set(expected['parameters'])
+                     if stored.get('parameters', {}).get(key) != expected['parameters'].get(key))
+    if len(changed) > 0:
+        return 'parameters changed: ' + ', '.join(changed)
+    if stored.get('input_stat') != expected['input_stat'] and stored.get('input_hash') != input_hash():
+        return 'input file changed'
+    for name, size in stored.get('files', {}).items():
+        file_path = os.path.join(result_path, name)
+        if not os.path.isfile(file_path) or os.path.getsize(file_path) != size:
+            return 'output file ' + name + ' missing or changed'
+    return None
@@ -0,0 +1,335 @@
+import contextlib
+import logging
+import mmap
+import numpy as np
+import os
+import re
+import warnings
+from src.all_species_src.species_conv import find_header_line
+
+logger = logging.getLogger(__name__)
+
+## Fortran double precision exponents (1.0D+05) are turned into C ones (1.0E+05) ##
+_FORTRAN_EXPONENT = bytes.maketrans(b'Dd', b'Ee')
+## Characters that can appear in the numeric block, anything else is part of a word ##
+_NUMERIC_CHARS = b'0123456789.+-eEnaifNAIF \t\r\n'
+_WORD_CHAR = re.compile(rb'[^0-9.+\-eEnaifNAIF \t\r\n]')
+_WHITESPACE = re.compile(rb'\s')
+## Maximum number of different words replaced before using the slow parser ##
+_MAX_WORDS = 8
+## Bytes read at the beginning and at the end of the file to find header and footer, enlarged if needed ##
+INSPECTION_SIZE = 64 * 1024
+## Messages logged when a format is detected ##
+_FORMAT_MESSAGES = {'KEPLER_NEW': 'New KEPLER format deteted.',
+                    'KEPLER_std_full': 'Standard KEPLER format with full atomic species detected.',
+                    'KEPLER_std': 'Standard KEPLER format detected.',
+                    'MESA': 'MESA format detected.'}
+
+
+def find_kepler_version(lines):
+    """
+    To distinguish between the three KEPLER formats, we use the following file characteristics:
+    1. New KEPLER files have more than 2 commented lines before the data starts.
+    2. Old KEPLER files with full nuclear species have 'ni71' in the line before the data starts.
+    return: str, KEPLER format,
+            int, index of the line where the data starts.
+    """
+    line_index = None
+    for lindex in range(1,len(lines)):
+        try:
+            float(lines[lindex].split()[1])
+            line_index = lindex
+            break
+        except:
+            pass
+    if line_index is None:
+        raise ValueError('No data found in the KEPLER file.')
+    if line_index > 2:
+        format = 'KEPLER_NEW'
+    else:
+        if 'ni71' in lines[line_index - 1]:
+            format = 'KEPLER_std_full'
+        else:
+            format = 'KEPLER_std'
+    return format, line_index
+
+def check_mesa_file(lines):
+    """
+    To check if the file is a MESA file, we check if the line with the initial mass is present.
+    return: int, index of the line where the data starts.
+    """
+    correct_MESA = False
+    for line in lines:
+        if 'initial_mass' in line:
+            correct_MESA = True
+            break
+    if not correct_MESA:
+        raise ValueError('The file is not a MESA file.')
+    for lindex in range(1,len(lines)):
+       if 'logT' in lines[lindex]:
+            return lindex + 1
+    raise ValueError('No column names found in the MESA file.')
+
+def find_file_format(lines, format=None):
+    """
+    Find the format of the file. It could be made either with KEPLER or MESA.
+    If the format is not specified, it will be automatically detected.
+    param format: str, optional (default = None) Can be either 'KEPLER' or 'MESA'.
+    return: str, either 'KEPLER_NEW', 'KEPLER_std', 'KEPLER_std_full' or 'MESA',
+            int, index of the line where the data starts.
+    """
+    if format == 'KEPLER':
+        return find_kepler_version(lines)
+    elif format == 'MESA':
+        return 'MESA', check_mesa_file(lines)
+    if 'VERSION' in lines[0]:
+        return find_kepler_version(lines)
+    return 'MESA', check_mesa_file(lines)
+
+def find_footer(lines):
+    """
+    Find the index of the line where the data ends.
+    return: int, number on lines to skip from the end of the file.
+    """
+    footer_lines = _find_footer(lines)
+    return 0 if footer_lines is None else footer_lines
+
+def _find_footer(lines):
+    """
+    As find_footer, but returns None if no line starting with a number is found.
+    """
+    for findex in range(len(lines)):
+        try:
+            float(lines[-1 - findex].split()[0].replace(':',''))
+            return findex
+        except:
+            continue
+    return None
+
+def _decode_lines(region, first_partial, last_partial):
+    """
+    Splits a region of the file in lines as readlines does.
+    first_partial, last_partial: bool, whether the region starts or ends in the middle of a line,
+                                 in which case the partial line is dropped.
+    return: list of str, lines.
+    """
+    lines = region.split(b'\n')
+    if last_partial or lines[-1] == b'':
+        lines = lines[:-1]
+    if first_partial:
+        lines = lines[1:]
+    return [line.rstrip(b'\r').decode('utf-8', errors='replace') + '\n' for line in lines]
+
+@contextlib.contextmanager
+def _file_buffer(file_path, content=None):
+    """
+    Content of the file through a memory map, or content itself if given (e.g. a model read
+    from an archive, see src.model_source).
+    """
+    if content is not None:
+        if len(content) == 0:
+            raise ValueError('The file ' + file_path + ' is empty.')
+        yield content
+        return
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError('The file ' + file_path + ' is empty.')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+def inspect_file(file_path, format=None, content=None):
+    """
+    Inspects the file reading only its beginning and its end through a memory map, so the cost
+    does not depend on the size of the file. The regions are enlarged until the header and the
+    footer are found.
+    param format: str, optional (default = None) Can be either 'KEPLER' or 'MESA'.
+    param content: bytes, content of the file if already read, file_path is then only used in the messages.
+    return: dict with the keys
+        - format: str, either 'KEPLER_NEW', 'KEPLER_std', 'KEPLER_std_full' or 'MESA';
+        - header: list of str, lines before the data;
+        - header_lines: int, number of lines before the data;
+        - footer_lines: int, number of lines after the data;
+        - has_bfield: bool, True if the header names magnetic field columns;
+        - species: list of str, names of the species columns (KEPLER: from the neutrons onward,
+          MESA: all the columns but the first one);
+        - data_offsets: tuple of int, byte offsets of the beginning and of the end of the data.
+    """
+    if format is None:
+        logger.info('Auto-detecting file format...')
+    with _file_buffer(file_path, content) as buffer:
+        ## Header ##
+        size = INSPECTION_SIZE
+        while True:
+            complete = size >= len(buffer)
+            lines = _decode_lines(buffer[:size], False, not complete)
+            try:
+                file_format, header_lines = find_file_format(lines, format)
+                if header_lines < len(lines):
+                    break
+            except ValueError:
+                if complete:
+                    raise
+            if complete:
+                raise ValueError('No data found in ' + file_path + '.')
+            size *= 4
+        header = lines[:header_lines]
+        ## Footer ##
+        size = INSPECTION_SIZE
+        while True:
+            complete = size >= len(buffer)
+            footer_lines = _find_footer(_decode_lines(buffer[-size:], not complete, False))
+            if footer_lines is not None or complete:
+                footer_lines = 0 if footer_lines is None else footer_lines
+                break
+            size *= 4
+        data_offsets = find_data_offsets(buffer, header_lines, footer_lines)
+    logger.info(_FORMAT_MESSAGES[file_format])
+    has_bfield = any('b_r' in line.casefold() or 'dynamo_log_b_r' in line.casefold() for line in header)
+    if file_format == 'MESA':
+        species = header[-1].split()[1:]
+    else:
+        species = find_header_line(header)
+    return {'format': file_format, 'header': header, 'header_lines': header_lines,
+            'footer_lines': footer_lines, 'has_bfield': has_bfield, 'species': species,
+            'data_offsets': data_offsets}
+
+def find_data_offsets(buffer, header_lines, footer_lines):
+    """
+    Finds the byte offsets of the numeric block of the file.
+    buffer: bytes or mmap, content of the file.
+    header_lines: int, number of lines before the data.
+    footer_lines: int, number of lines after the data.
+    return: int, offset of the first byte of the data,
+            int, offset of the end of the data.
+    """
+    start = 0
+    for _ in range(header_lines):
+        start = buffer.find(b'\n', start) + 1
+        if start == 0:
+            raise ValueError('The file has less than {} lines.'.format(header_lines))
+    end = len(buffer)
+    if buffer[-1:] == b'\n':
+        end -= 1
+    for _ in range(footer_lines):
+        end = max(buffer.rfind(b'\n', start, end), start)
+    return start, end
+
+def _replace_words(block):
+    """
+    Replaces the words in the block (e.g. the stability column of KEPLER files) with nan,
+    as np.genfromtxt does. Every word is replaced at once in the whole block.
+    return: bytes, block without words, or None if the words could not be replaced.
+    """
+    for _ in range(_MAX_WORDS):
+        if len(block.translate(None, _NUMERIC_CHARS)) == 0:
+            return block
+        position = _WORD_CHAR.search(block).start()
+        start = max(block.rfind(b' ', 0, position), block.rfind(b'\t', 0, position),
+                    block.rfind(b'\n', 0, position)) + 1
+        end = _WHITESPACE.search(block, position)
+        word = block[start:len(block) if end is None else end.start()]
+        try:
+            float(word)
+            return None
+        except ValueError:
+            block = block.replace(word, b'nan')
+    return None
+
+def _line_columns(block):
+    """
+    Counts the tokens of every line of the block, looking at all the bytes at once: a token starts
+    at every byte that is not whitespace (a byte up to the space) and follows a whitespace.
+    return: numpy array, number of tokens of every non empty line.
+    """
+    chars = np.frombuffer(block, dtype=np.uint8)
+    blank = chars <= ord(' ')
+    starts = np.flatnonzero(blank[:-1] > blank[1:]) + 1
+    if len(chars) > 0 and not blank[0]:
+        starts = np.concatenate(([0], starts))
+    ## tokens before the end of every line ##
+    tokens = np.searchsorted(starts, np.append(np.flatnonzero(chars == ord('\n')), len(chars)))
+    columns = np.diff(tokens, prepend=0)
+    return columns[columns > 0]
+
+def _parse_mixed_block(block, ncols):
+    """
+    Parses a block containing non numeric tokens, which are set to nan
+    as np.genfromtxt does. Only the columns containing them are parsed token by token.
+    Empty lines are skipped, while a line with a different number of columns raises a ValueError.
+    """
+    rows = [row for row in (line.split() for line in block.splitlines()) if len(row) > 0]
+    for index, row in enumerate(rows):
+        if len(row) != ncols:
+            raise ValueError('The data row {} has {} columns instead of {}.'.format(index + 1, len(row), ncols))
+    tokens = np.array(rows).reshape(-1, ncols)
+    data = np.empty(tokens.shape, dtype=np.float64)
+    for i in range(ncols):
+        try:
+            data[:, i] = tokens[:, i].astype(np.float64)
+        except ValueError:
+            for j, token in enumerate(tokens[:, i]):
+                try:
+                    data[j, i] = float(token)
+                except ValueError:
+                    data[j, i] = np.nan
+    return data
+
+def _fromstring(block, size):
+    """
+    Parses the block with the C parser of numpy.
+    return: numpy array, data, or None if the block contains something else than size numbers.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            data = np.fromstring(block, dtype=np.float64, sep=' ')
+    except ValueError:
+        return None
+    if data.size != size:
+        return None
+    return data
+
+def parse_numeric_block(block):
+    """
+    Parses a block of whitespace separated numbers in a 2D float64 array.
+    The number of columns is given by the first line of the block, and every other non empty
+    line must have the same number of columns.
+    block: bytes, numeric block of the file.
+    return: numpy array, data.
+    """
+    if b'D' in block or b'd' in block:
+        block = block.translate(_FORTRAN_EXPONENT)
+    columns = _line_columns(block)
+    if len(columns) == 0:
+        return np.empty((0, 0))
+    ncols = int(columns[0])
+    if np.any(columns != ncols):
+        ## Lines with a different number of columns, the slower parser reports them ##
+        return _parse_mixed_block(block, ncols)
+    size = ncols * len(columns)
+    data = _fromstring(block, size)
+    if data is None:
+        ## Words in the data, replace them and retry ##
+        no_words_block = _replace_words(block)
+        if no_words_block is not None:
+            data = _fromstring(no_words_block, size)
+    if data is None:
+        ## Unexpected tokens, fall back to the slower parser ##
+        return _parse_mixed_block(block, ncols)
+    return data.reshape(-1, ncols)
+
+def load_numeric_block(file_path, header_lines, footer_lines, data_offsets=None, content=None):
+    """
+    Reads the numeric block of the file through a memory map and parses it.
+    file_path: str, path to the file.
+    header_lines: int, number of lines before the data.
+    footer_lines: int, number of lines after the data.
+    data_offsets: tuple of int, byte offsets of the data if already known (see inspect_file).
+    content: bytes, content of the file if already read (see inspect_file).
+    return: numpy array, data.
+    """
+    with _file_buffer(file_path, content) as buffer:
+        if data_offsets is None:
+            data_offsets = find_data_offsets(buffer, header_lines, footer_lines)
+        block = buffer[data_offsets[0]:data_offsets[1]]
+    return parse_numeric_block(block)
@@ -0,0 +1,162 @@
+import contextlib
+import json
+import logging
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    ## Windows ##
+    resource = None
+
+logger = logging.getLogger(__name__)
+## Levels accepted by the command line scripts ##
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+
+
+def _peak_rss():
+    """
+    Peak resident set size of the process in MB, None if it cannot be measured.
+    On Linux it is the high water mark since the process started or the last _reset_peak_rss.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ## kB on Linux, bytes on macOS ##
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def _reset_peak_rss():
+    """
+    Resets the high water mark of the resident set size, where supported (Linux). It changes the
+    state of the whole process, see StageMonitor.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+class StageMonitor:
+    """
+    Measures wall time, CPU time, peak resident memory and the bytes read and written by
+    every stage of a conversion. When a stage runs another one, the times of the inner stage
+    are not counted in the outer one. The bytes are counted by the stages themselves through
+    count, since the files are read through memory maps.
+    The peak resident memory of a stage is the high water mark of the process when the stage ends
+    and its increase is how much the stage raised it, so a stage using less memory than a previous
+    one has an increase of 0. With reset_peak the high water mark is reset before every stage, so
+    the peak is the one of the stage alone, writing /proc/self/clear_refs, which also clears the
+    referenced bits of the pages of the whole process (e.g. for a memory profiler running on it).
+    """
+    def __init__(self, reset_peak=False):
+        self.reset_peak = reset_peak
+        self.stages = {}
+        self.__running = []
+        self.__measured = set()
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """
+        Measures the stage run in the with block, replacing the previous measure of the same stage.
+        param stage: str, name of the stage.
+        """
+        record = {'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_MB': None, 'peak_rss_increase_MB': None,
+                  'bytes_read': 0, 'bytes_written': 0}
+        if self.reset_peak:
+            if self.__running:
+                ## the peak of the outer stage so far, before it is reset ##
+                self.__running[-1]['peak_rss_MB'] = max(_peak_rss() or 0, self.__running[-1]['peak_rss_MB'] or 0)
+            _reset_peak_rss()
+        start_peak = _peak_rss()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        self.__running.append(record)
+        try:
+            yield record
+        finally:
+            self.__running.pop()
+            wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            record['wall_s'] += wall
+            record['cpu_s'] += cpu
+            peak = _peak_rss()
+            if peak is not None:
+                record['peak_rss_MB'] = max(peak, record['peak_rss_MB'] or 0)
+                record['peak_rss_increase_MB'] = record['peak_rss_MB'] - start_peak
+            if self.__running:
+                parent = self.__running[-1]
+                parent['wall_s'] -= wall
+                parent['cpu_s'] -= cpu
+                if peak is not None:
+                    parent['peak_rss_MB'] = max(peak, parent['peak_rss_MB'] or 0)
+            self.stages[stage] = record
+            self.__measured.add(stage)
+            logger.debug('Stage %s: %.3f s wall, %.3f s CPU, peak RSS %s MB (+%s MB), %d bytes read, %d bytes written',
+                         stage, record['wall_s'], record['cpu_s'],
+                         'n/a' if record['peak_rss_MB'] is None else '{:.1f}'.format(record['peak_rss_MB']),
+                         'n/a' if record['peak_rss_MB'] is None else '{:.1f}'.format(record['peak_rss_increase_MB']),
+                         record['bytes_read'], record['bytes_written'])
+
+    def count(self, read=0, written=0):
+        """
+        Adds the bytes read and written to the stage currently running.
+        """
+        if self.__running:
+            self.__running[-1]['bytes_read'] += read
+            self.__running[-1]['bytes_written'] += written
+
+    def report(self, stages):
+        """
+        Measures of the stages and their totals. The stages that were not run again since the
+        previous report (e.g. parsing, when a model is saved on several grids) are listed as reused,
+        their measures are the ones of their last run. The total peak and increase are the largest ones.
+        param stages: list of str, stages in the order in which they are reported.
+        return: dict, with the keys stages, reused and total.
+        """
+        records = {stage: dict(self.stages[stage]) for stage in stages if stage in self.stages}
+        peaks = [record['peak_rss_MB'] for record in records.values() if record['peak_rss_MB'] is not None]
+        increases = [record['peak_rss_increase_MB'] for record in records.values()
+                     if record['peak_rss_increase_MB'] is not None]
+        total = {'wall_s': sum(record['wall_s'] for record in records.values()),
+                 'cpu_s': sum(record['cpu_s'] for record in records.values()),
+                 'peak_rss_MB': max(peaks) if peaks else None,
+                 'peak_rss_increase_MB': max(increases) if increases else None,
+                 'bytes_read': sum(record['bytes_read'] for record in records.values()),
+                 'bytes_written': sum(record['bytes_written'] for record in records.values())}
+        reused = [stage for stage in records if stage not in self.__measured]
+        self.__measured = set()
+        return {'stages': records, 'reused': reused, 'total': total}
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats every log record as a json line, with the run report attached to it if any.
+    """
+    def format(self, record):
+        line = {'time': self.formatTime(record), 'level': record.levelname,
+                'logger': record.name, 'message': record.getMessage()}
+        if hasattr(record, 'run_report'):
+            line['run_report'] = record.run_report
+        return json.dumps(line)
+
+def configure_logging(level='info', log_format='text'):
+    """
+    Configures the logging of the command line scripts.
+    param level: str, one of LOG_LEVELS.
+    param log_format: str, 'text' (plain messages) or 'json' (one json object per line).
+    """
+    assert level in LOG_LEVELS, 'level must be one of ' + ', '.join(LOG_LEVELS)
+    handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    root = logging.getLogger()
+    for old_handler in list(root.handlers):
+        root.removeHandler(old_handler)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
@@ -0,0 +1,154 @@
+import io
+import os
+import numpy as np
+
+## Rows formatted at once, and size of the file buffer ##
+CHUNK_ROWS = 4096
+BUFFER_SIZE = 2 ** 22
+## Extension of the compressed tables for every compression, gzip and xz are in the standard ##
+## library, zstd needs Python >= 3.14 (compression.zstd) or the zstandard package ##
+COMPRESSIONS = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+## Default, smallest and largest level of every compression ##
+COMPRESSION_LEVELS = {'gzip': (6, 0, 9), 'xz': (6, 0, 9), 'zstd': (3, 1, 22)}
+## First bytes of the compressed files ##
+_MAGIC_NUMBERS = {'gzip': b'\x1f\x8b', 'xz': b'\xfd7zXZ\x00', 'zstd': b'\x28\xb5\x2f\xfd'}
+
+
+def format_rows(array, row_format):
+    """
+    Formats all the rows of a 2D array with a single % operation.
+    array: numpy array, rows to format.
+    row_format: str, format of one row, newline included.
+    return: str, formatted rows.
+    """
+    return (row_format * array.shape[0]) % tuple(array.ravel().tolist())
+
+def table_file_name(name, compression=None):
+    """
+    Name of the file of a table, e.g. star.dat.gz for name='star.dat' and compression='gzip'.
+    """
+    if compression is None:
+        return name
+    assert compression in COMPRESSIONS, 'compression must be one of ' + ', '.join(COMPRESSIONS.keys())
+    return name + COMPRESSIONS[compression]
+
+def _zstd_module():
+    """
+    Module writing zstd files, compression.zstd or, before Python 3.14, the zstandard package.
+    """
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstd compression needs Python >= 3.14 or the zstandard package, use gzip or xz instead.')
+    return zstandard
+
+def check_compression(compression):
+    """
+    Checks that the tables can be written with the compression, before anything is written:
+    raises ImportError if it is zstd and no zstd module is installed.
+    """
+    if compression == 'zstd':
+        _zstd_module()
+
+def _open_zstd(file_path, mode, level):
+    """
+    Opens a zstd file in text mode with compression.zstd or, before Python 3.14, with the zstandard package.
+    """
+    zstd = _zstd_module()
+    if zstd.__name__ == 'zstandard':
+        if 'w' in mode:
+            return zstd.open(file_path, mode, cctx=zstd.ZstdCompressor(level=level))
+        return zstd.open(file_path, mode)
+    return zstd.open(file_path, mode, level=level) if 'w' in mode else zstd.open(file_path, mode)
+
+def detect_compression(file_path):
+    """
+    Compression of a file, found from its first bytes.
+    return: str, one of COMPRESSIONS, None if the file is not compressed.
+    """
+    with open(file_path, 'rb') as f:
+        start = f.read(8)
+    for compression, magic in _MAGIC_NUMBERS.items():
+        if start.startswith(magic):
+            return compression
+    return None
+
+def open_table(file_path, mode='r', compression=None, level=None):
+    """
+    Opens the text file of a table, compressed or not. The compressed files are written as a stream,
+    so a table is never held in memory as a whole, and the gzip files have no time stamp, so
+    the same table always gives the same file.
+    param mode: str, 'r' to read, the compression is found from the first bytes of the file
+                and the compression given is ignored, or 'w' to write.
+    param compression: str, None or one of COMPRESSIONS.
+    param level: int, compression level, see COMPRESSION_LEVELS (default: None, the default one).
+    return: text file object.
+    """
+    assert mode in ('r', 'w'), "mode must be 'r' or 'w'"
+    if mode == 'r':
+        compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, mode, buffering=BUFFER_SIZE)
+    assert compression in COMPRESSIONS, 'compression must be one of ' + ', '.join(COMPRESSIONS.keys())
+    default, smallest, largest = COMPRESSION_LEVELS[compression]
+    level = default if level is None else level
+    assert smallest <= level <= largest, \
+        '{} compression level must be between {} and {}'.format(compression, smallest, largest)
+    if compression == 'gzip':
+        import gzip
+        if mode == 'r':
+            return gzip.open(file_path, 'rt')
+        return io.TextIOWrapper(gzip.GzipFile(file_path, 'wb', compresslevel=level, mtime=0))
+    if compression == 'xz':
+        import lzma
+        return lzma.open(file_path, 'rt') if mode == 'r' else lzma.open(file_path, 'wt', preset=level)
+    return _open_zstd(file_path, mode + 't', level)
+
+def find_table(file_path):
+    """
+    Path of a table, file_path if it exists, otherwise file_path followed by the extension
+    of a compression.
+    """
+    for path in [file_path] + [file_path + extension for extension in COMPRESSIONS.values()]:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError('No table ' + file_path + ' found, compressed or not.')
+
+def read_table(file_path):
+    """
+    Reads a table written by write_table, compressed or not (see find_table and open_table).
+    return: numpy array, (rows, columns) table.
+    """
+    with open_table(find_table(file_path)) as f:
+        return np.loadtxt(f, ndmin=2)
+
+def write_table(file, array, fmt, chunk_rows=CHUNK_ROWS, compression=None, level=None):
+    """
+    Writes a 2D array in a text file, giving exactly the same output as np.savetxt(file, array, fmt=fmt).
+    The rows are formatted in chunks of chunk_rows and written in large blocks, compressed while
+    they are formatted if a compression is given.
+    file: str or file object, path of the file or text file open for writing.
+    array: numpy array, data to write.
+    fmt: str, format of one row (e.g. '\t%d\t%.20E').
+    compression, level: compression of the file, see open_table (default: None, not compressed).
+    """
+    array = np.asarray(array)
+    if array.ndim == 1:
+        array = array[:, None]
+    row_format = fmt + '\n'
+    if isinstance(file, str):
+        with open_table(file, 'w', compression, level) as f:
+            write_table(f, array, fmt, chunk_rows)
+        return
+    chunk_format = row_format * chunk_rows
+    for start in range(0, array.shape[0], chunk_rows):
+        chunk = array[start:start + chunk_rows]
+        if chunk.shape[0] == chunk_rows:
+            file.write(chunk_format % tuple(chunk.ravel().tolist()))
+        else:
+            file.write(format_rows(chunk, row_format))
@@ -0,0 +1,66 @@
+"""
+Conservation tests of src.interpolation.ConservativeStencil: on target cells covering the source
+shells, finer or coarser than them, the volume integral of every column (and, with a density, the
+mass integral) must be the one of the source profiles, and a constant profile must stay constant, e.g.
+python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.interpolation import ConservativeStencil
+
+
+@pytest.fixture
+def source():
+    """
+    Outer radii of irregular source shells, a density falling outwards and random columns.
+    """
+    rng = np.random.default_rng(0)
+    radius = np.cumsum(rng.uniform(0.5, 2.0, 300)) * 1e8
+    density = 1e9 * (radius / radius[0]) ** -2.5
+    values = rng.uniform(0.0, 1.0, (300, 4))
+    return radius, density, values
+
+def target_cells(radius, cells):
+    """
+    Cells covering the source shells from the center to the surface, log spaced but the first one.
+    return: numpy array, centers, tuple of numpy arrays, left and right edges.
+    """
+    edges = np.concatenate(([0.0], np.geomspace(radius[0] / 10, radius[-1], cells)))
+    return 0.5 * (edges[:-1] + edges[1:]), (edges[:-1], edges[1:])
+
+def shell_volumes(left, right):
+    return (right ** 3 - left ** 3)[:, None]
+
+@pytest.mark.parametrize('cells', [50, 300, 2000])
+def test_volume_integral_is_conserved(source, cells):
+    radius, _, values = source
+    centers, edges = target_cells(radius, cells)
+    out = ConservativeStencil(radius, centers, edges)(values)
+    source_integral = (values * shell_volumes(np.concatenate(([0.0], radius[:-1])), radius)).sum(axis=0)
+    np.testing.assert_allclose((out * shell_volumes(*edges)).sum(axis=0), source_integral, rtol=1e-10)
+
+@pytest.mark.parametrize('cells', [50, 300, 2000])
+def test_mass_integral_is_conserved(source, cells):
+    radius, density, values = source
+    centers, edges = target_cells(radius, cells)
+    out = ConservativeStencil(radius, centers, edges, density=density)(values)
+    target_mass = ConservativeStencil(radius, centers, edges)(density[:, None]) * shell_volumes(*edges)
+    source_mass = density[:, None] * shell_volumes(np.concatenate(([0.0], radius[:-1])), radius)
+    np.testing.assert_allclose((out * target_mass).sum(axis=0), (values * source_mass).sum(axis=0), rtol=1e-10)
+
+@pytest.mark.parametrize('density', [False, True])
+def test_constant_profile_stays_constant(source, density):
+    radius, source_density, _ = source
+    centers, edges = target_cells(radius, 500)
+    stencil = ConservativeStencil(radius, centers, edges, density=source_density if density else None)
+    np.testing.assert_allclose(stencil(np.full((len(radius), 2), 0.5)), 0.5, rtol=1e-10)
+
+def test_cells_outside_the_source_hold_the_last_value(source):
+    radius, _, values = source
+    edges = (np.array([0.0, radius[-1], 2 * radius[-1]]), np.array([radius[-1], 2 * radius[-1], 3 * radius[-1]]))
+    out = ConservativeStencil(radius, 0.5 * (edges[0] + edges[1]), edges)(values)
+    np.testing.assert_array_equal(out[1:], values[[-1, -1]])
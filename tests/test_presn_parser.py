@@ -0,0 +1,62 @@
+"""
+Tests of src.presn_parser.parse_numeric_block against np.genfromtxt, which the parser replaced:
+the numbers, the words (e.g. the stability column of KEPLER files, set to nan) and the empty lines
+must give the same array. The Fortran exponents (1.0D+03) are parsed as numbers, where
+np.genfromtxt gives nan, e.g.
+python -m pytest tests
+"""
+import io
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.presn_parser import parse_numeric_block
+
+
+def genfromtxt(block):
+    return np.genfromtxt(io.BytesIO(block), dtype=np.float64, ndmin=2)
+
+@pytest.mark.parametrize('block', [
+    b'1 2.5 -3.0E+02\n2 1.0e-300 4\n3 -0.0 5.5\n',
+    b'   1   2.5   3\n   2   3.5   4',
+    b'1\t2.5\t3\n2\t3.5\t4\n',
+    b'1 2.5 3\r\n2 3.5 4\r\n',
+    b'1 2.5 3\n\n2 3.5 4\n\n',
+    b'1 nan inf\n2 -inf NaN\n',
+    b'1 1.7976931348623157E+308 4.9406564584124654E-324\n',
+])
+def test_numbers_match_genfromtxt(block):
+    np.testing.assert_array_equal(parse_numeric_block(block), genfromtxt(block))
+
+@pytest.mark.parametrize('block', [
+    b'1 2.5 conv 3\n2 3.5 semi 4\n3 4.5 neut 5\n4 5.5 stab 6\n',
+    b'1 2.5 conv 3\n2 3.5 conv 4\n',
+    b'1 2.5 conv 3 semi\n2 3.5 stab 4 neut\n',
+    b'1 2.5 conv 3\n2 3.5 4.0 4\n',
+    b'1 conv 3\n2 conv 3\n' * 9 + b'1 r-t 3\n2 x1 3\n',
+])
+def test_words_are_nan_as_in_genfromtxt(block):
+    np.testing.assert_array_equal(parse_numeric_block(block), genfromtxt(block))
+
+@pytest.mark.parametrize('block', [
+    b'1 2.5D+03 3\n2 1.0d-02 4\n',
+    b'1 2.5D+03 conv\n2 1.0E-02 semi\n',
+])
+def test_fortran_exponents_are_numbers(block):
+    data = parse_numeric_block(block)
+    np.testing.assert_array_equal(data, genfromtxt(block.replace(b'D', b'E').replace(b'd', b'e')))
+    assert data[0, 1] == 2.5e3
+    ## np.genfromtxt does not read them ##
+    assert np.isnan(genfromtxt(block)[0, 1])
+
+def test_ragged_rows_raise():
+    with pytest.raises(ValueError, match='row 2 has 2 columns instead of 3'):
+        parse_numeric_block(b'1 2 3\n4 5\n6 7 8\n')
+
+def test_empty_block():
+    assert parse_numeric_block(b'\n\n').shape == (0, 0)
+
+def test_single_column():
+    np.testing.assert_array_equal(parse_numeric_block(b'1\n2\n3\n'), [[1.0], [2.0], [3.0]])
@@ -0,0 +1,55 @@
+"""
+Golden file tests of src.table_writer: a fixed table (tests/data/table_writer/table.npy, with zeros
+of both signs, subnormal, largest and smallest values) must be written byte for byte as the stored
+star.dat, written by np.savetxt, and star.dat.gz, the same content compressed with gzip (level 6,
+no time stamp). The gzip file depends on the zlib of the interpreter, its content is also checked
+against star.dat, e.g.
+python -m pytest tests
+"""
+import filecmp
+import gzip
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.table_writer import read_table, write_table
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'table_writer')
+## Format of the rows of star.dat with 5 quantities ##
+STAR_FORMAT = '\t%d' + '\t%.20E' * 5
+
+
+@pytest.fixture
+def table():
+    return np.load(os.path.join(DATA_PATH, 'table.npy'))
+
+@pytest.mark.parametrize('chunk_rows', [4096, 5, 1])
+def test_plain_table_matches_golden_file(tmp_path, table, chunk_rows):
+    file_path = os.path.join(tmp_path, 'star.dat')
+    write_table(file_path, table, STAR_FORMAT, chunk_rows=chunk_rows)
+    assert filecmp.cmp(file_path, os.path.join(DATA_PATH, 'star.dat'), shallow=False)
+
+def test_plain_table_matches_savetxt(tmp_path, table):
+    file_path = os.path.join(tmp_path, 'star.dat')
+    savetxt_path = os.path.join(tmp_path, 'savetxt.dat')
+    write_table(file_path, table, STAR_FORMAT)
+    np.savetxt(savetxt_path, table, fmt=STAR_FORMAT)
+    assert filecmp.cmp(file_path, savetxt_path, shallow=False)
+
+def test_gzip_table_matches_golden_file(tmp_path, table):
+    ## the name of the file is stored in the gzip header, so it must be the one of the golden file ##
+    file_path = os.path.join(tmp_path, 'star.dat.gz')
+    write_table(file_path, table, STAR_FORMAT, compression='gzip')
+    assert filecmp.cmp(file_path, os.path.join(DATA_PATH, 'star.dat.gz'), shallow=False)
+
+def test_gzip_golden_file_contains_plain_golden_file():
+    with gzip.open(os.path.join(DATA_PATH, 'star.dat.gz'), 'rb') as f:
+        content = f.read()
+    with open(os.path.join(DATA_PATH, 'star.dat'), 'rb') as f:
+        assert content == f.read()
+
+def test_golden_files_read_back(table):
+    for name in ('star.dat', 'star.dat.gz'):
+        np.testing.assert_array_equal(read_table(os.path.join(DATA_PATH, name)), table)
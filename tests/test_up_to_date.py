@@ -0,0 +1,50 @@
+"""
+Round trip of the outputs of a model through their manifest.json: converting a synthetic model
+again with skip_up_to_date must take the catalogue entry and the validation report from the
+manifest without parsing the model, while a changed parameter converts it again, e.g.
+python -m pytest tests
+"""
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from benchmarks.synthetic_profiles import write_model_set
+from src.interpolate_presn_model import InterpolatePresnModel
+
+CONVERSION = {'ngrid': 500, 'use_cache': False, 'skip_up_to_date': True}
+
+
+@pytest.fixture
+def model(tmp_path):
+    """
+    Synthetic KEPLER model and the folder of its outputs.
+    return: dict, with the keys file, properties and save_path.
+    """
+    write_model_set(str(tmp_path), [200], formats=('KEPLER_NEW',))
+    save_path = tmp_path / 'results'
+    save_path.mkdir()
+    return {'file': str(tmp_path / 'SYNTHETIC2024' / 'kn200.presn'),
+            'properties': str(tmp_path / 'properties.json'), 'save_path': str(save_path)}
+
+def convert(model, **kwargs):
+    return InterpolatePresnModel(model['file'], model['properties'], model['save_path'], **dict(CONVERSION, **kwargs))
+
+def test_up_to_date_model_is_not_parsed_again(model):
+    first = convert(model)
+    second = convert(model)
+    assert not first.up_to_date and second.up_to_date
+    ## as the batch conversion reports them ##
+    assert second.model_entry == json.loads(json.dumps(first.model_entry))
+    assert second.validation_report == json.loads(json.dumps(first.validation_report))
+    assert second.validation_report['passed']
+    assert len(second._stages_done) == 0
+    assert 'data' not in second.__dict__
+
+def test_changed_parameter_converts_again(model):
+    convert(model)
+    converted = convert(model, ngrid=600)
+    assert not converted.up_to_date
+    assert 'save' in converted._stages_done
+    assert convert(model, ngrid=600).up_to_date